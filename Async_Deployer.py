@@ -0,0 +1,274 @@
+import os
+import time
+import asyncio
+import contextlib
+from collections import deque
+from Blueprint_Diff import BlueprintDiffer
+from Metrics import metrics
+from Dockerfile_Generator import is_content_image
+
+# docker-compose 명령 한 번의 실행 결과.
+# 출력 전체를 메모리에 쌓지 않고, 오류 보고용으로 마지막 몇 줄만 보관합니다.
+class CommandResult:
+
+    def __init__(self, command: list):
+        self.command = command
+        self.returncode = None
+        self.timed_out = False
+        self.duration = 0.0
+        self.tail = deque(maxlen=AsyncDeploymentActuator.TAIL_LINES) # (스트림 이름, 줄) 목록
+
+    @property
+    def ok(self) -> bool:
+        return self.returncode == 0 and not self.timed_out
+
+    def __bool__(self):
+        return self.ok
+
+# docker-compose를 asyncio 서브프로세스로 실행하는 비동기 액츄에이터.
+# 출력은 한 줄씩 스트리밍되고, 명령별 타임아웃과 취소를 지원하며,
+# 서로 독립적인 작업(예: 빌드 중 상태 확인)을 동시에 실행할 수 있습니다.
+class AsyncDeploymentActuator:
+    TAIL_LINES = 200
+    STREAM_LIMIT = 1024 * 1024    # 출력 스트림 버퍼 한도 (asyncio 기본값 64 KiB보다 긴 줄도 한 번에 읽음)
+    MAX_LINE_BYTES = 64 * 1024    # 한도보다 긴 줄은 조각으로 읽되, 콘솔/tail에는 이 길이까지만 남김
+    # 생성된 Dockerfile은 BuildKit 문법(캐시 마운트)을 쓰므로 빌드 명령에는 항상 BuildKit을 켬
+    BUILD_ENV = {'DOCKER_BUILDKIT': '1', 'COMPOSE_DOCKER_CLI_BUILD': '1'}
+
+    # :param compose_file_path: 제어할 docker-compose.yml 파일의 경로
+    # :param timeout: 명령별 기본 타임아웃(초). None이면 제한 없음
+    # :param on_line: 출력 한 줄마다 (스트림 이름, 줄)로 호출되는 콜백. 기본값은 콘솔 출력
+    def __init__(self, compose_file_path: str, timeout: float = None, on_line=None):
+        self.compose_file_path = compose_file_path
+        self.timeout = timeout
+        self.on_line = on_line or self._print_line
+
+    # 명령을 실행하고 stdout/stderr를 한 줄씩 스트리밍합니다.
+    # 타임아웃이 지나거나 호출한 작업이 취소되면 프로세스를 종료합니다.
+    # :param env: 현재 환경 변수에 덧붙일 값 (예: BUILD_ENV)
+    async def run_command(self, command: list, timeout: float = None, on_line=None, env: dict = None) -> CommandResult:
+        timeout = self.timeout if timeout is None else timeout
+        on_line = on_line or self.on_line
+        result = CommandResult(command)
+        start = time.perf_counter()
+
+        try:
+            process = await asyncio.create_subprocess_exec(
+                *command, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE,
+                env={**os.environ, **env} if env else None, limit=self.STREAM_LIMIT)
+        except FileNotFoundError:
+            print(f"ERROR: '{command[0]}' command not found.")
+            print("Please ensure Docker and Docker Compose are installed and in your PATH.")
+            self._record(result, start)
+            return result
+
+        io_future = asyncio.gather(
+            self._pump(process.stdout, 'stdout', result, on_line),
+            self._pump(process.stderr, 'stderr', result, on_line),
+            process.wait()
+        )
+        try:
+            await asyncio.wait_for(io_future, timeout)
+            result.returncode = process.returncode
+        except asyncio.TimeoutError:
+            result.timed_out = True
+            await self._terminate(process)
+            result.returncode = process.returncode
+            print(f"ERROR: Command timed out after {timeout} seconds: {' '.join(command)}")
+        except asyncio.CancelledError:
+            # 취소된 입출력 작업의 결과를 회수하여 '예외가 회수되지 않음' 경고를 막음
+            io_future.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await io_future
+            await self._terminate(process)
+            result.returncode = process.returncode
+            print(f"Command cancelled: {' '.join(command)}")
+            raise
+        except Exception as e:
+            # 출력 처리 중 예상하지 못한 오류가 나도 프로세스를 남겨 두지 않음
+            io_future.cancel()
+            with contextlib.suppress(asyncio.CancelledError, Exception):
+                await io_future
+            await self._terminate(process)
+            result.returncode = process.returncode or -1
+            print(f"ERROR: Failed while running command '{' '.join(command)}': {e}")
+        finally:
+            self._record(result, start)
+
+        if result.ok:
+            print("Command successful.")
+        elif not result.timed_out:
+            print(f"ERROR: Command failed with exit code {result.returncode}")
+        return result
+
+    # 여러 작업을 동시에 실행하고 결과를 입력 순서대로 반환합니다.
+    #   await actuator.gather(actuator.up(build=True), actuator.status())
+    async def gather(self, *operations):
+        return await asyncio.gather(*operations)
+
+    # docker-compose up 명령을 실행하여 환경을 시작합니다.
+    # services를 지정하면 해당 서비스만 생성/재생성하고 나머지는 그대로 둡니다.
+    async def up(self, detach=True, build=False, services=None, no_deps=False, force_recreate=False,
+                 remove_orphans=False, timeout=None) -> CommandResult:
+        print("\nStarting deception environment...")
+        command = ['docker-compose', '-f', self.compose_file_path, 'up']
+
+        if build:
+            # 내용 해시 태그 이미지가 이미 로컬에 있는 서비스는 빌드하지 않음
+            to_build, up_to_date = await self.split_builds(services)
+            if up_to_date:
+                print(f"  - Images up to date (content hash), skipping build: {up_to_date}")
+                build = False
+                if to_build:
+                    result = await self.run_command(['docker-compose', '-f', self.compose_file_path, 'build', *to_build],
+                                                    timeout, env=self.BUILD_ENV)
+                    if not result.ok:
+                        return result
+        if build:
+            command.append('--build') #--build 플래그 추가
+        if detach:
+            command.append('-d') # -d: 백그라운드에서 실행
+        if no_deps:
+            command.append('--no-deps') # 의존 서비스는 건드리지 않음
+        if force_recreate:
+            command.append('--force-recreate')
+        if remove_orphans:
+            command.append('--remove-orphans') # 청사진에서 사라진 서비스의 컨테이너 제거
+        if services:
+            command.extend(services)
+
+        return await self.run_command(command, timeout, env=self.BUILD_ENV if build else None)
+
+    # 빌드할 서비스들을 (빌드가 필요한 서비스, 같은 내용 해시 태그의 이미지가 이미 있는 서비스)로 나눕니다.
+    # :param blueprint: 청사진 딕셔너리. 없으면 compose 파일을 읽음
+    async def split_builds(self, services=None, blueprint=None):
+        if blueprint is None:
+            blueprint = BlueprintDiffer().load(self.compose_file_path) or {}
+        all_services = blueprint.get('services') or {}
+        names = [name for name in (services or all_services) if 'build' in (all_services.get(name) or {})]
+
+        images = {name: all_services[name].get('image') for name in names}
+        checks = [self.image_exists(images[name]) if is_content_image(images[name]) else self._false() for name in names]
+        exists = await asyncio.gather(*checks)
+        up_to_date = [name for name, present in zip(names, exists) if present]
+        return [name for name in names if name not in up_to_date], up_to_date
+
+    # 로컬에 이미지가 있는지 docker image inspect로 확인합니다.
+    async def image_exists(self, image: str) -> bool:
+        try:
+            process = await asyncio.create_subprocess_exec(
+                'docker', 'image', 'inspect', image,
+                stdout=asyncio.subprocess.DEVNULL, stderr=asyncio.subprocess.DEVNULL)
+        except FileNotFoundError:
+            return False
+        return await process.wait() == 0
+
+    @staticmethod
+    async def _false() -> bool:
+        return False
+
+    # docker-compose down 명령을 실행하여 환경을 중지하고 리소스를 제거합니다.
+    async def down(self, timeout=None) -> CommandResult:
+        print("\nStopping deception environment...")
+        return await self.run_command(['docker-compose', '-f', self.compose_file_path, 'down'], timeout)
+
+    # docker-compose ps 명령을 실행하여 서비스 상태를 확인합니다.
+    async def status(self, timeout=None) -> CommandResult:
+        print("\nChecking deception environment status...")
+        return await self.run_command(['docker-compose', '-f', self.compose_file_path, 'ps'], timeout)
+
+    # 청사진 diff 결과(BlueprintDiffer.diff)에 따라 영향을 받은 서비스만 재배포합니다.
+    # 변경되지 않은 서비스의 컨테이너는 중단 없이 계속 실행됩니다.
+    # :param diff: {'added', 'removed', 'changed', 'unchanged'} 서비스 이름 목록
+    # :param force_services: 청사진은 같지만 빌드 입력이 바뀌어 다시 빌드해야 하는 서비스
+    async def apply_changes(self, diff: dict, force_services=None, timeout=None) -> bool:
+        force_services = [name for name in (force_services or []) if name in diff.get('unchanged', [])]
+        targets = diff.get('added', []) + diff.get('changed', []) + force_services
+        removed = diff.get('removed', [])
+
+        if not targets and not removed:
+            print("\nNo service changes detected. Deception environment left running as is.")
+            return True
+
+        print(f"\nApplying incremental redeploy: added={diff.get('added', [])}, "
+              f"changed={diff.get('changed', [])}, removed={removed}, rebuilt={force_services}")
+
+        blueprint = BlueprintDiffer().load(self.compose_file_path) or {}
+        services = blueprint.get('services') or {}
+        build_targets = [name for name in targets if 'build' in services.get(name, {})]
+        plain_targets = [name for name in targets if name not in build_targets]
+
+        # 같은 프로젝트에 대한 up 명령끼리는 네트워크/볼륨 생성이 겹칠 수 있으므로 순서대로 실행합니다.
+        success = True
+        if build_targets:
+            # 빌드가 필요한 서비스만 이미지를 다시 빌드하고 재생성합니다.
+            result = await self.up(build=True, services=build_targets, no_deps=True,
+                                   force_recreate=bool(force_services), remove_orphans=bool(removed), timeout=timeout)
+            success &= result.ok
+        if plain_targets:
+            result = await self.up(services=plain_targets, no_deps=True, remove_orphans=bool(removed), timeout=timeout)
+            success &= result.ok
+        if removed and not targets:
+            # 제거만 있는 경우: 이미 실행 중인 서비스에 대한 up은 아무 것도 바꾸지 않으므로
+            # --remove-orphans로 사라진 서비스의 컨테이너만 정리됩니다.
+            result = await self.up(services=diff.get('unchanged') or None, no_deps=True, remove_orphans=True, timeout=timeout)
+            success &= result.ok
+
+        return success
+
+    # (내부 함수) 스트림에서 한 줄씩 읽어 콜백에 넘기고, 마지막 몇 줄만 보관합니다.
+    async def _pump(self, stream, name: str, result: CommandResult, on_line):
+        while True:
+            line = await self._read_line(stream)
+            if not line:
+                return
+            text = line.decode('utf-8', errors='replace').rstrip('\n')
+            result.tail.append((name, text))
+            on_line(name, text)
+
+    # (내부 함수) 스트림에서 한 줄을 읽습니다. 버퍼 한도보다 긴 줄은 조각으로 나누어 끝까지 읽고
+    # (readline은 이때 ValueError를 냄), MAX_LINE_BYTES를 넘는 부분은 버립니다.
+    async def _read_line(self, stream) -> bytes:
+        chunks, size, truncated = [], 0, False
+        while True:
+            try:
+                chunk = await stream.readuntil(b'\n')
+                done = True
+            except asyncio.IncompleteReadError as e: # 마지막 줄에 개행이 없음
+                chunk, done = e.partial, True
+            except asyncio.LimitOverrunError as e:
+                chunk, done = await stream.read(e.consumed), False
+
+            if size < self.MAX_LINE_BYTES:
+                chunks.append(chunk[:self.MAX_LINE_BYTES - size])
+            truncated = truncated or size + len(chunk) > self.MAX_LINE_BYTES
+            size += len(chunk)
+            if done:
+                break
+
+        line = b''.join(chunks)
+        if truncated:
+            line = line.rstrip(b'\n') + f" ... ({size} bytes, truncated)\n".encode('utf-8')
+        return line
+
+    # (내부 함수) 프로세스를 정상 종료(SIGTERM)시키고, 응답이 없으면 강제 종료합니다.
+    async def _terminate(self, process, grace_seconds: float = 10):
+        if process.returncode is not None:
+            return
+        try:
+            process.terminate()
+            await asyncio.wait_for(asyncio.shield(process.wait()), grace_seconds)
+        except ProcessLookupError:
+            pass
+        except asyncio.TimeoutError:
+            process.kill()
+            await process.wait()
+
+    def _record(self, result: CommandResult, start: float):
+        result.duration = time.perf_counter() - start
+        metrics.record_command(result.command, result.duration, result.returncode)
+        metrics.flush()
+
+    @staticmethod
+    def _print_line(stream_name: str, line: str):
+        print(line)
@@ -0,0 +1,512 @@
+import os
+import re
+import sys
+import glob
+import json
+import mmap
+import time
+import heapq
+import fcntl
+import socket
+import struct
+from datetime import datetime
+from functools import lru_cache
+
+# 허니팟 공격 기록 저장소.
+# fluentd가 파일로 남긴 기록(fluentd/log/honeypot.*.log)을 읽어 세그먼트 파일에 차곡차곡 추가하고,
+# 시간과 출발지 IP로 빠르게 찾을 수 있도록 색인을 함께 유지합니다.
+#
+# 디렉토리 구성 (store_dir):
+#   manifest.json          : 봉인된 세그먼트 목록(최소/최대 시각, 건수, 크기)과 현재 쓰는 세그먼트 번호
+#   seg-000001.log         : 기록 한 건당 JSON 한 줄
+#   seg-000001.idx         : (쓰는 중인 세그먼트) 도착 순서대로 쌓이는 색인 항목
+#   seg-000001.tidx        : (봉인 후) 시각 순으로 정렬된 색인
+#   seg-000001.iidx        : (봉인 후) (IP, 시각) 순으로 정렬된 색인
+#
+# 색인 항목은 고정 크기(36바이트) 바이너리 레코드이며 mmap으로 읽고 이진 탐색합니다.
+# 조회는 시간 범위에 걸치는 세그먼트만 열고, 세그먼트 안에서는 이진 탐색으로 시작 위치를 찾으므로
+# 전체 기록량이 아니라 조회 범위와 결과 건수에 비례하는 시간이 걸립니다.
+# 쓰는 중인 세그먼트는 크기/시간 제한(segment_bytes, segment_seconds)으로 봉인되므로 선형 탐색 범위도 제한됩니다.
+
+INDEX_ENTRY = struct.Struct('<d16sQI') # 시각, IP(16바이트, IPv4는 IPv4-mapped), 데이터 오프셋, 길이
+NO_IP = bytes(16)
+IPV4_MAPPED_PREFIX = bytes(10) + b'\xff\xff'
+IP_PATTERN = re.compile(r'(?<![\w.:])((?:\d{1,3}\.){3}\d{1,3}|[0-9a-fA-F]{0,4}(?::[0-9a-fA-F]{0,4}){2,7})(?![\w.:])')
+
+# 기록에서 출발지 IP를 찾습니다.
+# 가짜 앱이 보내는 구조화된 기록은 source_ip 필드를, docker fluentd 로그 드라이버로 들어온
+# 텍스트 로그(nginx 접근 로그, 'Request from <ip>: ...')는 log 필드에서 처음 나오는 IP를 사용합니다.
+# :return: IP 문자열 또는 None
+def extract_source_ip(record: dict):
+    for key in ('source_ip', 'remote_addr', 'client_ip', 'remote'):
+        value = record.get(key)
+        if value:
+            ip = _normalize_ip(str(value))
+            if ip:
+                return ip
+    message = record.get('log') or record.get('message')
+    if isinstance(message, str):
+        for match in IP_PATTERN.finditer(message[:512]):
+            candidate = match.group(1)
+            # 'Request from 2001:db8::5: GET ...'처럼 IPv6 뒤에 구분자 ':'가 붙은 경우
+            ip = _normalize_ip(candidate) or (candidate.endswith(':') and _normalize_ip(candidate[:-1]))
+            if ip:
+                return ip
+    return None
+
+# IP 문자열을 표준 표기로 바꿉니다. (IPv4-mapped IPv6는 IPv4로)
+# 공격 기록에는 같은 IP가 반복해서 나오므로 결과를 캐시합니다. (ipaddress 모듈보다 훨씬 빠른 inet_pton 사용)
+@lru_cache(maxsize=65536)
+def _normalize_ip(value: str):
+    value = value.strip().strip('[]')
+    try:
+        return socket.inet_ntop(socket.AF_INET, socket.inet_pton(socket.AF_INET, value))
+    except OSError:
+        pass
+    try:
+        packed = socket.inet_pton(socket.AF_INET6, value.split('%', 1)[0])
+    except OSError:
+        return None
+    if packed.startswith(IPV4_MAPPED_PREFIX):
+        return socket.inet_ntop(socket.AF_INET, packed[12:])
+    return socket.inet_ntop(socket.AF_INET6, packed)
+
+# 색인용 16바이트 표현 (IPv4는 IPv4-mapped IPv6 형태)
+@lru_cache(maxsize=65536)
+def _pack_ip(ip) -> bytes:
+    if not ip:
+        return NO_IP
+    if ':' in ip:
+        return socket.inet_pton(socket.AF_INET6, ip)
+    return IPV4_MAPPED_PREFIX + socket.inet_pton(socket.AF_INET, ip)
+
+# '1h', '30m', '2d' 같은 상대 시간, ISO 8601 시각, 또는 epoch 초를 epoch 초로 바꿉니다.
+def parse_time(value: str, now: float = None) -> float:
+    now = time.time() if now is None else now
+    match = re.fullmatch(r'(\d+(?:\.\d+)?)([smhd])', value.strip())
+    if match:
+        unit = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}[match.group(2)]
+        return now - float(match.group(1)) * unit
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.fromisoformat(value.strip().replace('Z', '+00:00')).timestamp()
+
+class AttackLogStore:
+
+    # :param store_dir: 세그먼트와 색인을 저장할 디렉토리
+    # :param segment_bytes: 세그먼트 하나의 최대 데이터 크기. 넘으면 봉인하고 새 세그먼트를 시작
+    # :param segment_seconds: 세그먼트 하나가 담는 최대 시간 폭(초)
+    # :param max_bytes: 저장소 전체의 최대 크기. 넘으면 가장 오래된 봉인 세그먼트부터 삭제 (None이면 무제한)
+    def __init__(self, store_dir: str = 'attack_logs', segment_bytes: int = 64 * 1024 * 1024,
+                 segment_seconds: int = 3600, max_bytes: int = 2 * 1024 * 1024 * 1024):
+        self.store_dir = store_dir
+        self.segment_bytes = segment_bytes
+        self.segment_seconds = segment_seconds
+        self.max_bytes = max_bytes
+        self._writer = None # 쓰기용으로 열었을 때의 상태 (open_for_write)
+        os.makedirs(store_dir, exist_ok=True)
+
+    # --- 쓰기 ---
+
+    # 쓰기를 시작합니다. 한 저장소에는 프로세스 하나만 쓸 수 있습니다.
+    def open_for_write(self):
+        if self._writer is not None:
+            return self
+        lock_file = open(os.path.join(self.store_dir, 'store.lock'), 'w')
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            raise RuntimeError(f"Another process is already writing to '{self.store_dir}'.")
+
+        manifest = self._load_manifest()
+        segment_id = manifest['active']
+        data_path, index_path = self._path(segment_id, 'log'), self._path(segment_id, 'idx')
+        data_size = self._recover(data_path, index_path)
+
+        self._writer = {
+            'lock': lock_file,
+            'manifest': manifest,
+            'id': segment_id,
+            'data': open(data_path, 'ab'),
+            'index': open(index_path, 'ab'),
+            'size': data_size,
+            'min_t': None,
+            'max_t': None,
+            'count': os.path.getsize(index_path) // INDEX_ENTRY.size,
+        }
+        if self._writer['count']:
+            times = [entry[0] for entry in self._read_entries(index_path)]
+            self._writer['min_t'], self._writer['max_t'] = min(times), max(times)
+        return self
+
+    # 기록 한 건을 추가합니다. (flush()를 호출해야 다른 프로세스의 조회에 보입니다)
+    def append(self, timestamp: float, tag: str, record: dict):
+        writer = self._writer or self.open_for_write()._writer
+        if writer['count'] and (writer['size'] >= self.segment_bytes
+                                or timestamp - writer['min_t'] >= self.segment_seconds
+                                or writer['min_t'] - timestamp >= self.segment_seconds):
+            self.rotate()
+            writer = self._writer
+
+        ip = extract_source_ip(record)
+        line = json.dumps({'time': timestamp, 'tag': tag, 'source_ip': ip, 'record': record},
+                          ensure_ascii=False, separators=(',', ':'), default=str).encode('utf-8') + b'\n'
+        writer['data'].write(line)
+        writer['index'].write(INDEX_ENTRY.pack(timestamp, _pack_ip(ip), writer['size'], len(line)))
+        writer['size'] += len(line)
+        writer['count'] += 1
+        writer['min_t'] = timestamp if writer['min_t'] is None else min(writer['min_t'], timestamp)
+        writer['max_t'] = timestamp if writer['max_t'] is None else max(writer['max_t'], timestamp)
+
+    # 데이터를 먼저, 색인을 나중에 내보냅니다. (조회하는 쪽은 색인에 있는 기록만 읽음)
+    def flush(self):
+        if self._writer is not None:
+            self._writer['data'].flush()
+            self._writer['index'].flush()
+
+    # 현재 세그먼트를 봉인(정렬된 색인 생성)하고 새 세그먼트를 시작합니다.
+    def rotate(self):
+        writer = self._writer
+        if writer is None or not writer['count']:
+            return
+        self.flush()
+        writer['data'].close()
+        writer['index'].close()
+
+        segment_id = writer['id']
+        index_path = self._path(segment_id, 'idx')
+        entries = list(self._read_entries(index_path))
+        self._write_entries(self._path(segment_id, 'tidx'), sorted(entries, key=lambda entry: (entry[0], entry[2])))
+        self._write_entries(self._path(segment_id, 'iidx'), sorted(entries, key=lambda entry: (entry[1], entry[0], entry[2])))
+
+        manifest = writer['manifest']
+        manifest['segments'].append({
+            'id': segment_id,
+            'min_t': writer['min_t'],
+            'max_t': writer['max_t'],
+            'count': writer['count'],
+            'bytes': writer['size'],
+        })
+        manifest['active'] = segment_id + 1
+        self._enforce_retention(manifest)
+        self._save_manifest(manifest) # 봉인 색인이 완성된 뒤에 목록에 올림
+        os.unlink(index_path)
+
+        writer.update({
+            'id': segment_id + 1,
+            'data': open(self._path(segment_id + 1, 'log'), 'ab'),
+            'index': open(self._path(segment_id + 1, 'idx'), 'ab'),
+            'size': 0, 'min_t': None, 'max_t': None, 'count': 0,
+        })
+
+    def close(self):
+        if self._writer is None:
+            return
+        self.flush()
+        self._writer['data'].close()
+        self._writer['index'].close()
+        self._writer['lock'].close()
+        self._writer = None
+
+    # --- 조회 ---
+
+    # 조건에 맞는 기록을 시각 순서대로 반환합니다.
+    # :param ip: 출발지 IP (None이면 모든 IP)
+    # :param since, until: epoch 초 범위 (양 끝 포함, None이면 제한 없음)
+    # :param tag: 태그 접두사 (예: 'honeypot.api')
+    # :param limit: 최대 건수
+    def query(self, ip: str = None, since: float = None, until: float = None, tag: str = None, limit: int = None):
+        since = float('-inf') if since is None else since
+        until = float('inf') if until is None else until
+        ip_key = None
+        if ip is not None:
+            ip_key = _pack_ip(_normalize_ip(ip) or ip)
+
+        manifest = self._load_manifest()
+        streams = []
+        for segment in manifest['segments']:
+            if segment['max_t'] < since or segment['min_t'] > until:
+                continue
+            streams.append(self._query_sealed(segment['id'], ip_key, since, until))
+        streams.append(self._query_active(manifest['active'], ip_key, since, until))
+
+        results = []
+        for timestamp, document in heapq.merge(*streams, key=lambda item: item[0]):
+            if tag and not (document['tag'] == tag or document['tag'].startswith(tag + '.')):
+                continue
+            results.append(document)
+            if limit is not None and len(results) >= limit:
+                break
+        return results
+
+    # 저장소 요약 정보
+    def stats(self) -> dict:
+        manifest = self._load_manifest()
+        segments = manifest['segments']
+        active_index = self._path(manifest['active'], 'idx')
+        active_count = os.path.getsize(active_index) // INDEX_ENTRY.size if os.path.exists(active_index) else 0
+        active_bytes = os.path.getsize(self._path(manifest['active'], 'log')) if active_count else 0
+        return {
+            'segments': len(segments) + (1 if active_count else 0),
+            'records': sum(segment['count'] for segment in segments) + active_count,
+            'bytes': sum(segment['bytes'] for segment in segments) + active_bytes,
+            'oldest': segments[0]['min_t'] if segments else None,
+            'newest': segments[-1]['max_t'] if segments else None,
+        }
+
+    # (내부 함수) 봉인된 세그먼트에서 정렬된 색인을 이진 탐색하여 읽습니다.
+    def _query_sealed(self, segment_id: int, ip_key, since: float, until: float):
+        suffix = 'tidx' if ip_key is None else 'iidx'
+        with _MappedFile(self._path(segment_id, suffix)) as index, _MappedFile(self._path(segment_id, 'log')) as data:
+            if index.buffer is None or data.buffer is None:
+                return
+            count = len(index.buffer) // INDEX_ENTRY.size
+            if ip_key is None:
+                position = _lower_bound(index.buffer, count, lambda entry: entry[0] < since)
+            else:
+                position = _lower_bound(index.buffer, count, lambda entry: (entry[1], entry[0]) < (ip_key, since))
+            while position < count:
+                timestamp, entry_ip, offset, length = INDEX_ENTRY.unpack_from(index.buffer, position * INDEX_ENTRY.size)
+                if timestamp > until or (ip_key is not None and entry_ip != ip_key):
+                    break
+                yield timestamp, json.loads(data.buffer[offset:offset + length])
+                position += 1
+
+    # (내부 함수) 쓰는 중인 세그먼트의 색인을 훑어봅니다. (도착 순서이므로 골라낸 뒤 정렬)
+    def _query_active(self, segment_id: int, ip_key, since: float, until: float):
+        # 색인을 먼저 열어야 데이터 쪽 매핑에 색인이 가리키는 기록이 모두 포함됨
+        with _MappedFile(self._path(segment_id, 'idx')) as index, _MappedFile(self._path(segment_id, 'log')) as data:
+            if index.buffer is None or data.buffer is None:
+                return
+            matches = []
+            for position in range(len(index.buffer) // INDEX_ENTRY.size):
+                timestamp, entry_ip, offset, length = INDEX_ENTRY.unpack_from(index.buffer, position * INDEX_ENTRY.size)
+                if since <= timestamp <= until and (ip_key is None or entry_ip == ip_key) \
+                        and offset + length <= len(data.buffer):
+                    matches.append((timestamp, offset, length))
+            for timestamp, offset, length in sorted(matches):
+                yield timestamp, json.loads(data.buffer[offset:offset + length])
+
+    # --- 내부 함수 ---
+
+    def _path(self, segment_id: int, suffix: str) -> str:
+        return os.path.join(self.store_dir, f"seg-{segment_id:06d}.{suffix}")
+
+    def _load_manifest(self) -> dict:
+        try:
+            with open(os.path.join(self.store_dir, 'manifest.json'), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {'segments': [], 'active': 1}
+
+    # 임시 파일에 쓴 뒤 교체하여 조회하는 쪽이 반쯤 쓴 목록을 읽지 않도록 합니다.
+    def _save_manifest(self, manifest: dict):
+        path = os.path.join(self.store_dir, 'manifest.json')
+        with open(path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=1)
+        os.replace(path + '.tmp', path)
+
+    # 비정상 종료로 남은 불완전한 색인 항목과, 색인에 오르지 못한 데이터 꼬리를 잘라냅니다.
+    # :return: 복구 후 데이터 파일 크기
+    def _recover(self, data_path: str, index_path: str) -> int:
+        if not os.path.exists(index_path):
+            open(index_path, 'wb').close()
+        index_size = os.path.getsize(index_path)
+        if index_size % INDEX_ENTRY.size:
+            os.truncate(index_path, index_size - index_size % INDEX_ENTRY.size)
+
+        data_end = 0
+        for _, _, offset, length in self._read_entries(index_path):
+            data_end = max(data_end, offset + length)
+        data_size = os.path.getsize(data_path) if os.path.exists(data_path) else 0
+        if data_size < data_end:
+            print(f"⚠️ Warning: Segment '{data_path}' is shorter than its index. Rebuilding the index.")
+            entries = [entry for entry in self._read_entries(index_path) if entry[2] + entry[3] <= data_size]
+            self._write_entries(index_path, entries)
+            data_end = max((entry[2] + entry[3] for entry in entries), default=0)
+        if data_size > data_end:
+            os.truncate(data_path, data_end)
+        return data_end
+
+    def _read_entries(self, path: str):
+        with open(path, 'rb') as f:
+            data = f.read()
+        return INDEX_ENTRY.iter_unpack(data[:len(data) - len(data) % INDEX_ENTRY.size])
+
+    def _write_entries(self, path: str, entries):
+        with open(path + '.tmp', 'wb') as f:
+            for entry in entries:
+                f.write(INDEX_ENTRY.pack(*entry))
+        os.replace(path + '.tmp', path)
+
+    # 전체 크기가 max_bytes를 넘으면 가장 오래된 봉인 세그먼트부터 지웁니다.
+    def _enforce_retention(self, manifest: dict):
+        if self.max_bytes is None:
+            return
+        segments = manifest['segments']
+        while len(segments) > 1 and sum(segment['bytes'] for segment in segments) > self.max_bytes:
+            removed = segments.pop(0)
+            for suffix in ('log', 'tidx', 'iidx'):
+                try:
+                    os.unlink(self._path(removed['id'], suffix))
+                except FileNotFoundError:
+                    pass
+            print(f"Attack log store: removed segment {removed['id']} ({removed['count']} records) for retention.")
+
+# 정렬된 색인에서 조건(before)이 처음으로 거짓이 되는 위치를 찾습니다.
+def _lower_bound(buffer, count: int, before) -> int:
+    low, high = 0, count
+    while low < high:
+        middle = (low + high) // 2
+        if before(INDEX_ENTRY.unpack_from(buffer, middle * INDEX_ENTRY.size)):
+            low = middle + 1
+        else:
+            high = middle
+    return low
+
+# 읽기 전용 mmap. 파일이 없거나(보존 정책으로 삭제됨) 비어 있으면 buffer는 None.
+class _MappedFile:
+
+    def __init__(self, path: str):
+        self.path = path
+        self.buffer = None
+        self._file = None
+
+    def __enter__(self):
+        try:
+            self._file = open(self.path, 'rb')
+            if os.fstat(self._file.fileno()).st_size:
+                self.buffer = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except FileNotFoundError:
+            pass
+        return self
+
+    def __exit__(self, *exc_info):
+        if self.buffer is not None:
+            self.buffer.close()
+        if self._file is not None:
+            self._file.close()
+
+# fluentd out_file 출력(JSON 한 줄에 fluentd_time, fluentd_tag가 주입된 형식)을 따라 읽어 저장소에 넣습니다.
+# 파일별로 읽은 위치를 store_dir/ingest_state.json에 기록하므로 다시 시작해도 이어서 읽습니다.
+class FluentdFileIngester:
+
+    def __init__(self, store: AttackLogStore, log_dir: str, pattern: str = 'honeypot*.log'):
+        self.store = store
+        self.log_dir = log_dir
+        self.pattern = pattern
+        self.state_path = os.path.join(store.store_dir, 'ingest_state.json')
+        try:
+            with open(self.state_path, 'r', encoding='utf-8') as f:
+                self.offsets = json.load(f)
+        except FileNotFoundError:
+            self.offsets = {}
+
+    # 새로 추가된 줄을 모두 읽어 저장합니다.
+    # :return: 저장한 기록 수
+    def ingest_once(self) -> int:
+        ingested = 0
+        current_files = set()
+        for path in sorted(glob.glob(os.path.join(self.log_dir, self.pattern))):
+            name = os.path.basename(path)
+            current_files.add(name)
+            offset = self.offsets.get(name, 0)
+            if os.path.getsize(path) < offset:
+                offset = 0 # 같은 이름으로 새로 만들어진 파일
+            with open(path, 'rb') as f:
+                f.seek(offset)
+                for line in f:
+                    if not line.endswith(b'\n'):
+                        break # fluentd가 아직 쓰는 중인 마지막 줄
+                    offset += len(line)
+                    ingested += self._ingest_line(line, path)
+            self.offsets[name] = offset
+
+        self.store.flush()
+        # 사라진 파일의 읽기 위치는 정리
+        self.offsets = {name: offset for name, offset in self.offsets.items() if name in current_files}
+        with open(self.state_path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(self.offsets, f)
+        os.replace(self.state_path + '.tmp', self.state_path)
+        return ingested
+
+    # interval초마다 새 기록을 읽습니다. (Ctrl+C로 종료)
+    def follow(self, interval: float = 2.0):
+        print(f"Following fluentd output in '{self.log_dir}' -> '{self.store.store_dir}'. (Ctrl+C to stop)")
+        try:
+            while True:
+                count = self.ingest_once()
+                if count:
+                    print(f"Ingested {count} records.")
+                time.sleep(interval)
+        except KeyboardInterrupt:
+            pass
+
+    def _ingest_line(self, line: bytes, path: str) -> int:
+        try:
+            record = json.loads(line)
+        except ValueError:
+            print(f"⚠️ Warning: Skipping malformed line in '{path}'.")
+            return 0
+        if not isinstance(record, dict):
+            return 0
+        timestamp = record.pop('fluentd_time', None)
+        tag = record.pop('fluentd_tag', None) or os.path.basename(path).split('.')[0]
+        try:
+            timestamp = float(timestamp) if timestamp is not None else time.time()
+        except (TypeError, ValueError):
+            timestamp = parse_time(str(timestamp))
+        self.store.append(timestamp, tag, record)
+        return 1
+
+# 조회 결과 한 건을 한 줄로 출력합니다.
+def format_entry(document: dict) -> str:
+    when = datetime.fromtimestamp(document['time']).strftime('%Y-%m-%d %H:%M:%S')
+    record = document['record']
+    summary = record.get('log') or record.get('message')
+    if summary is None and 'method' in record:
+        summary = f"{record['method']} {record.get('url') or record.get('path')} -> {record.get('status')}"
+    if summary is None:
+        summary = json.dumps(record, ensure_ascii=False)
+    return f"{when}  {document['tag']:<28} {document['source_ip'] or '-':<16} {str(summary).rstrip()[:200]}"
+
+
+# --- 수집 및 조회 명령 ---
+# python Attack_Log_Store.py ingest <fluentd 로그 디렉토리> [--follow] [--store=<dir>]
+# python Attack_Log_Store.py query [--ip=<ip>] [--since=1h] [--until=<시각>] [--tag=honeypot.api] [--limit=100] [--json] [--store=<dir>]
+# python Attack_Log_Store.py stats [--store=<dir>]
+if __name__ == '__main__':
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    options = dict(arg[2:].split('=', 1) if '=' in arg else (arg[2:], '') for arg in sys.argv[1:] if arg.startswith('--'))
+    command = args[0] if args else 'stats'
+    store = AttackLogStore(options.get('store', 'attack_logs'))
+
+    if command == 'ingest':
+        ingester = FluentdFileIngester(store.open_for_write(), args[1] if len(args) > 1 else os.path.join('fluentd', 'log'))
+        try:
+            if 'follow' in options:
+                ingester.follow()
+            else:
+                print(f"Ingested {ingester.ingest_once()} records.")
+        finally:
+            store.close()
+    elif command == 'query':
+        started = time.perf_counter()
+        results = store.query(
+            ip=options.get('ip'),
+            since=parse_time(options['since']) if 'since' in options else None,
+            until=parse_time(options['until']) if 'until' in options else None,
+            tag=options.get('tag'),
+            limit=int(options['limit']) if 'limit' in options else None,
+        )
+        for document in results:
+            print(json.dumps(document, ensure_ascii=False) if 'json' in options else format_entry(document))
+        print(f"{len(results)} records ({(time.perf_counter() - started) * 1000:.1f} ms)", file=sys.stderr)
+    elif command == 'stats':
+        print(json.dumps(store.stats(), indent=2))
+    else:
+        print(f"Unknown command: '{command}'")
+        print("Usage: python Attack_Log_Store.py [ingest <fluentd log dir> [--follow] | query [--ip=] [--since=] [--until=] [--tag=] [--limit=] [--json] | stats] [--store=<dir>]")
+        sys.exit(1)
@@ -0,0 +1,453 @@
+import os
+import re
+import copy
+import json
+import time
+import asyncio
+from Async_Deployer import AsyncDeploymentActuator
+from Blueprint_Diff import BlueprintDiffer
+from IaC_Renderer import IaCRenderer
+from Docker_Engine_Backend import compose_project_name, _parse_port
+
+COLORS = ('blue', 'green')
+FRONT_DIR = '.honeybot_front'            # 앞단 nginx 설정과 상태 파일을 두는 디렉토리 (청사진 파일과 같은 위치)
+FRONT_IMAGE = 'nginx:1.25-alpine'        # 공식 nginx 이미지는 stream 모듈을 포함
+FRONT_NETWORK_KEY = 'honeybot_front'     # 청사진 안에서 쓰는 앞단 네트워크 키 (실제 이름은 '<프로젝트>-front')
+FRONT_CONF_IN_CONTAINER = '/etc/nginx/honeybot/nginx.conf'
+COLLECTOR_SERVICE = 'logging'            # Blueprint_Generator가 주입하는 로그 수집기 서비스 (공격자 주소가 필요 없음)
+NGINX_CONF_IN_CONTAINER = '/etc/nginx/nginx.conf'
+
+# 허니팟 재배포를 무중단(blue/green)으로 수행하는 배포기.
+# 새 세대를 별도 프로젝트('<프로젝트>-blue' / '<프로젝트>-green')로 빌드/시작하고 헬스체크가 통과하면,
+# 공개 포트를 가진 앞단 nginx(stream 프록시)의 upstream을 새 세대로 바꾼 뒤(nginx -s reload)
+# 이전 세대를 일정 시간 드레인하고 내립니다. 빌드하는 동안에도 이전 세대가 계속 응답합니다.
+class BlueGreenDeployer:
+
+    # :param compose_file_path: 생성된 청사진(deception-compose.yml) 경로
+    # :param project_name: 기본 프로젝트 이름. 없으면 docker-compose와 같은 규칙으로 정함
+    # :param timeout: docker-compose 명령별 타임아웃(초)
+    # :param health_timeout: 새 세대의 컨테이너가 running/healthy가 되기를 기다리는 최대 시간(초)
+    # :param drain_seconds: 전환 후 이전 세대의 기존 연결이 끝나기를 기다리는 시간(초)
+    def __init__(self, compose_file_path: str, project_name: str = None, timeout: float = None,
+                 health_timeout: float = 120, drain_seconds: float = 10, front_image: str = FRONT_IMAGE):
+        self.compose_file_path = os.path.abspath(compose_file_path)
+        self.project_dir = os.path.dirname(self.compose_file_path)
+        self.base_name = compose_project_name(compose_file_path, project_name)
+        self.health_timeout = health_timeout
+        self.drain_seconds = drain_seconds
+        self.front_image = front_image
+        self.runner = AsyncDeploymentActuator(self.compose_file_path, timeout=timeout)
+
+        stem = os.path.splitext(os.path.basename(self.compose_file_path))[0]
+        self.front_dir = os.path.join(self.project_dir, FRONT_DIR)
+        self.front_conf = os.path.join(self.front_dir, 'nginx.conf')
+        self.state_file = os.path.join(self.front_dir, f"{stem}.state.json")
+        # 세대별/앞단 compose 파일은 상대 경로(빌드 컨텍스트, 볼륨)가 그대로 맞도록 원본 청사진 옆에 둠
+        self.generation_files = {color: os.path.join(self.project_dir, f".{stem}.{color}.yml") for color in COLORS}
+        self.front_file = os.path.join(self.project_dir, f".{stem}.front.yml")
+        self.front_project = f"{self.base_name}-front"
+        self.network_name = f"{self.base_name}-front"
+
+    def project(self, color: str) -> str:
+        return f"{self.base_name}-{color}"
+
+    # 현재 활성 세대 등 상태를 읽습니다. 아직 blue/green 배포를 한 적이 없으면 빈 딕셔너리를 반환합니다.
+    def load_state(self) -> dict:
+        try:
+            with open(self.state_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    # 새 세대를 배포하고 앞단을 전환합니다. 실패하면 새 세대만 정리하고 이전 세대는 그대로 둡니다.
+    async def deploy(self, build: bool = True) -> bool:
+        state = self.load_state()
+        active = state.get('active')
+        target = 'green' if active == 'blue' else 'blue'
+
+        blueprint = BlueprintDiffer().load(self.compose_file_path)
+        if not blueprint:
+            print(f"ERROR: Cannot read blueprint '{self.compose_file_path}'.")
+            return False
+
+        if not await self._ensure_network():
+            return False
+        generation, routes = self.generation_blueprint(blueprint, target, await self._front_subnets())
+        if not IaCRenderer().render(generation, self.generation_files[target]):
+            return False
+
+        print(f"\nBlue/green: starting generation '{target}' as project '{self.project(target)}'"
+              + (f" while '{active}' keeps serving..." if active else "..."))
+
+        if build:
+            # 내용 해시 태그 이미지가 이미 있는 서비스는 빌드하지 않음 (두 세대가 같은 이미지를 공유)
+            to_build, up_to_date = await self.runner.split_builds(blueprint=generation)
+            if up_to_date:
+                print(f"  - Images up to date (content hash), skipping build: {up_to_date}")
+                build = False
+                if to_build and not (await self._compose(target, 'build', *to_build, env=self.runner.BUILD_ENV)).ok:
+                    await self._compose(target, 'down', '--remove-orphans')
+                    return False
+        command = ['up', '-d', '--remove-orphans'] + (['--build'] if build else [])
+        if not (await self._compose(target, *command, env=self.runner.BUILD_ENV if build else None)).ok:
+            print(f"ERROR: Generation '{target}' failed to start. Keeping '{active or 'current'}' deployment.")
+            await self._compose(target, 'down', '--remove-orphans')
+            return False
+
+        if not await self._wait_until_healthy(target):
+            print(f"ERROR: Generation '{target}' did not become healthy. Keeping '{active or 'current'}' deployment.")
+            await self._compose(target, 'down', '--remove-orphans')
+            return False
+
+        if not await self._switch(routes, state):
+            await self._compose(target, 'down', '--remove-orphans')
+            return False
+
+        self._save_state({
+            'active': target,
+            'previous': active,
+            'generation': state.get('generation', 0) + 1,
+            'switched_at': time.time(),
+            'routes': routes,
+        })
+        print(f"[SUCCESS] Blue/green: traffic switched to generation '{target}'.")
+
+        if active:
+            await self._drain(active)
+        return True
+
+    # 앞단과 두 세대를 모두 내립니다.
+    async def down(self) -> bool:
+        print("\nStopping blue/green deception environment...")
+        success = True
+        if os.path.exists(self.front_file):
+            success &= (await self._compose_file(self.front_project, self.front_file, 'down')).ok
+        for color in COLORS:
+            if os.path.exists(self.generation_files[color]):
+                success &= (await self._compose(color, 'down', '--remove-orphans')).ok
+        if success:
+            try:
+                os.remove(self.state_file)
+            except FileNotFoundError:
+                pass
+        return success
+
+    # 활성 세대와 앞단의 상태를 출력합니다.
+    async def status(self) -> bool:
+        state = self.load_state()
+        if not state:
+            print("\nNo blue/green deployment found.")
+            return (await self.runner.status()).ok
+        switched_at = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(state.get('switched_at', 0)))
+        print(f"\nBlue/green: active generation '{state['active']}' (#{state.get('generation')}, switched at {switched_at})")
+        for route in state.get('routes', []):
+            print(f"  - {route['listen']} -> {route['upstream']}")
+        front = await self._compose_file(self.front_project, self.front_file, 'ps')
+        active = await self._compose(state['active'], 'ps')
+        return front.ok and active.ok
+
+    # 청사진을 한 세대용으로 바꿉니다.
+    # 호스트 포트 공개는 앞단이 맡으므로 서비스의 공개 포트를 빼고, 대신 앞단 네트워크에 '<색>-<서비스>' 별칭으로 연결합니다.
+    # 앞단을 거치면 허니팟에는 앞단의 주소가 보이므로, 미끼 서비스의 TCP 포트는 PROXY 프로토콜로 원래 공격자 주소를 넘깁니다.
+    #   - 가짜 앱(Dockerfile.honeypot): HONEYPOT_PROXY_PROTOCOL=1로 헤더를 읽게 함
+    #   - nginx 미끼: 마운트된 nginx.conf를 real_ip(set_real_ip_from 앞단 네트워크) 설정을 더한 사본으로 바꿔 마운트
+    #   - 그 밖의 미끼: 주소를 넘길 수 없으므로 경고 (로그 수집기 포트는 주소가 필요 없으므로 그대로 전달)
+    # 로그 수집기는 세대마다 다른 파일 이름(honeypot-<색>.*)으로 쓰게 하여, 겹치는 동안 같은 파일에 쓰지 않게 합니다.
+    # :param trusted_networks: 앞단 네트워크의 서브넷 목록 (nginx 미끼의 set_real_ip_from)
+    # :return: (세대 청사진, 앞단 라우트 목록)
+    def generation_blueprint(self, blueprint: dict, color: str, trusted_networks=()):
+        generation = copy.deepcopy(dict(blueprint))
+        services = generation.get('services') or {}
+        routes = []
+
+        for service_name, service in services.items():
+            if 'container_name' in service:
+                # 두 세대가 동시에 떠 있어야 하므로 고정된 컨테이너 이름은 쓸 수 없음
+                print(f"  - ⚠️ Warning: Dropping container_name of '{service_name}' for blue/green deployment.")
+                del service['container_name']
+
+            logging = service.get('logging') or {}
+            if logging.get('driver') == 'fluentd':
+                # 로그 드라이버는 호스트의 24224(앞단이 공개)로 접속하므로, 앞단이 아직 없거나 전환 중이어도
+                # 컨테이너가 시작되도록 비동기 모드로 둠 (연결될 때까지 버퍼링)
+                options = dict(logging.get('options') or {})
+                options.setdefault('fluentd-async', 'true')
+                service['logging'] = dict(logging, options=options)
+            if service_name == COLLECTOR_SERVICE:
+                _set_environment(service, 'HONEYBOT_LOG_PREFIX', f"honeypot-{color}") # fluentd/conf/fluent.conf 참고
+
+            ports = service.get('ports') or []
+            if not ports:
+                continue
+            if 'network_mode' in service:
+                print(f"  - ⚠️ Warning: '{service_name}' uses network_mode; its ports cannot be switched by the front.")
+                continue
+
+            kept, service_routes, upstream_host = [], [], f"{color}-{service_name}"
+            for port in ports:
+                bindings = _parse_port(port)
+                if any(binding is None for _, binding in bindings):
+                    kept.append(port) # 호스트 포트가 임의로 정해지는 포트는 세대끼리 충돌하지 않으므로 그대로 둠
+                    continue
+                for container_port, binding in bindings:
+                    target_port, protocol = container_port.split('/')
+                    service_routes.append({
+                        'service': service_name,
+                        'host_ip': binding['HostIp'],
+                        'listen': f"{binding['HostPort']}/{protocol}",
+                        'upstream': f"{upstream_host}:{target_port}",
+                        'proxy_protocol': False,
+                    })
+            if kept:
+                service['ports'] = kept
+            else:
+                del service['ports']
+            if service_name != COLLECTOR_SERVICE:
+                self._preserve_client_address(service_name, service, service_routes, color, trusted_networks)
+            routes.extend(service_routes)
+
+            if any(route['service'] == service_name for route in routes):
+                networks = service.get('networks') or ['default']
+                if not isinstance(networks, dict):
+                    networks = {name: None for name in networks}
+                networks = dict(networks)
+                networks[FRONT_NETWORK_KEY] = {'aliases': [upstream_host]}
+                service['networks'] = networks
+
+        if routes:
+            generation.setdefault('networks', {})
+            generation['networks'] = dict(generation['networks'] or {})
+            generation['networks'][FRONT_NETWORK_KEY] = {'external': True, 'name': self.network_name}
+        return generation, routes
+
+    # (내부 함수) 미끼 서비스가 앞단 뒤에서도 공격자 주소를 기록할 수 있도록 PROXY 프로토콜을 켭니다.
+    # 켤 수 있는 TCP 라우트에는 'proxy_protocol'을 표시하고, 그렇지 않은 라우트는 경고합니다.
+    def _preserve_client_address(self, service_name: str, service: dict, routes: list, color: str, trusted_networks):
+        tcp_routes = [route for route in routes if route['listen'].endswith('/tcp')]
+        build = service.get('build')
+        dockerfile = build.get('dockerfile') if isinstance(build, dict) else None
+        image = service.get('image') if isinstance(service.get('image'), str) else ''
+
+        enabled = False
+        if tcp_routes and dockerfile == 'Dockerfile.honeypot':
+            _set_environment(service, 'HONEYPOT_PROXY_PROTOCOL', '1')
+            enabled = True
+        elif tcp_routes and 'nginx' in image:
+            enabled = self._proxy_protocol_nginx(service_name, service, tcp_routes, color, trusted_networks)
+
+        for route in routes:
+            if enabled and route in tcp_routes:
+                route['proxy_protocol'] = True
+            else:
+                print(f"  - ⚠️ WARNING: Decoy port {route['listen']} of '{service_name}' cannot receive the client address "
+                      f"through the blue/green front. It will record the front's address instead of the attacker's. "
+                      f"Use the 'recreate' strategy to keep attacker addresses for this service.")
+
+    # (내부 함수) nginx 미끼가 마운트한 nginx.conf의 사본을 만들어, 라우트되는 포트의 listen에 proxy_protocol을 붙이고
+    # http 블록에 real_ip 설정(앞단 네트워크만 신뢰)을 더한 뒤 사본을 마운트합니다. 할 수 없으면 False를 반환합니다.
+    def _proxy_protocol_nginx(self, service_name: str, service: dict, routes: list, color: str, trusted_networks) -> bool:
+        volumes = service.get('volumes') or []
+        index = next((i for i, volume in enumerate(volumes)
+                      if isinstance(volume, str) and volume.split(':')[1:2] == [NGINX_CONF_IN_CONTAINER]), None)
+        if index is None or not trusted_networks:
+            return False
+        source = os.path.join(self.project_dir, volumes[index].split(':')[0])
+        try:
+            with open(source, 'r', encoding='utf-8') as f:
+                config = f.read()
+        except OSError as e:
+            print(f"  - ⚠️ Warning: Cannot read nginx config of '{service_name}' ({e}).")
+            return False
+
+        ports = {route['upstream'].rsplit(':', 1)[1] for route in routes}
+        def add_proxy_protocol(match):
+            arguments = match.group(2).split()
+            if 'proxy_protocol' in arguments or arguments[0].rsplit(':', 1)[-1] not in ports:
+                return match.group(0)
+            return f"{match.group(1)}{match.group(2)} proxy_protocol;"
+        config, listens = re.subn(r'^(\s*listen\s+)([^;]+);', add_proxy_protocol, config, flags=re.M)
+        real_ip = ''.join(f"\n    set_real_ip_from {network};" for network in trusted_networks)
+        config, blocks = re.subn(r'^(\s*http\s*\{)', lambda m: f"{m.group(1)}{real_ip}\n    real_ip_header proxy_protocol;",
+                                 config, count=1, flags=re.M)
+        if not listens or not blocks:
+            return False
+
+        os.makedirs(self.front_dir, exist_ok=True)
+        copy_name = f"{color}-{service_name}.nginx.conf"
+        self._write_atomic(os.path.join(self.front_dir, copy_name), config)
+        service['volumes'] = list(volumes)
+        service['volumes'][index] = f"./{FRONT_DIR}/{copy_name}:{NGINX_CONF_IN_CONTAINER}:ro"
+        return True
+
+    # 앞단 nginx의 stream 설정을 만듭니다. 라우트마다 공개 포트 하나를 새 세대의 서비스로 넘깁니다.
+    # 'proxy_protocol'이 표시된 라우트는 PROXY 프로토콜 헤더로 원래 클라이언트 주소를 함께 넘깁니다.
+    def render_front_config(self, routes: list) -> str:
+        lines = [
+            "# Generated by Blue_Green_Deployer.py. Do not edit: it is rewritten on every blue/green switch.",
+            "events {}",
+            "",
+            "stream {",
+        ]
+        for route in routes:
+            port, protocol = route['listen'].split('/')
+            lines += [
+                "    server {",
+                f"        listen {port}{' udp' if protocol == 'udp' else ''};",
+                f"        proxy_pass {route['upstream']};",
+            ] + (["        proxy_protocol on;"] if route.get('proxy_protocol') else []) + [
+                "    }",
+            ]
+        lines.append("}")
+        return "\n".join(lines) + "\n"
+
+    # --- 내부 함수 ---
+
+    async def _compose(self, color: str, *args, env: dict = None):
+        return await self._compose_file(self.project(color), self.generation_files[color], *args, env=env)
+
+    async def _compose_file(self, project: str, compose_file: str, *args, env: dict = None):
+        return await self.runner.run_command(['docker-compose', '-p', project, '-f', compose_file, *args], env=env)
+
+    # (내부 함수) 명령을 조용히 실행하고 stdout 줄 목록을 반환합니다. 실패하면 None.
+    async def _capture(self, *command):
+        try:
+            process = await asyncio.create_subprocess_exec(
+                *command, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.DEVNULL)
+        except FileNotFoundError:
+            print(f"ERROR: '{command[0]}' command not found.")
+            return None
+        stdout, _ = await process.communicate()
+        if process.returncode != 0:
+            return None
+        return [line for line in stdout.decode('utf-8', errors='replace').splitlines() if line.strip()]
+
+    # (내부 함수) 세대들이 공유하는 앞단 네트워크가 없으면 만듭니다.
+    async def _ensure_network(self) -> bool:
+        if await self._capture('docker', 'network', 'inspect', '--format', '{{.Name}}', self.network_name) is not None:
+            return True
+        print(f"Creating front network '{self.network_name}'...")
+        return (await self.runner.run_command(['docker', 'network', 'create', self.network_name])).ok
+
+    # (내부 함수) 앞단 네트워크의 서브넷 목록을 반환합니다. (nginx 미끼가 PROXY 헤더를 신뢰할 주소 범위)
+    async def _front_subnets(self) -> list:
+        lines = await self._capture('docker', 'network', 'inspect', '--format',
+                                    '{{range .IPAM.Config}}{{.Subnet}} {{end}}', self.network_name)
+        return ' '.join(lines or []).split()
+
+    # (내부 함수) 세대의 모든 컨테이너가 running이고 헬스체크가 있다면 healthy가 될 때까지 docker inspect로 확인합니다.
+    async def _wait_until_healthy(self, color: str) -> bool:
+        print(f"Waiting for generation '{color}' to become healthy (timeout: {self.health_timeout}s)...")
+        deadline = time.monotonic() + self.health_timeout
+        delay = 0.5
+        while True:
+            container_ids = await self._capture('docker-compose', '-p', self.project(color),
+                                                '-f', self.generation_files[color], 'ps', '-q')
+            states = None
+            if container_ids:
+                states = await self._capture('docker', 'inspect', '--format',
+                                             '{{.Name}} {{.State.Status}} {{if .State.Health}}{{.State.Health.Status}}{{end}}',
+                                             *container_ids)
+            if states:
+                waiting = []
+                for line in states:
+                    name, status, health = (line.split() + [''])[:3]
+                    if status in ('exited', 'dead'):
+                        print(f"ERROR: Container '{name.lstrip('/')}' exited before becoming healthy.")
+                        return False
+                    if status != 'running' or health not in ('', 'healthy'):
+                        waiting.append(f"{name.lstrip('/')}({health or status})")
+                if not waiting:
+                    print(f"Generation '{color}' is healthy ({len(states)} container(s)).")
+                    return True
+            else:
+                waiting = ['(no containers yet)']
+
+            if time.monotonic() >= deadline:
+                print(f"ERROR: Timed out waiting for: {', '.join(waiting)}")
+                return False
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 2.0)
+
+    # (내부 함수) 앞단 설정을 새 세대로 바꾸고 nginx를 reload합니다.
+    # 처음 전환할 때(또는 공개 포트 목록이 바뀔 때)는 앞단 컨테이너를 (재)생성하며, 이때만 짧은 공백이 생깁니다.
+    async def _switch(self, routes: list, state: dict) -> bool:
+        os.makedirs(self.front_dir, exist_ok=True)
+        previous_config = None
+        if os.path.exists(self.front_conf):
+            with open(self.front_conf, 'r', encoding='utf-8') as f:
+                previous_config = f.read()
+        self._write_atomic(self.front_conf, self.render_front_config(routes))
+
+        front_project = self.front_project
+        published = sorted((route['host_ip'], route['listen']) for route in routes)
+        previous_published = sorted((route['host_ip'], route['listen']) for route in state.get('routes', []))
+        if not state:
+            # blue/green이 아닌 방식으로 떠 있던 기존 배포가 공개 포트를 잡고 있으므로 먼저 내림 (처음 한 번만)
+            print("Blue/green: first switch. Stopping the non blue/green deployment to free the published ports...")
+            await self.runner.down()
+        elif published != previous_published:
+            print("  - ⚠️ Warning: Published ports changed. The front will be recreated (brief interruption).")
+
+        IaCRenderer().render(self._front_blueprint(routes), self.front_file)
+        if not (await self._compose_file(front_project, self.front_file, 'up', '-d', '--remove-orphans')).ok:
+            print("ERROR: Failed to start the blue/green front.")
+            return False
+
+        # 설정을 검사한 뒤 reload: 기존 연결은 이전 worker가 끝까지 처리하고, 새 연결만 새 세대로 감
+        test = await self._compose_file(front_project, self.front_file, 'exec', '-T', 'front',
+                                        'nginx', '-t', '-c', FRONT_CONF_IN_CONTAINER)
+        if not test.ok:
+            print("ERROR: Generated front configuration is invalid. Restoring the previous one.")
+            if previous_config is not None:
+                self._write_atomic(self.front_conf, previous_config)
+            return False
+        return (await self._compose_file(front_project, self.front_file, 'exec', '-T', 'front',
+                                         'nginx', '-c', FRONT_CONF_IN_CONTAINER, '-s', 'reload')).ok
+
+    # (내부 함수) 앞단 nginx 서비스의 compose 정의. 설정은 파일이 아닌 디렉토리로 마운트하여
+    # 설정 파일을 교체(os.replace)해도 컨테이너에서 새 내용이 보이게 합니다.
+    def _front_blueprint(self, routes: list) -> dict:
+        ports = []
+        for route in routes:
+            port, protocol = route['listen'].split('/')
+            mapping = f"{port}:{port}" + ('/udp' if protocol == 'udp' else '')
+            ports.append(f"{route['host_ip']}:{mapping}" if route['host_ip'] else mapping)
+        return {
+            'services': {
+                'front': {
+                    'image': self.front_image,
+                    'command': ['nginx', '-c', FRONT_CONF_IN_CONTAINER, '-g', 'daemon off;'],
+                    'ports': ports,
+                    'volumes': [f"./{FRONT_DIR}:{os.path.dirname(FRONT_CONF_IN_CONTAINER)}:ro"],
+                    'networks': [FRONT_NETWORK_KEY],
+                    'restart': 'always',
+                }
+            },
+            'networks': {FRONT_NETWORK_KEY: {'external': True, 'name': self.network_name}},
+        }
+
+    # (내부 함수) 전환 후 이전 세대가 기존 연결을 마칠 시간을 준 뒤 내립니다.
+    async def _drain(self, color: str):
+        print(f"Blue/green: draining generation '{color}' for {self.drain_seconds}s before stopping it...")
+        await asyncio.sleep(self.drain_seconds)
+        await self._compose(color, 'down', '--remove-orphans')
+
+    def _save_state(self, state: dict):
+        os.makedirs(self.front_dir, exist_ok=True)
+        self._write_atomic(self.state_file, json.dumps(state, indent=2))
+
+    @staticmethod
+    def _write_atomic(path: str, content: str):
+        temp_path = f"{path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            f.write(content)
+        os.replace(temp_path, path)
+
+# (내부 함수) 서비스의 environment(리스트 또는 딕셔너리 형식)에 값을 설정합니다.
+def _set_environment(service: dict, name: str, value: str):
+    environment = service.get('environment')
+    if isinstance(environment, dict):
+        service['environment'] = dict(environment, **{name: value})
+    else:
+        entries = [entry for entry in (environment or []) if str(entry).split('=', 1)[0] != name]
+        service['environment'] = entries + [f"{name}={value}"]
@@ -0,0 +1,278 @@
+import os
+import sys
+import json
+import time
+import shutil
+import hashlib
+from pathlib import Path
+import Yaml_Backend
+from Fake_App_Sync import FakeAppSynchronizer, is_ignored
+
+CACHE_FORMAT_VERSION = "3" # 3: 빌드 컨텍스트의 가짜 앱 트리 해시 기록
+DEFAULT_CACHE_DIR = ".honeybot_cache"
+
+# 원본 IaC, 정책 파일, 정책이 참조하는 가짜 앱 트리의 내용 해시를 키로 사용하는
+# 디스크 기반 청사진 캐시. 입력이 모두 같으면 파싱/태깅/생성 단계를 건너뛰고
+# 캐시된 deception-compose.yml과 생성된 Dockerfile들을 그대로 복원합니다.
+class BlueprintCache:
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR, max_entries: int = 32,
+                 max_bytes: int = 64 * 1024 * 1024, max_age_seconds: float = 7 * 24 * 3600):
+        self.cache_dir = Path(cache_dir)
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_seconds
+
+    # 파이프라인 입력들의 내용 해시로 캐시 키를 계산합니다.
+    # :param policy_engine: 원본의 서비스마다 실제로 매칭되는 dynamic_build 규칙을 찾는 데 사용
+    #                       (규칙의 조건 종류와 관계없이 매칭된 서비스의 빌드 컨텍스트 파일을 해시에 넣음)
+    # :param buildkit: 생성할 Dockerfile이 BuildKit 문법을 쓰는지 여부 (생성 결과가 달라지므로 키에 포함)
+    # :return: 16진수 키 문자열. 원본 IaC 파일을 읽을 수 없으면 None
+    def compute_key(self, source_iac_file: str, policy_file: str, policy_engine, output_iac_file: str,
+                    buildkit: bool = True):
+        digest = hashlib.sha256()
+        digest.update(f"v{CACHE_FORMAT_VERSION}\0{os.path.abspath(output_iac_file)}\0".encode('utf-8'))
+        # 생성되는 Dockerfile 문법(BuildKit 사용 여부)도 결과에 영향을 줌
+        digest.update(f"buildkit={int(bool(buildkit))}\0".encode('utf-8'))
+
+        try:
+            self._hash_file(digest, 'source', Path(source_iac_file))
+            parsed = Yaml_Backend.load_file(source_iac_file) # 파서 캐시를 거치므로 이어지는 생성 단계에서 재사용
+        except Exception:
+            return None
+        self._hash_file(digest, 'policy', Path(policy_file), missing_ok=True)
+
+        # 서비스별로 매칭되는 규칙을 찾아, dynamic_build가 읽는 가짜 앱 트리와 빌드 컨텍스트의 파일들을 모읍니다.
+        fake_app_paths, build_contexts, dependency_files = set(), set(), set()
+        services = parsed.get('services') if isinstance(parsed, dict) else None
+        for service_details in (services or {}).values():
+            if not isinstance(service_details, dict):
+                continue
+            action = (policy_engine.match_rule(service_details) or {}).get('action') or {}
+            if action.get('type') != 'dynamic_build':
+                continue
+            payload = action.get('payload') or {}
+            if isinstance(payload.get('fake_app_path'), str):
+                fake_app_paths.add(payload['fake_app_path'])
+            build_info = service_details.get('build', {})
+            context_path = build_info if isinstance(build_info, str) else (build_info or {}).get('context')
+            if isinstance(context_path, str):
+                build_contexts.add(context_path)
+                # 의존성 파일은 이미지 내용 해시 태그에 들어가므로 함께 해시
+                for dep_file in payload.get('copy_dependencies') or []:
+                    if isinstance(dep_file, str):
+                        dependency_files.add(str(Path(context_path) / dep_file))
+
+        # 가짜 앱 트리는 상대 경로와 파일 내용을 모두 해시합니다.
+        for fake_app_path in sorted(fake_app_paths):
+            self._hash_tree(digest, Path(fake_app_path))
+
+        # use_original_base_image 정책은 원본 Dockerfile의 FROM을 읽으므로 함께 해시합니다.
+        for build_context in sorted(build_contexts):
+            self._hash_file(digest, 'dockerfile', Path(build_context) / 'Dockerfile', missing_ok=True)
+        for dependency_file in sorted(dependency_files):
+            self._hash_file(digest, 'dependency', Path(dependency_file), missing_ok=True)
+
+        return digest.hexdigest()
+
+    # 캐시 히트 시 청사진과 생성 파일들을 복원하고 True를 반환합니다.
+    def restore(self, key: str, output_iac_file: str) -> bool:
+        entry_dir = self.cache_dir / key
+        manifest = self._read_manifest(entry_dir)
+        if manifest is None:
+            return False
+
+        # 빌드 컨텍스트에 복사된 가짜 앱이 없거나, 저장 이후 다른 내용으로 동기화되었으면(예: A→B→A 수정)
+        # 복원된 Dockerfile/이미지 태그와 컨텍스트가 어긋나므로 미스로 처리
+        synchronizer = FakeAppSynchronizer()
+        for item in manifest['files']:
+            app_dir = Path(item['path']).parent / '_honeypot_app'
+            if not app_dir.is_dir() or synchronizer.tree_hash(app_dir) != item.get('app_hash'):
+                return False
+
+        try:
+            self._copy_if_changed(entry_dir / 'blueprint.yml', Path(output_iac_file))
+            for item in manifest['files']:
+                self._copy_if_changed(entry_dir / item['blob'], Path(item['path']))
+        except OSError as e:
+            print(f"Warning: BlueprintCache failed to restore entry '{key[:12]}': {e}")
+            return False
+
+        manifest['last_used'] = time.time()
+        self._write_manifest(entry_dir, manifest)
+        print(f"BlueprintCache: Cache hit '{key[:12]}'. Restored '{output_iac_file}' and {len(manifest['files'])} generated file(s).")
+        return True
+
+    # 파이프라인 결과를 캐시에 저장하고 오래된 항목을 정리합니다.
+    # :param generated_files: 청사진 생성 중 만들어진 Dockerfile 경로 목록
+    def store(self, key: str, output_iac_file: str, generated_files=()):
+        entry_dir = self.cache_dir / key
+        tmp_dir = self.cache_dir / f".tmp-{key}-{os.getpid()}"
+        try:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            tmp_dir.mkdir(parents=True)
+            shutil.copyfile(output_iac_file, tmp_dir / 'blueprint.yml')
+
+            files = []
+            synchronizer = FakeAppSynchronizer()
+            for index, generated_file in enumerate(generated_files):
+                blob = f"file-{index}"
+                shutil.copyfile(generated_file, tmp_dir / blob)
+                app_dir = Path(generated_file).parent / '_honeypot_app'
+                app_hash = synchronizer.tree_hash(app_dir) if app_dir.is_dir() else None
+                files.append({'path': str(generated_file), 'blob': blob, 'app_hash': app_hash})
+
+            now = time.time()
+            manifest = {'version': CACHE_FORMAT_VERSION, 'created': now, 'last_used': now, 'files': files}
+            manifest['size'] = sum(p.stat().st_size for p in tmp_dir.iterdir())
+            self._write_manifest(tmp_dir, manifest)
+
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            os.replace(tmp_dir, entry_dir)
+            print(f"BlueprintCache: Stored entry '{key[:12]}'.")
+        except OSError as e:
+            print(f"Warning: BlueprintCache failed to store entry '{key[:12]}': {e}")
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            return
+
+        self.evict()
+
+    # 나이(max_age_seconds), 개수(max_entries), 전체 크기(max_bytes) 기준으로 항목을 제거합니다.
+    # 최근에 사용되지 않은 항목부터 제거합니다.
+    def evict(self) -> int:
+        entries = self.entries()
+        now = time.time()
+        removed = 0
+
+        survivors = []
+        for entry in entries:
+            if now - entry['last_used'] > self.max_age_seconds:
+                removed += self._remove(entry['key'])
+            else:
+                survivors.append(entry)
+
+        survivors.sort(key=lambda entry: entry['last_used'], reverse=True)
+        total_size = 0
+        for index, entry in enumerate(survivors):
+            total_size += entry['size']
+            if index >= self.max_entries or total_size > self.max_bytes:
+                removed += self._remove(entry['key'])
+        return removed
+
+    # 캐시 항목 목록을 반환합니다.
+    def entries(self) -> list:
+        if not self.cache_dir.is_dir():
+            return []
+
+        entries = []
+        for entry_dir in self.cache_dir.iterdir():
+            if entry_dir.name.startswith('.'):
+                continue
+            manifest = self._read_manifest(entry_dir)
+            if manifest is None:
+                continue
+            entries.append({
+                'key': entry_dir.name,
+                'created': manifest['created'],
+                'last_used': manifest['last_used'],
+                'size': manifest.get('size', 0),
+                'files': [item['path'] for item in manifest['files']]
+            })
+        return entries
+
+    # 캐시를 비웁니다. older_than_seconds를 주면 그보다 오래 사용되지 않은 항목만 제거합니다.
+    def purge(self, older_than_seconds: float = None) -> int:
+        now = time.time()
+        removed = 0
+        for entry in self.entries():
+            if older_than_seconds is None or now - entry['last_used'] > older_than_seconds:
+                removed += self._remove(entry['key'])
+        if older_than_seconds is None and self.cache_dir.is_dir():
+            # 중단된 저장 작업이 남긴 임시 디렉토리도 정리
+            for leftover in self.cache_dir.glob('.tmp-*'):
+                shutil.rmtree(leftover, ignore_errors=True)
+        return removed
+
+    # (내부 함수) 파일 하나를 라벨과 함께 해시에 반영합니다.
+    def _hash_file(self, digest, label: str, path: Path, missing_ok: bool = False):
+        digest.update(f"{label}\0{path.as_posix()}\0".encode('utf-8'))
+        try:
+            with open(path, 'rb') as f:
+                for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                    digest.update(chunk)
+        except OSError:
+            if not missing_ok:
+                raise
+            digest.update(b"<missing>")
+        digest.update(b"\0")
+
+    # (내부 함수) 디렉토리 트리의 모든 파일을 정렬된 상대 경로 순서로 해시에 반영합니다. (인터프리터 캐시는 제외)
+    def _hash_tree(self, digest, root: Path):
+        digest.update(f"tree\0{root.as_posix()}\0".encode('utf-8'))
+        if not root.is_dir():
+            digest.update(b"<missing>\0")
+            return
+        for file_path in sorted(p for p in root.rglob('*') if p.is_file() and not is_ignored(p.relative_to(root))):
+            digest.update(f"{file_path.relative_to(root).as_posix()}\0".encode('utf-8'))
+            with open(file_path, 'rb') as f:
+                for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                    digest.update(chunk)
+            digest.update(b"\0")
+
+    # (내부 함수) 내용이 다를 때만 파일을 덮어써서 불필요한 mtime 변경을 피합니다.
+    def _copy_if_changed(self, source: Path, target: Path):
+        with open(source, 'rb') as f:
+            content = f.read()
+        try:
+            with open(target, 'rb') as f:
+                if f.read() == content:
+                    return
+        except FileNotFoundError:
+            pass
+        with open(target, 'wb') as f:
+            f.write(content)
+
+    def _read_manifest(self, entry_dir: Path):
+        try:
+            with open(entry_dir / 'manifest.json', 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if manifest.get('version') != CACHE_FORMAT_VERSION:
+            return None
+        return manifest
+
+    def _write_manifest(self, entry_dir: Path, manifest: dict):
+        with open(entry_dir / 'manifest.json', 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2)
+
+    def _remove(self, key: str) -> int:
+        shutil.rmtree(self.cache_dir / key, ignore_errors=True)
+        return 1
+
+
+# --- 캐시 확인 및 정리용 명령 ---
+# python Blueprint_Cache.py info
+# python Blueprint_Cache.py purge [--older-than=<days>]
+if __name__ == '__main__':
+    cache = BlueprintCache()
+    command = sys.argv[1] if len(sys.argv) > 1 else 'info'
+
+    if command == 'info':
+        entries = sorted(cache.entries(), key=lambda entry: entry['last_used'], reverse=True)
+        total_size = sum(entry['size'] for entry in entries)
+        print(f"Blueprint cache '{cache.cache_dir}': {len(entries)} entries, {total_size / 1024:.1f} KiB")
+        for entry in entries:
+            last_used = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(entry['last_used']))
+            print(f"  - {entry['key'][:12]}  last used {last_used}  {entry['size']} bytes  files={entry['files']}")
+    elif command == 'purge':
+        older_than = None
+        for arg in sys.argv[2:]:
+            if arg.startswith('--older-than='):
+                older_than = float(arg.split('=', 1)[1]) * 24 * 3600
+        removed = cache.purge(older_than)
+        print(f"Purged {removed} cache entries.")
+    else:
+        print(f"Unknown command: '{command}'")
+        print("Usage: python Blueprint_Cache.py [info | purge [--older-than=<days>]]")
+        sys.exit(1)
@@ -0,0 +1,65 @@
+import yaml
+import pprint
+import Yaml_Backend
+from collections.abc import Mapping
+from Blueprint_Overlay import materialize
+
+# 이전 청사진과 새 청사진(deception-compose.yml)을 서비스 단위로 비교하여
+# 각 서비스를 added / removed / changed / unchanged 로 분류합니다.
+class BlueprintDiffer:
+
+    # 두 청사진 딕셔너리를 비교하여 분류 결과를 반환합니다.
+    # :param old_blueprint: 이전 청사진 (없으면 None → 모든 서비스가 added)
+    # :param new_blueprint: 새로 생성된 청사진
+    # :return: {'added': [...], 'removed': [...], 'changed': [...], 'unchanged': [...]}
+    def diff(self, old_blueprint, new_blueprint) -> dict:
+        old_services = self._services_of(old_blueprint)
+        new_services = self._services_of(new_blueprint)
+
+        result = {'added': [], 'removed': [], 'changed': [], 'unchanged': []}
+
+        # 새 청사진의 서비스 순서를 유지하여 결정적인 결과를 만듭니다.
+        for service_name, service_details in new_services.items():
+            if service_name not in old_services:
+                result['added'].append(service_name)
+            elif old_services[service_name] != service_details:
+                result['changed'].append(service_name)
+            else:
+                result['unchanged'].append(service_name)
+
+        for service_name in old_services:
+            if service_name not in new_services:
+                result['removed'].append(service_name)
+
+        return result
+
+    # 파일 경로의 두 청사진을 비교합니다. 이전 파일이 없으면 모든 서비스를 added로 분류합니다.
+    def diff_files(self, old_path: str, new_path: str) -> dict:
+        return self.diff(self.load(old_path), self.load(new_path))
+
+    # 청사진 파일을 읽어 딕셔너리로 반환합니다. 파일이 없거나 읽을 수 없으면 None.
+    def load(self, blueprint_path: str):
+        try:
+            return Yaml_Backend.load_file(blueprint_path, use_cache=False)
+        except FileNotFoundError:
+            return None
+        except yaml.YAMLError as e:
+            print(f"ERROR: BlueprintDiffer failed to parse '{blueprint_path}': {e}")
+            return None
+
+    # (내부 함수) 청사진에서 services 딕셔너리를 꺼냅니다.
+    def _services_of(self, blueprint) -> dict:
+        if not isinstance(blueprint, Mapping):
+            return {}
+        services = materialize(blueprint.get('services')) or {}
+        return services if isinstance(services, Mapping) else {}
+
+
+if __name__ == '__main__':
+    import sys
+
+    if len(sys.argv) != 3:
+        print("Usage: python Blueprint_Diff.py <old-compose.yml> <new-compose.yml>")
+        sys.exit(1)
+
+    pprint.pprint(BlueprintDiffer().diff_files(sys.argv[1], sys.argv[2]), sort_dicts=False)
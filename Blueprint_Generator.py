@@ -1,24 +1,42 @@
-import copy
+import os
 import pprint
+from pathlib import Path
+from collections.abc import Mapping
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone, timedelta
-from Dockerfile_Generator import DockerfileGenerator # Dockerfile 생성기 모듈을 임포트
+from Dockerfile_Generator import DockerfileGenerator, content_image_tag # Dockerfile 생성기 모듈을 임포트
+from Blueprint_Overlay import BlueprintOverlay
+from Metrics import metrics
     
 # 태깅된 청사진 초안을 받아, 정책에 따라 최종 청사진을 오케스트레이션하고 생성합니다.
 class HoneypotBlueprintGenerator:
 
     # Dockerfile 생성기 인스턴스를 내부적으로 소유합니다.
-    def __init__(self):
-        self.dockerfile_gen = DockerfileGenerator()
+    # :param max_workers: dynamic_build 서비스들의 빌드 컨텍스트를 동시에 준비할 작업자 수 (1이면 순차 처리)
+    # :param buildkit: 생성할 Dockerfile에 BuildKit 문법을 쓸지 여부 (배포 백엔드에 따라 정함)
+    def __init__(self, max_workers: int = 4, buildkit: bool = True):
+        self.dockerfile_gen = DockerfileGenerator(buildkit=buildkit)
+        self.max_workers = max(1, max_workers)
+        self.generated_files = [] # 마지막 generate 실행에서 생성된 Dockerfile 경로 목록
+        self.build_errors = {}    # 마지막 generate 실행에서 실패한 서비스 -> 오류 메시지
 
     # 태깅된 데이터에 기반하여 최종 청사진을 생성합니다.
-    def generate(self, tagged_data: dict) -> dict:
+    # :param only_services: 빌드 컨텍스트를 다시 준비할 서비스 이름들 (None이면 전체).
+    #                       나머지 dynamic_build 서비스는 이전에 생성된 Dockerfile이 있으면 그대로 재사용합니다.
+    @metrics.staged('generate')
+    def generate(self, tagged_data: dict, only_services=None) -> dict:
     
         
         print("BlueprintGenerator: Starting final blueprint generation...")
-        final_blueprint = copy.deepcopy(tagged_data)
+        self.generated_files = []
+        self.build_errors = {}
+        # 태깅된 데이터를 복사하지 않고, 변환 결과는 오버레이에 기록합니다.
+        final_blueprint = BlueprintOverlay(tagged_data)
         services = final_blueprint.get('services', {})
 
         # 1. 각 서비스의 정책 태그를 읽고 구체적인 변환 작업 수행
+        # dynamic_build는 파일 I/O가 많으므로 모아 두었다가 한꺼번에 (병렬로) 처리합니다.
+        dynamic_builds = []
         for service_name, service_details in services.items():
             if 'x-honeypot-policy' in service_details:
                 policy = service_details['x-honeypot-policy']
@@ -29,7 +47,9 @@ class HoneypotBlueprintGenerator:
                 if policy_type == 'image_replace':
                     self._apply_image_replace(service_details, payload)
                 elif policy_type == 'dynamic_build':
-                    self._apply_dynamic_build(service_details, payload, service_name)
+                    dynamic_builds.append((service_name, service_details, payload))
+
+        self._apply_dynamic_builds(dynamic_builds, only_services)
         
         # 2. 시스템 공통 서비스 주입 (기존 로직 재사용)
         self._inject_logging_service(final_blueprint)
@@ -52,28 +72,106 @@ class HoneypotBlueprintGenerator:
         if 'x-honeypot-policy' in service:
             del service['x-honeypot-policy']  # 정책 태그 제거
 
-    # (내부 함수) dynamic_build 정책을 적용합니다.
-    def _apply_dynamic_build(self, service: dict, payload: dict, service_name: str):
-    
-        build_info = service.get('build', {})
-        context_path = build_info if isinstance(build_info, str) else build_info.get('context')
-
-        if not context_path:
-            print(f"  - ⚠️ Warning: No build context found for '{service_name}'. Skipping dynamic build.")
+    # (내부 함수) dynamic_build 정책들을 적용합니다.
+    # 서로 다른 빌드 컨텍스트는 작업자 풀에서 동시에 준비하고, 같은 컨텍스트를 공유하는
+    # 서비스들은 한 작업 안에서 순서대로 처리하여 _honeypot_app/Dockerfile 쓰기가 겹치지 않게 합니다.
+    # 결과는 작업 완료 순서와 관계없이 항상 원래 서비스 순서대로 청사진에 반영됩니다.
+    def _apply_dynamic_builds(self, dynamic_builds: list, only_services=None):
+        if not dynamic_builds:
             return
 
-        # Dockerfile 생성기 호출
-        generated_dockerfile = self.dockerfile_gen.generate(payload, context_path)
-        
-        # 서비스의 build 설정을 새로 생성된 Dockerfile을 사용하도록 수정
-        if generated_dockerfile:
-            service['build'] = {
-                'context': context_path,
-                'dockerfile': generated_dockerfile.name # 파일명만 사용
-            }
+        # 빌드 컨텍스트(실제 경로) 기준으로 작업을 묶습니다.
+        groups = {}
+        results = {}
+        for service_name, service_details, payload in dynamic_builds:
+            build_info = service_details.get('build', {})
+            context_path = build_info if isinstance(build_info, str) else build_info.get('context')
 
-        if 'x-honeypot-policy' in service:
-            del service['x-honeypot-policy']
+            if not context_path:
+                print(f"  - ⚠️ Warning: No build context found for '{service_name}'. Skipping dynamic build.")
+                continue
+            groups.setdefault(os.path.realpath(context_path), []).append((service_name, context_path, payload))
+
+        # 컨텍스트를 공유하는 서비스 중 하나라도 다시 준비해야 하면 그 Dockerfile이 바뀌므로,
+        # 그룹 안의 모든 서비스가 영향을 받지 않은 경우에만 이전에 준비된 컨텍스트를 재사용합니다.
+        if only_services is not None:
+            for real_context, jobs in list(groups.items()):
+                if any(job[0] in only_services for job in jobs):
+                    continue
+                reused = self._reuse_build_context(jobs[0][1])
+                if not reused:
+                    continue
+                for service_name, context_path, payload in jobs:
+                    print(f"  - Reusing '{reused.name}' for unaffected service '{service_name}'.")
+                    results[service_name] = (reused, context_path, None)
+                del groups[real_context]
+
+        for jobs in groups.values():
+            if len(jobs) > 1:
+                names = [job[0] for job in jobs]
+                print(f"  - ⚠️ Warning: Services {names} share build context '{jobs[0][1]}'. "
+                      f"They will be prepared one after another; the last one's Dockerfile wins.")
+
+        if self.max_workers > 1 and len(groups) > 1:
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(groups))) as executor:
+                for group_results in executor.map(self._prepare_build_context, groups.values()):
+                    results.update(group_results)
+        else:
+            for jobs in groups.values():
+                results.update(self._prepare_build_context(jobs))
+
+        # 원래 서비스 순서대로 결과 반영
+        for service_name, service_details, payload in dynamic_builds:
+            if service_name not in results:
+                continue
+            generated_dockerfile, context_path, error = results[service_name]
+
+            # 서비스의 build 설정을 새로 생성된 Dockerfile을 사용하도록 수정
+            if generated_dockerfile:
+                self.generated_files.append(generated_dockerfile)
+                service_details['build'] = {
+                    'context': context_path,
+                    'dockerfile': generated_dockerfile.name # 파일명만 사용
+                }
+                # 빌드 입력의 내용 해시로 이미지 태그를 붙여, 같은 이미지가 로컬에 있으면 배포 시 빌드를 건너뜀
+                try:
+                    content_hash = self.dockerfile_gen.image_hash(payload, context_path, generated_dockerfile)
+                    service_details['image'] = content_image_tag(service_name, content_hash)
+                except OSError as e:
+                    print(f"  - ⚠️ Warning: Could not compute image content hash for '{service_name}': {e}")
+                self._inject_log_shipping_env(service_name, service_details)
+            else:
+                self.build_errors[service_name] = error
+
+            if 'x-honeypot-policy' in service_details:
+                del service_details['x-honeypot-policy']
+
+        metrics.incr('dynamic_builds', len(dynamic_builds))
+        metrics.incr('dynamic_build_errors', len(self.build_errors))
+        if self.build_errors:
+            print(f"  - ❌ Dynamic build failed for {len(self.build_errors)} service(s):")
+            for service_name, error in self.build_errors.items():
+                print(f"    - {service_name}: {error}")
+
+    # (내부 함수) 이전 실행에서 준비된 빌드 컨텍스트(생성된 Dockerfile과 복사된 가짜 앱)가 있으면 그 Dockerfile 경로를 반환합니다.
+    def _reuse_build_context(self, context_path: str):
+        generated_dockerfile = Path(context_path) / 'Dockerfile.honeypot'
+        if generated_dockerfile.is_file() and (Path(context_path) / '_honeypot_app').is_dir():
+            return generated_dockerfile
+        return None
+
+    # (내부 함수) 같은 빌드 컨텍스트를 쓰는 서비스들의 Dockerfile을 순서대로 생성합니다. (작업자 스레드에서 실행)
+    # :return: {서비스 이름: (생성된 Dockerfile 경로 또는 None, 컨텍스트 경로, 오류 메시지)}
+    def _prepare_build_context(self, jobs: list) -> dict:
+        results = {}
+        for service_name, context_path, payload in jobs:
+            try:
+                generated_dockerfile = self.dockerfile_gen.generate(payload, context_path)
+                error = None if generated_dockerfile else "Dockerfile generation failed (see log above)"
+            except Exception as e:
+                generated_dockerfile, error = None, f"{type(e).__name__}: {e}"
+            results[service_name] = (generated_dockerfile, context_path, error)
+        return results
 
     # _inject_logging_service 와 _inject_metadata 메서드는 이전과 동일하게 유지됩니다.
     def _inject_logging_service(self, blueprint: dict):
@@ -83,7 +181,7 @@ class HoneypotBlueprintGenerator:
         logging_service = {
             'image': 'fluent/fluentd:v1.16-1',
             'ports': ['24224:24224', '24224:24224/udp'],
-            'volumes': ['./fluentd/conf:/fluentd/etc'],
+            'volumes': ['./fluentd/conf:/fluentd/etc', './fluentd/log:/fluentd/log'], # log: Attack_Log_Store.py가 읽는 파일 출력
             'restart': 'always',
             'healthcheck': {
                 'test': [
@@ -118,6 +216,26 @@ class HoneypotBlueprintGenerator:
                 }
             }
 
+    # (내부 함수) 동적 빌드된 가짜 앱이 요청 기록을 fluentd로 직접 보내도록 환경 변수를 추가합니다.
+    # 이미 지정된 값은 덮어쓰지 않으며, 오버레이의 읽기 전용 값을 건드리지 않도록 새 목록/딕셔너리를 만듭니다.
+    def _inject_log_shipping_env(self, service_name: str, service_details: dict):
+        shipping_env = {
+            'FLUENTD_HOST': 'logging',
+            'FLUENTD_PORT': '24224',
+            'HONEYPOT_TAG': f"honeypot.{service_name}.requests",
+        }
+        environment = service_details.get('environment')
+        if isinstance(environment, Mapping): # generate()는 오버레이 위에서 실행되므로 dict가 아닌 매핑일 수 있음
+            merged = dict(environment)
+            for key, value in shipping_env.items():
+                merged.setdefault(key, value)
+            service_details['environment'] = merged
+        else:
+            entries = list(environment or [])
+            defined = {str(entry).split('=', 1)[0] for entry in entries}
+            entries += [f"{key}={value}" for key, value in shipping_env.items() if key not in defined]
+            service_details['environment'] = entries
+
     def _inject_metadata(self, blueprint: dict):
         print("  - Injecting metadata...")
         kst = timezone(timedelta(hours=9))
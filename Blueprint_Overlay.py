@@ -0,0 +1,86 @@
+from collections.abc import Mapping, MutableMapping
+import pprint
+
+# 원본 파싱 데이터를 복사하지 않고, 그 위에 변경 사항만 기록하는 copy-on-write 오버레이.
+# 정책 태깅과 청사진 변환은 오버레이에만 기록되며, 원본 딕셔너리는 절대 수정되지 않습니다.
+# 실제 딕셔너리로의 변환(materialize)은 렌더러에서 한 번만 수행됩니다.
+#
+# 주의: 원본의 리스트 값은 복사 없이 그대로 반환되므로 읽기 전용으로 취급해야 합니다.
+# 리스트를 바꾸려면 새 리스트를 대입하세요.
+class BlueprintOverlay(MutableMapping):
+
+    def __init__(self, base: Mapping):
+        self._base = base
+        self._overrides = {}   # 원본에 있는 키의 교체 값 (원래 위치 유지)
+        self._hidden = set()   # 삭제된 원본 키
+        self._extra = {}       # 원본에 없거나 삭제 후 다시 추가된 키 (뒤에 추가됨)
+
+    def __getitem__(self, key):
+        if key in self._extra:
+            return self._extra[key]
+        if key in self._hidden:
+            raise KeyError(key)
+        if key in self._overrides:
+            return self._overrides[key]
+
+        value = self._base[key]
+        if isinstance(value, Mapping):
+            # 하위 딕셔너리도 오버레이로 감싸 두어야 중첩된 수정이 원본에 닿지 않습니다.
+            value = BlueprintOverlay(value)
+            self._overrides[key] = value
+        return value
+
+    def __setitem__(self, key, value):
+        if key in self._extra:
+            self._extra[key] = value
+        elif key in self._base and key not in self._hidden:
+            self._overrides[key] = value
+        else:
+            self._extra[key] = value
+
+    def __delitem__(self, key):
+        if key in self._extra:
+            del self._extra[key]
+        elif key in self._base and key not in self._hidden:
+            self._hidden.add(key)
+            self._overrides.pop(key, None)
+        else:
+            raise KeyError(key)
+
+    def __iter__(self):
+        for key in self._base:
+            if key not in self._hidden:
+                yield key
+        yield from self._extra
+
+    def __len__(self):
+        return len(self._base) - len(self._hidden) + len(self._extra)
+
+    def __contains__(self, key):
+        if key in self._extra:
+            return True
+        return key in self._base and key not in self._hidden
+
+    def __repr__(self):
+        return pprint.pformat(materialize(self), sort_dicts=False)
+
+    # 이 오버레이(또는 하위 오버레이)에 기록된 변경 사항이 있는지 확인합니다.
+    def is_modified(self) -> bool:
+        if self._hidden or self._extra:
+            return True
+        for value in self._overrides.values():
+            if not isinstance(value, BlueprintOverlay) or value.is_modified():
+                return True
+        return False
+
+
+# 오버레이(또는 오버레이를 담은 리스트)를 일반 딕셔너리/리스트로 변환합니다.
+# 변경되지 않은 하위 트리는 복사하지 않고 원본 객체를 그대로 공유합니다.
+def materialize(data):
+    if isinstance(data, BlueprintOverlay):
+        if not data.is_modified():
+            return materialize(data._base)
+        return {key: materialize(value) for key, value in data.items()}
+    if isinstance(data, list) and any(isinstance(item, BlueprintOverlay) for item in data):
+        return [materialize(item) for item in data]
+    return data
@@ -0,0 +1,161 @@
+import os
+import json
+import hashlib
+from Kubernetes_Parser import YAML_SUFFIXES
+
+DEPENDENCY_FILE = '.honeybot_deps.json' # 마지막 생성에서 기록된 입력 의존성 그래프 (Sync_Controller/데몬이 공유)
+GRAPH_FORMAT_VERSION = 1
+
+# (내부 함수) 규칙/서비스 정의처럼 JSON으로 표현 가능한 값의 짧은 지문을 계산합니다.
+def _fingerprint(value) -> str:
+    encoded = json.dumps(value, sort_keys=True, ensure_ascii=False, default=str).encode('utf-8')
+    return hashlib.sha256(encoded).hexdigest()[:16]
+
+# (내부 함수) path가 directory 자신이거나 그 아래에 있는지 확인합니다.
+def _is_under(path: str, directory: str) -> bool:
+    return path == directory or path.startswith(directory.rstrip(os.sep) + os.sep)
+
+# 청사진 생성의 입력 파일들과 서비스 사이의 의존 관계를 기록합니다.
+# 서비스마다 원본 정의, 매칭된 정책 규칙, 가짜 앱 트리, 빌드 컨텍스트의 원본 Dockerfile을 기록하고,
+# 입력이 바뀌었을 때 영향을 받는 서비스만 골라 냅니다.
+class DependencyGraph:
+
+    # :param source_file: 원본 docker-compose 파일
+    # :param policy_file: 도커 컴포즈용 정책 파일
+    # :param k8s_dir: 함께 감시할 쿠버네티스 Manifest 디렉토리 (없으면 None)
+    # :param k8s_policy_file: 쿠버네티스용 정책 파일 (바뀌면 모든 Manifest를 다시 태깅)
+    def __init__(self, source_file: str, policy_file: str, k8s_dir: str = None, k8s_policy_file: str = None):
+        self.source_file = os.path.abspath(source_file)
+        self.policy_file = os.path.abspath(policy_file)
+        self.k8s_dir = os.path.abspath(k8s_dir) if k8s_dir else None
+        self.k8s_policy_file = os.path.abspath(k8s_policy_file) if k8s_policy_file else None
+        self.services = {}   # 서비스 이름 -> {'definition', 'rule', 'rule_hash', 'fake_app', 'dockerfile'}
+        self.recorded = False
+        self.affected = None # 마지막 record에서 다시 생성해야 하는 서비스 집합 (None이면 전체)
+
+    # 파싱된 원본 데이터와 정책 엔진으로 서비스별 입력을 다시 기록합니다. (태깅 전에 호출)
+    # 이전 기록과 비교하여 정의/규칙/입력 경로가 달라진 서비스와, changed_paths(내용이 바뀐 가짜 앱 파일이나
+    # Dockerfile)에 의존하는 서비스를 self.affected로 계산합니다. 이전 기록이 없으면 affected는 None입니다.
+    def record(self, parsed_data: dict, policy_engine, changed_paths=()) -> set:
+        services = {}
+        for service_name, service_details in ((parsed_data or {}).get('services') or {}).items():
+            if not isinstance(service_details, dict):
+                continue
+            node = {'definition': _fingerprint(service_details)}
+
+            rule = policy_engine.match_rule(service_details)
+            if rule is not None:
+                node['rule'] = rule.get('name')
+                node['rule_hash'] = _fingerprint(rule)
+                action = rule.get('action') or {}
+                fake_app_path = (action.get('payload') or {}).get('fake_app_path')
+                if action.get('type') == 'dynamic_build' and isinstance(fake_app_path, str):
+                    node['fake_app'] = os.path.abspath(fake_app_path)
+
+            build_info = service_details.get('build', {})
+            context_path = build_info if isinstance(build_info, str) else (build_info or {}).get('context')
+            if isinstance(context_path, str):
+                node['dockerfile'] = os.path.abspath(os.path.join(context_path, 'Dockerfile'))
+            services[service_name] = node
+
+        if self.recorded:
+            affected = self.dependents(changed_paths)
+            affected.update(name for name, node in services.items() if self.services.get(name) != node)
+            self.affected = affected
+        else:
+            self.affected = None
+        self.services = services
+        self.recorded = True
+        return self.affected
+
+    # 내용이 바뀐 경로들에 의존하는 서비스 이름 집합을 반환합니다.
+    def dependents(self, changed_paths) -> set:
+        changed = [os.path.abspath(path) for path in changed_paths]
+        affected = set()
+        for service_name, node in self.services.items():
+            for path in changed:
+                if node.get('dockerfile') == path or (node.get('fake_app') and _is_under(path, node['fake_app'])):
+                    affected.add(service_name)
+                    break
+        return affected
+
+    # 경로가 이 그래프의 입력(다시 생성이 필요한 파일)인지 확인합니다.
+    def is_input(self, path: str) -> bool:
+        path = os.path.abspath(path)
+        if path in (self.source_file, self.policy_file) or self.is_k8s_input(path):
+            return True
+        return any(node.get('dockerfile') == path or (node.get('fake_app') and _is_under(path, node['fake_app']))
+                   for node in self.services.values())
+
+    # 경로가 쿠버네티스 쪽 입력(Manifest 또는 쿠버네티스 정책 파일)인지 확인합니다. (도커 컴포즈 청사진과는 무관)
+    def is_k8s_input(self, path: str) -> bool:
+        if not self.k8s_dir:
+            return False
+        path = os.path.abspath(path)
+        return path == self.k8s_policy_file or (path.endswith(YAML_SUFFIXES) and _is_under(path, self.k8s_dir))
+
+    # 다시 태깅해야 할 Manifest 파일 목록을 반환합니다. 정책 파일이 바뀌었으면 디렉토리 전체를 반환합니다.
+    def k8s_changes(self, changed_paths) -> list:
+        changed = {os.path.abspath(path) for path in changed_paths if self.is_k8s_input(path)}
+        if self.k8s_policy_file in changed:
+            return [os.path.join(root, name) for root, dirs, files in sorted(os.walk(self.k8s_dir))
+                    for name in sorted(files) if name.endswith(YAML_SUFFIXES)]
+        return sorted(path for path in changed if os.path.isfile(path))
+
+    # 감시해야 할 (디렉토리, 하위 디렉토리 포함 여부) 목록을 반환합니다.
+    # 파일 단위 입력은 부모 디렉토리를 비재귀로 감시하고, 가짜 앱 트리와 쿠버네티스 디렉토리는 재귀로 감시합니다.
+    def watch_paths(self) -> list:
+        watches = {}
+        def add(directory, recursive):
+            if os.path.isdir(directory):
+                watches[directory] = watches.get(directory, False) or recursive
+
+        add(os.path.dirname(self.source_file), False)
+        add(os.path.dirname(self.policy_file), False)
+        if self.k8s_policy_file:
+            add(os.path.dirname(self.k8s_policy_file), False)
+        for node in self.services.values():
+            if node.get('dockerfile'):
+                add(os.path.dirname(node['dockerfile']), False)
+            if node.get('fake_app'):
+                add(node['fake_app'], True)
+        if self.k8s_dir:
+            add(self.k8s_dir, True)
+
+        # 이미 재귀로 감시하는 디렉토리 아래의 항목은 중복 감시하지 않음
+        recursive_dirs = [directory for directory, recursive in watches.items() if recursive]
+        return sorted((directory, recursive) for directory, recursive in watches.items()
+                      if not any(other != directory and _is_under(directory, other) for other in recursive_dirs))
+
+    def to_dict(self) -> dict:
+        return {
+            'version': GRAPH_FORMAT_VERSION,
+            'source_file': self.source_file,
+            'policy_file': self.policy_file,
+            'k8s_dir': self.k8s_dir,
+            'k8s_policy_file': self.k8s_policy_file,
+            'services': self.services,
+        }
+
+    # 그래프를 JSON 파일로 저장합니다. (임시 파일에 쓴 뒤 교체)
+    def save(self, path: str = DEPENDENCY_FILE):
+        temp_path = f"{path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
+        os.replace(temp_path, path)
+
+    # 저장된 그래프를 불러옵니다. 파일이 없거나 형식이 맞지 않으면 None을 반환합니다.
+    @classmethod
+    def load(cls, path: str = DEPENDENCY_FILE):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if not isinstance(data, dict) or data.get('version') != GRAPH_FORMAT_VERSION:
+            return None
+
+        graph = cls(data['source_file'], data['policy_file'], data.get('k8s_dir'), data.get('k8s_policy_file'))
+        graph.services = data.get('services') or {}
+        graph.recorded = True
+        return graph
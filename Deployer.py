@@ -1,71 +1,197 @@
-import subprocess
+import os
+import re
 import sys
+import asyncio
+import subprocess
+import threading
+from Async_Deployer import AsyncDeploymentActuator
+from Docker_Engine_Backend import DockerEngineBackend
+from Blue_Green_Deployer import BlueGreenDeployer
+from Blueprint_Diff import BlueprintDiffer
+
+# 배포에 실제로 쓰일 백엔드 이름을 정합니다. (인자 → HONEYBOT_DEPLOY_BACKEND 환경 변수 → 'compose')
+def resolve_backend_name(backend=None) -> str:
+    if isinstance(backend, DockerEngineBackend):
+        return 'engine'
+    return backend or os.environ.get('HONEYBOT_DEPLOY_BACKEND', 'compose')
+
+# 생성할 Dockerfile에 BuildKit 전용 문법을 써도 되는지 반환합니다.
+# Engine API 백엔드는 /build(기존 빌더)로 빌드하므로 RUN --mount 같은 문법을 쓸 수 없습니다.
+def backend_supports_buildkit(backend=None) -> bool:
+    return resolve_backend_name(backend) != 'engine'
 
 class DeploymentActuator:
     # 생성된 docker-compose 파일을 사용하여 컨테이너 환경을
     # 실행, 중지, 관리하는 액츄에이터 클래스.
+    # 실제 작업은 AsyncDeploymentActuator(docker-compose CLI) 또는 DockerEngineBackend(Docker Engine API)가
+    # 수행하며, 이 클래스는 기존의 동기 API를 유지하는 얇은 래퍼입니다.
 
-    def __init__(self, compose_file_path: str):
+    def __init__(self, compose_file_path: str, timeout: float = None, backend=None, status_service=None,
+                 strategy: str = None):
         
         # 액츄에이터를 초기화합니다.
         # :param compose_file_path: 제어할 docker-compose.yml 파일의 경로
+        # :param timeout: 명령별 타임아웃(초). None이면 제한 없음 (compose 백엔드에만 적용)
+        # :param backend: 'compose'(기본값), 'engine' 또는 DockerEngineBackend 인스턴스.
+        #                 없으면 HONEYBOT_DEPLOY_BACKEND 환경 변수를 따릅니다.
+        # :param status_service: 시작된 StatusService. 있으면 status()가 CLI 대신 이벤트 기반 상태 표를 사용합니다.
+        # :param strategy: 'recreate'(기본값, 제자리 재생성) 또는 'bluegreen'(새 세대를 띄운 뒤 앞단 nginx로 전환).
+        #                  없으면 HONEYBOT_DEPLOY_STRATEGY 환경 변수를 따릅니다. (compose 백엔드에서만 지원)
         
         self.compose_file_path = compose_file_path
-        print(f"Deployer initialized for '{self.compose_file_path}'")
+        self.async_actuator = AsyncDeploymentActuator(compose_file_path, timeout=timeout)
 
-    def _run_command(self, command: list):
-        # (내부 함수) subprocess를 사용하여 docker-compose 명령을 실행합니다.
+        if not isinstance(backend, DockerEngineBackend):
+            backend = resolve_backend_name(backend)
+        if backend == 'engine':
+            backend = DockerEngineBackend(compose_file_path)
+        elif backend != 'compose' and not isinstance(backend, DockerEngineBackend):
+            print(f"Warning: Unknown deploy backend '{backend}'. Falling back to docker-compose.")
+            backend = 'compose'
+        self.engine = backend if isinstance(backend, DockerEngineBackend) else None
+        self.buildkit = self.engine is None # 이 액츄에이터로 배포할 청사진의 Dockerfile 문법
+        self._log_owner = None # 로그 수집기 사용자 (uid, gid). 한 번 확인한 뒤 재사용 (_collector_owner)
+        self.status_service = status_service
+
+        strategy = strategy or os.environ.get('HONEYBOT_DEPLOY_STRATEGY', 'recreate')
+        if strategy == 'bluegreen' and self.engine:
+            print("Warning: Blue/green deployment requires the docker-compose backend. Using 'recreate'.")
+            strategy = 'recreate'
+        elif strategy not in ('recreate', 'bluegreen'):
+            print(f"Warning: Unknown deploy strategy '{strategy}'. Using 'recreate'.")
+            strategy = 'recreate'
+        self.blue_green = BlueGreenDeployer(compose_file_path, timeout=timeout) if strategy == 'bluegreen' else None
+        print(f"Deployer initialized for '{self.compose_file_path}'"
+              + (" (Docker Engine API backend)" if self.engine else "")
+              + (" (blue/green)" if self.blue_green else ""))
+
+    # (내부 함수) 코루틴을 끝까지 실행하고 결과를 반환합니다.
+    # 이미 이벤트 루프가 돌고 있는 스레드에서 호출되면 별도 스레드의 새 루프에서 실행합니다.
+    def _run_sync(self, coroutine):
         try:
-            # check=True: 명령 실행 실패 시 예외 발생
-            # text=True: stdout, stderr를 텍스트로 다룸
-            # capture_output=True: stdout, stderr를 캡쳐함
-            result = subprocess.run (
-                command, 
-                check=True, 
-                text=True, 
-                capture_output=True,
-                encoding='utf-8'
-            )
-            print("Command successful.")
-            print(result.stdout)
-            return True
-        except FileNotFoundError:
-            print("ERROR: 'docker-compose' command not found.")
-            print("Please ensure Docker and Docker Compose are installed and in your PATH.")
-            return False
-        except subprocess.CalledProcessError as e:
-            print(f"ERROR: Command failed with exit code {e.returncode}")
-            print("--- Stderr ---")
-            print(e.stderr)
-            return False
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(coroutine)
+
+        outcome = {}
+        def runner():
+            try:
+                outcome['result'] = asyncio.run(coroutine)
+            except BaseException as e:
+                outcome['error'] = e
+        thread = threading.Thread(target=runner)
+        thread.start()
+        thread.join()
+        if 'error' in outcome:
+            raise outcome['error']
+        return outcome['result']
+
+    def _run_command(self, command: list):
+        # (내부 함수) docker-compose 명령을 실행합니다. 출력은 한 줄씩 스트리밍됩니다.
+        return self._run_sync(self.async_actuator.run_command(command)).ok
 
     # docker-compose up 명령을 실행하여 환경을 시작합니다.
-    def up(self, detach=True, build=False):
-        
-        print("\nStarting deception environment...")
-        command = ['docker-compose', '-f', self.compose_file_path, 'up']
+    # services를 지정하면 해당 서비스만 생성/재생성하고 나머지는 그대로 둡니다.
+    # Engine 백엔드에서는 blueprint로 메모리의 청사진을 넘기면 파일을 다시 읽지 않습니다.
+    # blue/green 전략에서는 서비스 선택과 관계없이 새 세대 전체를 띄우고 전환합니다.
+    def up(self, detach=True, build=False, services=None, no_deps=False, force_recreate=False, remove_orphans=False,
+           blueprint=None):
+        self._prepare_log_dir()
+        if self.blue_green:
+            return self._run_sync(self.blue_green.deploy(build))
+        if self.engine:
+            return self.engine.up(blueprint, services, build, no_deps, force_recreate, remove_orphans)
+        return self._run_sync(self.async_actuator.up(detach, build, services, no_deps, force_recreate, remove_orphans)).ok
+
+    # 청사진 diff 결과(BlueprintDiffer.diff)에 따라 영향을 받은 서비스만 재배포합니다.
+    # 변경되지 않은 서비스의 컨테이너는 중단 없이 계속 실행됩니다.
+    # blue/green 전략에서는 바뀐 서비스가 있으면 새 세대로 통째로 전환하여, 빌드 중에도 이전 세대가 응답하게 합니다.
+    def apply_changes(self, diff: dict, force_services=None, blueprint=None):
+        self._prepare_log_dir()
+        if self.blue_green:
+            if not (diff.get('added') or diff.get('changed') or diff.get('removed') or force_services):
+                print("\nNo service changes detected. Deception environment left running as is.")
+                return True
+            return self._run_sync(self.blue_green.deploy(build=True))
+        if self.engine:
+            return self.engine.apply_changes(diff, blueprint, force_services)
+        return self._run_sync(self.async_actuator.apply_changes(diff, force_services))
+
+    # (내부 함수) fluentd가 파일을 쓸 ./fluentd/log 디렉토리를 배포 전에 만들고, 수집기 이미지의 사용자(fluent)가 쓸 수 있게 합니다.
+    # 없는 채로 배포하면 도커가 root 소유(0755)로 만들어, root가 아닌 fluent 사용자가 파일을 남기지 못합니다.
+    # 호스트에서 root로 실행 중이면 디렉토리 소유자를 그 사용자로 바꾸고, 그럴 수 없으면 sticky 비트를 둔 1777로 엽니다.
+    def _prepare_log_dir(self):
+        log_dir = os.path.join(os.path.dirname(os.path.abspath(self.compose_file_path)), 'fluentd', 'log')
+        try:
+            os.makedirs(log_dir, mode=0o755, exist_ok=True)
+        except OSError as e:
+            print(f"Warning: Could not create fluentd log directory '{log_dir}': {e}")
+            return
+        owner = self._collector_owner()
+        if owner is None or not hasattr(os, 'chown'):
+            return
+
+        uid, gid = owner
+        info = os.stat(log_dir)
+        if info.st_uid == uid or (info.st_mode & 0o1777) == 0o1777:
+            return
+        try:
+            os.chown(log_dir, uid, gid)
+        except PermissionError:
+            try:
+                os.chmod(log_dir, 0o1777)
+                print(f"Warning: Cannot chown '{log_dir}' to the fluentd user ({uid}:{gid}). Made it writable (1777) instead.")
+            except OSError as e:
+                print(f"Warning: fluentd ({uid}:{gid}) may fail to write attack logs to '{log_dir}': {e}")
 
-        if build:
-            command.append('--build') #--build 플래그 추가
+    # (내부 함수) 청사진의 로그 수집기(logging 서비스)가 실행되는 (uid, gid)를 반환합니다. 알 수 없으면 None.
+    # 서비스에 숫자 user가 지정되어 있으면 그 값을, 아니면 이미지 안에서 'id'를 실행하여 기본 사용자를 확인합니다. (한 번만)
+    def _collector_owner(self):
+        if self._log_owner is not None:
+            return self._log_owner or None
+        self._log_owner = ()
 
-        if detach:
-            command.append('-d') # -d: 백그라운드에서 실행
-            
-        self._run_command(command)
+        blueprint = BlueprintDiffer().load(self.compose_file_path) or {}
+        collector = (blueprint.get('services') or {}).get('logging') or {}
+        user = str(collector.get('user') or '')
+        if re.fullmatch(r'\d+(:\d+)?', user):
+            uid, _, gid = user.partition(':')
+            self._log_owner = (int(uid), int(gid or uid))
+            return self._log_owner
+        if not collector.get('image'):
+            return None
+
+        try:
+            output = subprocess.run(['docker', 'run', '--rm', '--entrypoint', 'id', collector['image']],
+                                    capture_output=True, text=True, timeout=300).stdout
+        except (OSError, subprocess.SubprocessError) as e:
+            print(f"Warning: Could not determine the fluentd user of '{collector['image']}': {e}")
+            return None
+        match = re.search(r'uid=(\d+).*?gid=(\d+)', output)
+        if match:
+            self._log_owner = (int(match.group(1)), int(match.group(2)))
+        return self._log_owner or None
 
     # docker-compose down 명령을 실행하여 환경을 중지하고 리소스를 제거합니다.
     def down(self):
+        if self.blue_green:
+            return self._run_sync(self.blue_green.down())
+        if self.engine:
+            return self.engine.down()
+        return self._run_sync(self.async_actuator.down()).ok
 
-        print("\nStopping deception environment...")
-        command = ['docker-compose', '-f', self.compose_file_path, 'down']
-        self._run_command(command)
-
-    # docker-compose ps 명령을 실행하여 서비스 상태를 확인합니다.
+    # 서비스 상태를 확인합니다. 상태 서비스가 준비되어 있으면 메모리의 상태 표를 출력하고,
+    # 그렇지 않으면 docker-compose ps(또는 Engine API 목록 조회)를 실행합니다.
     def status(self):
-    
-        print("\nChecking deception environment status...")
-        command = ['docker-compose', '-f', self.compose_file_path, 'ps']
-        self._run_command(command)
+        if self.status_service is not None and self.status_service.ready:
+            print("\nChecking deception environment status (event cache)...")
+            self.status_service.print_table()
+            return True
+        if self.blue_green:
+            return self._run_sync(self.blue_green.status())
+        if self.engine:
+            return self.engine.status() is not None
+        return self._run_sync(self.async_actuator.status()).ok
 
 
 # --- 사용자가 직접 제어할 수 있는 대화형 실행 예시 ---
@@ -0,0 +1,837 @@
+import os
+import re
+import io
+import json
+import time
+import queue
+import shlex
+import socket
+import fnmatch
+import hashlib
+import tarfile
+import http.client
+from urllib.parse import quote, urlencode
+from collections.abc import Mapping
+import Yaml_Backend
+from Blueprint_Overlay import materialize
+from Metrics import metrics
+from Dockerfile_Generator import is_content_image
+
+DEFAULT_SOCKET_PATH = '/var/run/docker.sock'
+API_VERSION = 'v1.41'
+
+# docker-compose(v1)와 같은 라벨과 이름 규칙({프로젝트}_{서비스}_1)을 사용하므로, 이 백엔드로 만든 컨테이너도
+# docker-compose ps/down 으로 확인하고 정리할 수 있습니다. (반대도 마찬가지)
+LABEL_PROJECT = 'com.docker.compose.project'
+LABEL_SERVICE = 'com.docker.compose.service'
+LABEL_NUMBER = 'com.docker.compose.container-number'
+LABEL_ONEOFF = 'com.docker.compose.oneoff'
+LABEL_WORKING_DIR = 'com.docker.compose.project.working_dir'
+LABEL_CONFIG_FILES = 'com.docker.compose.project.config_files'
+LABEL_NETWORK = 'com.docker.compose.network'
+LABEL_VOLUME = 'com.docker.compose.volume'
+# 설정 해시는 docker-compose가 자체 방식으로 계산하는 com.docker.compose.config-hash와 섞이지 않도록 별도 라벨에 기록
+LABEL_CONFIG_HASH = 'io.honeybot.config-hash'
+
+# 이 백엔드가 컨테이너 설정으로 옮기는 서비스 키 (나머지는 경고 후 무시)
+SUPPORTED_SERVICE_KEYS = {
+    'image', 'build', 'command', 'entrypoint', 'environment', 'ports', 'volumes', 'restart',
+    'logging', 'healthcheck', 'depends_on', 'networks', 'labels', 'working_dir', 'user',
+    'hostname', 'container_name', 'expose', 'tty', 'stdin_open', 'privileged', 'x-honeypot-policy'
+}
+
+# Docker Engine API가 오류 응답을 돌려준 경우
+class DockerEngineError(Exception):
+
+    def __init__(self, status: int, message: str):
+        super().__init__(f"Docker Engine API error {status}: {message}")
+        self.status = status
+        self.message = message
+
+# 유닉스 도메인 소켓으로 연결하는 HTTP 연결
+class _UnixHTTPConnection(http.client.HTTPConnection):
+
+    def __init__(self, socket_path: str, timeout: float = None):
+        super().__init__('localhost', timeout=timeout)
+        self.socket_path = socket_path
+
+    def connect(self):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        try:
+            sock.connect(self.socket_path)
+        except OSError:
+            sock.close()
+            raise
+        self.sock = sock
+
+# Docker Engine HTTP API 클라이언트.
+# 연결을 요청마다 새로 만들지 않고 keep-alive 연결을 풀에 보관해 재사용합니다.
+# 풀은 LIFO라서 가장 최근에 쓴(아직 살아 있을 가능성이 높은) 연결부터 꺼내 씁니다.
+class DockerEngineClient:
+
+    # :param socket_path: 도커 데몬 소켓 경로. 없으면 DOCKER_HOST(unix://...) 또는 기본 경로
+    # :param pool_size: 보관할 최대 유휴 연결 수
+    # :param timeout: 소켓 타임아웃(초). 빌드/이미지 다운로드 같은 긴 요청에도 적용됩니다.
+    def __init__(self, socket_path: str = None, pool_size: int = 4, timeout: float = 300,
+                 api_version: str = API_VERSION):
+        if socket_path is None:
+            docker_host = os.environ.get('DOCKER_HOST', '')
+            socket_path = docker_host[len('unix://'):] if docker_host.startswith('unix://') else DEFAULT_SOCKET_PATH
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self.api_version = api_version
+        self._pool = queue.LifoQueue(maxsize=pool_size)
+        self._active = set()   # 응답을 읽는 중인 연결
+        self.connections_opened = 0
+
+    # 요청을 보내고 (상태 코드, JSON으로 해석한 본문)을 반환합니다.
+    # 2xx/304가 아니면 DockerEngineError를 발생시킵니다.
+    def request(self, method: str, path: str, params: dict = None, body=None, headers: dict = None):
+        response, conn = self._send(method, path, params, body, headers)
+        try:
+            data = response.read()
+        finally:
+            self._release(conn, response)
+
+        if not data:
+            payload = None
+        elif 'json' in (response.getheader('Content-Type') or ''):
+            payload = json.loads(data)
+        else:
+            payload = data.decode('utf-8', errors='replace')
+        self._raise_for_status(response.status, payload)
+        return response.status, payload
+
+    # 진행 상황을 JSON 객체 스트림으로 돌려주는 요청(빌드, 이미지 다운로드)을 보내고
+    # 객체를 하나씩 생성합니다. 스트림 안의 오류 메시지는 DockerEngineError로 바뀝니다.
+    def request_stream(self, method: str, path: str, params: dict = None, body=None, headers: dict = None):
+        response, conn = self._send(method, path, params, body, headers)
+        try:
+            if response.status >= 400:
+                data = response.read()
+                try:
+                    payload = json.loads(data) if data else None
+                except ValueError:
+                    payload = data.decode('utf-8', errors='replace')
+                self._raise_for_status(response.status, payload)
+
+            decoder = json.JSONDecoder()
+            buffer = ''
+            while True:
+                chunk = response.readline()
+                if not chunk:
+                    break
+                buffer += chunk.decode('utf-8', errors='replace')
+                while True:
+                    buffer = buffer.lstrip()
+                    if not buffer:
+                        break
+                    try:
+                        message, end = decoder.raw_decode(buffer)
+                    except ValueError:
+                        break # 아직 객체가 다 도착하지 않음
+                    buffer = buffer[end:]
+                    if isinstance(message, dict) and message.get('error'):
+                        raise DockerEngineError(response.status, message['error'])
+                    yield message
+        finally:
+            self._release(conn, response)
+
+    # 풀의 연결을 닫고, 사용 중인 연결(예: 이벤트 스트림)도 끊어 대기 중인 읽기를 깨웁니다.
+    def close(self):
+        for conn in list(self._active):
+            if conn.sock is not None:
+                try:
+                    conn.sock.shutdown(socket.SHUT_RDWR)
+                except OSError:
+                    pass
+        while True:
+            try:
+                self._pool.get_nowait().close()
+            except queue.Empty:
+                return
+
+    # (내부 함수) 풀의 연결로 요청을 보냅니다. 재사용한 연결이 이미 끊겨 있으면 새 연결로 한 번 다시 보냅니다.
+    def _send(self, method, path, params, body, headers):
+        url = f"/{self.api_version}{path}"
+        if params:
+            url += '?' + urlencode({key: value for key, value in params.items() if value is not None})
+        headers = dict(headers or {})
+        if isinstance(body, (dict, list)):
+            body = json.dumps(body).encode('utf-8')
+            headers.setdefault('Content-Type', 'application/json')
+
+        for attempt in range(2):
+            conn, reused = self._acquire()
+            try:
+                conn.request(method, url, body=body, headers=headers)
+                return conn.getresponse(), conn
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError,
+                    http.client.CannotSendRequest, http.client.BadStatusLine):
+                self._active.discard(conn)
+                conn.close()
+                if not reused or attempt:
+                    raise
+            except Exception:
+                self._active.discard(conn)
+                conn.close()
+                raise
+
+    def _acquire(self):
+        try:
+            conn, reused = self._pool.get_nowait(), True
+        except queue.Empty:
+            self.connections_opened += 1
+            conn, reused = _UnixHTTPConnection(self.socket_path, self.timeout), False
+        self._active.add(conn)
+        return conn, reused
+
+    # (내부 함수) 응답을 끝까지 읽은 keep-alive 연결만 풀에 돌려놓습니다.
+    def _release(self, conn, response):
+        self._active.discard(conn)
+        if response.will_close or not response.isclosed():
+            conn.close()
+            return
+        try:
+            self._pool.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+    @staticmethod
+    def _raise_for_status(status: int, payload):
+        if status < 400:
+            return
+        message = payload.get('message', payload) if isinstance(payload, dict) else payload
+        raise DockerEngineError(status, str(message or http.client.responses.get(status, 'Unknown error')))
+
+    # --- 이 백엔드가 사용하는 엔드포인트 ---
+
+    def ping(self) -> bool:
+        try:
+            return self.request('GET', '/_ping')[1] == 'OK'
+        except (OSError, DockerEngineError, http.client.HTTPException):
+            return False
+
+    def list_containers(self, labels: list) -> list:
+        return self.request('GET', '/containers/json',
+                            {'all': 1, 'filters': json.dumps({'label': labels})})[1] or []
+
+    def inspect_container(self, container_id: str) -> dict:
+        return self.request('GET', f"/containers/{quote(container_id)}/json")[1]
+
+    def create_container(self, name: str, config: dict) -> str:
+        return self.request('POST', '/containers/create', {'name': name}, body=config)[1]['Id']
+
+    def start_container(self, container_id: str):
+        self.request('POST', f"/containers/{quote(container_id)}/start")
+
+    def stop_container(self, container_id: str, timeout: int = 10):
+        self.request('POST', f"/containers/{quote(container_id)}/stop", {'t': timeout})
+
+    def remove_container(self, container_id: str):
+        self.request('DELETE', f"/containers/{quote(container_id)}", {'force': 1, 'v': 1})
+
+    def connect_network(self, network: str, container_id: str, aliases: list):
+        self.request('POST', f"/networks/{quote(network)}/connect",
+                     body={'Container': container_id, 'EndpointConfig': {'Aliases': aliases}})
+
+    def list_networks(self, labels: list) -> list:
+        return self.request('GET', '/networks', {'filters': json.dumps({'label': labels})})[1] or []
+
+    def create_network(self, name: str, labels: dict, driver: str = 'bridge'):
+        self.request('POST', '/networks/create',
+                     body={'Name': name, 'Driver': driver, 'Labels': labels, 'CheckDuplicate': True})
+
+    def remove_network(self, network_id: str):
+        self.request('DELETE', f"/networks/{quote(network_id)}")
+
+    def inspect_volume(self, name: str):
+        try:
+            return self.request('GET', f"/volumes/{quote(name)}")[1]
+        except DockerEngineError as e:
+            if e.status == 404:
+                return None
+            raise
+
+    def create_volume(self, name: str, labels: dict, driver: str = 'local'):
+        self.request('POST', '/volumes/create', body={'Name': name, 'Driver': driver, 'Labels': labels})
+
+    def inspect_image(self, image: str):
+        try:
+            return self.request('GET', f"/images/{quote(image, safe='/:@')}/json")[1]
+        except DockerEngineError as e:
+            if e.status == 404:
+                return None
+            raise
+
+    def pull_image(self, image: str):
+        name, tag = _split_image_reference(image)
+        for _ in self.request_stream('POST', '/images/create', {'fromImage': name, 'tag': tag}):
+            pass
+
+    # 빌드 컨텍스트를 tar로 묶어 이미지를 빌드합니다. 빌드 출력은 한 줄씩 on_line으로 전달됩니다.
+    def build_image(self, context_dir: str, tag: str, dockerfile: str = 'Dockerfile', build_args: dict = None,
+                    on_line=print):
+        context = _tar_build_context(context_dir)
+        params = {'t': tag, 'dockerfile': dockerfile, 'rm': 1}
+        if build_args:
+            params['buildargs'] = json.dumps(build_args)
+        for message in self.request_stream('POST', '/build', params, body=context,
+                                           headers={'Content-Type': 'application/x-tar'}):
+            text = message.get('stream') if isinstance(message, dict) else None
+            if text and text.strip():
+                on_line(text.rstrip('\n'))
+
+# docker-compose CLI를 거치지 않고 Docker Engine API로 직접 배포하는 백엔드.
+# 이미 메모리에 있는 청사진을 그대로 사용하므로 명령마다 프로세스를 띄우거나
+# compose 파일을 다시 파싱할 필요가 없고, 데몬 연결은 풀에서 재사용됩니다.
+#
+# compose 파일 형식 중 이 프로젝트의 청사진이 사용하는 부분(SUPPORTED_SERVICE_KEYS)만 지원합니다.
+class DockerEngineBackend:
+
+    # :param compose_file_path: 청사진 파일 경로 (blueprint를 넘기지 않으면 이 파일을 읽음, 상대 경로의 기준)
+    # :param project_name: 프로젝트 이름. 없으면 COMPOSE_PROJECT_NAME 또는 파일이 있는 디렉토리 이름
+    # :param client: 공유할 DockerEngineClient (없으면 socket_path로 새로 만듦)
+    # :param health_timeout: service_healthy 조건의 의존 서비스를 기다리는 최대 시간(초)
+    def __init__(self, compose_file_path: str, project_name: str = None, client: DockerEngineClient = None,
+                 socket_path: str = None, health_timeout: float = 120):
+        self.compose_file_path = os.path.abspath(compose_file_path)
+        self.project_dir = os.path.dirname(self.compose_file_path)
+        self.project_name = compose_project_name(compose_file_path, project_name)
+        self.client = client or DockerEngineClient(socket_path)
+        self.health_timeout = health_timeout
+        self._warned_keys = set()
+
+    # 청사진의 서비스를 생성/시작합니다. 설정(해시)과 이미지가 그대로인 컨테이너는 건드리지 않습니다.
+    # :param blueprint: 메모리에 있는 청사진 (BlueprintOverlay도 가능). None이면 compose 파일을 읽음
+    # :param services: 지정하면 해당 서비스(와 no_deps가 아니면 그 의존 서비스)만 처리
+    def up(self, blueprint=None, services=None, build=False, no_deps=False, force_recreate=False,
+           remove_orphans=False) -> bool:
+        print("\nStarting deception environment (Docker Engine API)...")
+        with metrics.stage('engine_up', profile=False, project=self.project_name):
+            try:
+                blueprint = self._load_blueprint(blueprint)
+                all_services = blueprint.get('services') or {}
+                targets = self._resolve_targets(all_services, services, no_deps)
+
+                self._ensure_networks(blueprint, [all_services[name] for name in targets])
+                self._ensure_volumes(blueprint)
+                existing = self._containers_by_service()
+
+                for service_name in targets:
+                    self._up_service(service_name, all_services[service_name], blueprint,
+                                     existing.get(service_name, []), build, force_recreate)
+
+                if remove_orphans:
+                    for service_name, containers in existing.items():
+                        if service_name not in all_services:
+                            for container in containers:
+                                print(f"  - Removing orphan container '{_container_name(container)}'")
+                                self.client.remove_container(container['Id'])
+            except (OSError, DockerEngineError, http.client.HTTPException) as e:
+                print(f"ERROR: Docker Engine deployment failed: {e}")
+                return False
+
+        print("Command successful.")
+        return True
+
+    # 프로젝트의 컨테이너와 네트워크를 제거합니다. (docker-compose down과 같이 이름 있는 볼륨은 유지)
+    def down(self) -> bool:
+        print("\nStopping deception environment (Docker Engine API)...")
+        with metrics.stage('engine_down', profile=False, project=self.project_name):
+            try:
+                for containers in self._containers_by_service().values():
+                    for container in containers:
+                        print(f"  - Removing container '{_container_name(container)}'")
+                        if container.get('State') == 'running':
+                            self.client.stop_container(container['Id'])
+                        self.client.remove_container(container['Id'])
+                for network in self.client.list_networks([f"{LABEL_PROJECT}={self.project_name}"]):
+                    print(f"  - Removing network '{network['Name']}'")
+                    self.client.remove_network(network['Id'])
+            except (OSError, DockerEngineError, http.client.HTTPException) as e:
+                print(f"ERROR: Docker Engine teardown failed: {e}")
+                return False
+
+        print("Command successful.")
+        return True
+
+    # 프로젝트 컨테이너의 상태를 출력하고 [{'name', 'service', 'state', 'status', 'ports'}] 목록을 반환합니다.
+    # 데몬에 연결할 수 없으면 None.
+    def status(self):
+        print("\nChecking deception environment status (Docker Engine API)...")
+        try:
+            containers = self.client.list_containers([f"{LABEL_PROJECT}={self.project_name}"])
+        except (OSError, DockerEngineError, http.client.HTTPException) as e:
+            print(f"ERROR: Docker Engine status check failed: {e}")
+            return None
+
+        rows = []
+        for container in sorted(containers, key=_container_name):
+            ports = ", ".join(
+                f"{port['PublicPort']}->{port['PrivatePort']}/{port.get('Type', 'tcp')}" if port.get('PublicPort')
+                else f"{port['PrivatePort']}/{port.get('Type', 'tcp')}"
+                for port in container.get('Ports') or [])
+            rows.append({'name': _container_name(container),
+                         'service': (container.get('Labels') or {}).get(LABEL_SERVICE, ''),
+                         'state': container.get('State', ''), 'status': container.get('Status', ''),
+                         'ports': ports})
+
+        print(f"{'NAME':<32} {'SERVICE':<16} {'STATUS':<28} PORTS")
+        for row in rows:
+            print(f"{row['name']:<32} {row['service']:<16} {row['status']:<28} {row['ports']}")
+        return rows
+
+    # 청사진 diff 결과에 따라 영향을 받은 서비스만 재배포합니다. (AsyncDeploymentActuator.apply_changes와 같은 규칙)
+    def apply_changes(self, diff: dict, blueprint=None, force_services=None) -> bool:
+        force_services = [name for name in (force_services or []) if name in diff.get('unchanged', [])]
+        targets = diff.get('added', []) + diff.get('changed', []) + force_services
+        removed = diff.get('removed', [])
+
+        if not targets and not removed:
+            print("\nNo service changes detected. Deception environment left running as is.")
+            return True
+
+        print(f"\nApplying incremental redeploy: added={diff.get('added', [])}, "
+              f"changed={diff.get('changed', [])}, removed={removed}, rebuilt={force_services}")
+
+        # 설정이 바뀐 서비스는 설정 해시로, 빌드 입력만 바뀐 서비스는 재빌드된 이미지 ID로 재생성이 결정됩니다.
+        return self.up(blueprint, services=targets, build=True, no_deps=True, remove_orphans=bool(removed))
+
+    def close(self):
+        self.client.close()
+
+    # (내부 함수) 청사진 하나를 평범한 딕셔너리로 준비합니다.
+    def _load_blueprint(self, blueprint) -> dict:
+        if blueprint is None:
+            blueprint = Yaml_Backend.load_file(self.compose_file_path)
+        return materialize(blueprint) or {}
+
+    # (내부 함수) 처리할 서비스를 의존 관계 순서(의존 대상이 먼저)로 정렬합니다.
+    def _resolve_targets(self, all_services: dict, services, no_deps: bool) -> list:
+        wanted = list(all_services) if services is None else list(services)
+        unknown = [name for name in wanted if name not in all_services]
+        if unknown:
+            raise DockerEngineError(400, f"No such service(s) in blueprint: {unknown}")
+
+        ordered, visiting, done = [], set(), set()
+        def visit(name):
+            if name in done:
+                return
+            if name in visiting:
+                raise DockerEngineError(400, f"Circular depends_on involving '{name}'")
+            visiting.add(name)
+            for dependency in _dependencies(all_services[name]):
+                if dependency in all_services and (not no_deps or dependency in wanted):
+                    visit(dependency)
+            visiting.discard(name)
+            done.add(name)
+            ordered.append(name)
+
+        for name in wanted:
+            visit(name)
+        return ordered
+
+    # (내부 함수) 프로젝트 기본 네트워크와 서비스들이 사용하는 네트워크를 만듭니다.
+    def _ensure_networks(self, blueprint: dict, services: list):
+        declared = blueprint.get('networks') or {}
+        needed = set()
+        for service in services:
+            needed.update(_service_networks(service))
+
+        existing = {network['Name'] for network in
+                    self.client.list_networks([f"{LABEL_PROJECT}={self.project_name}"])}
+        for network in sorted(needed):
+            options = declared.get(network) or {}
+            if options.get('external'):
+                continue
+            full_name = self._network_name(network, declared)
+            if full_name in existing:
+                continue
+            print(f"  - Creating network '{full_name}'")
+            try:
+                self.client.create_network(full_name, {LABEL_PROJECT: self.project_name, LABEL_NETWORK: network},
+                                           options.get('driver', 'bridge'))
+            except DockerEngineError as e:
+                if e.status != 409: # 이미 있는 경우는 무시
+                    raise
+
+    # (내부 함수) 청사진의 최상위 volumes에 선언된 이름 있는 볼륨을 만듭니다.
+    def _ensure_volumes(self, blueprint: dict):
+        for volume, options in (blueprint.get('volumes') or {}).items():
+            options = options or {}
+            if options.get('external'):
+                continue
+            full_name = options.get('name') or f"{self.project_name}_{volume}"
+            if self.client.inspect_volume(full_name) is None:
+                print(f"  - Creating volume '{full_name}'")
+                self.client.create_volume(full_name, {LABEL_PROJECT: self.project_name, LABEL_VOLUME: volume},
+                                          options.get('driver', 'local'))
+
+    # (내부 함수) 프로젝트 컨테이너를 서비스 이름별로 묶어 반환합니다.
+    def _containers_by_service(self) -> dict:
+        grouped = {}
+        for container in self.client.list_containers([f"{LABEL_PROJECT}={self.project_name}"]):
+            labels = container.get('Labels') or {}
+            if labels.get(LABEL_ONEOFF) == 'True':
+                continue
+            grouped.setdefault(labels.get(LABEL_SERVICE, ''), []).append(container)
+        return grouped
+
+    # (내부 함수) 서비스 하나를 최신 상태로 만듭니다.
+    def _up_service(self, service_name: str, service: dict, blueprint: dict, containers: list,
+                    build: bool, force_recreate: bool):
+        image = self._ensure_image(service_name, service, build)
+        self._wait_for_dependencies(service, blueprint)
+
+        config = self._container_config(service_name, service, blueprint, image['Id'] if image else None)
+        config_hash = config['Labels'][LABEL_CONFIG_HASH]
+        container_name = service.get('container_name') or f"{self.project_name}_{service_name}_1"
+
+        for container in containers:
+            current = self.client.inspect_container(container['Id'])
+            same_config = (current['Config'].get('Labels') or {}).get(LABEL_CONFIG_HASH) == config_hash
+            same_image = image is None or current.get('Image') == image['Id']
+            if same_config and same_image and not force_recreate:
+                if not current['State'].get('Running'):
+                    print(f"  - Starting '{container_name}'")
+                    self.client.start_container(container['Id'])
+                else:
+                    print(f"  - '{container_name}' is up to date")
+                return
+            print(f"  - Recreating '{container_name}'")
+            self.client.remove_container(container['Id'])
+
+        print(f"  - Creating '{container_name}'")
+        networks = list(config.pop('_networks'))
+        container_id = self.client.create_container(container_name, config)
+        # 컨테이너 생성 시에는 네트워크를 하나만 지정할 수 있으므로 나머지는 생성 후에 연결
+        for network in networks[1:]:
+            self.client.connect_network(network, container_id, [service_name])
+        self.client.start_container(container_id)
+
+    # (내부 함수) 서비스 이미지를 준비합니다. build가 있으면 빌드하고, 없으면 로컬에 없을 때만 받습니다.
+    def _ensure_image(self, service_name: str, service: dict, build: bool):
+        build_info = service.get('build')
+        image_name = service.get('image') or (f"{self.project_name}_{service_name}" if build_info else None)
+        if not image_name:
+            raise DockerEngineError(400, f"Service '{service_name}' has neither image nor build")
+
+        image = self.client.inspect_image(image_name)
+        if build and image is not None and is_content_image(image_name):
+            # 빌드 입력의 내용 해시로 태그된 이미지가 이미 있으면 다시 빌드할 필요가 없음
+            print(f"  - Image '{image_name}' is up to date (content hash). Skipping build.")
+            metrics.incr('engine_builds_skipped')
+            build = False
+        if build_info and (build or image is None):
+            if isinstance(build_info, str):
+                build_info = {'context': build_info}
+            context_dir = os.path.normpath(os.path.join(self.project_dir, build_info.get('context', '.')))
+            print(f"  - Building image '{image_name}' from '{context_dir}'")
+            build_args = build_info.get('args') or {}
+            if isinstance(build_args, list):
+                build_args = dict(arg.split('=', 1) if '=' in arg else (arg, '') for arg in build_args)
+            self.client.build_image(context_dir, image_name, build_info.get('dockerfile', 'Dockerfile'),
+                                    {key: str(value) for key, value in build_args.items()},
+                                    on_line=lambda line: print(f"    {line}"))
+            metrics.incr('engine_images_built')
+            image = self.client.inspect_image(image_name)
+        elif image is None:
+            print(f"  - Pulling image '{image_name}'")
+            self.client.pull_image(image_name)
+            metrics.incr('engine_images_pulled')
+            image = self.client.inspect_image(image_name)
+
+        if image is None:
+            raise DockerEngineError(404, f"Image '{image_name}' is not available")
+        return image
+
+    # (내부 함수) depends_on의 condition: service_healthy 대상이 healthy가 될 때까지 기다립니다.
+    def _wait_for_dependencies(self, service: dict, blueprint: dict):
+        depends_on = service.get('depends_on') or {}
+        if not isinstance(depends_on, Mapping):
+            return
+        existing = None
+        for dependency, options in depends_on.items():
+            if (options or {}).get('condition') != 'service_healthy':
+                continue
+            existing = existing if existing is not None else self._containers_by_service()
+            for container in existing.get(dependency, []):
+                self._wait_until_healthy(container['Id'], dependency)
+
+    def _wait_until_healthy(self, container_id: str, service_name: str):
+        deadline = time.monotonic() + self.health_timeout
+        delay = 0.2
+        while True:
+            state = self.client.inspect_container(container_id)['State']
+            health = (state.get('Health') or {}).get('Status')
+            if health is None or health == 'healthy':
+                return
+            if not state.get('Running'):
+                raise DockerEngineError(409, f"Dependency '{service_name}' exited before becoming healthy")
+            if time.monotonic() >= deadline:
+                raise DockerEngineError(408, f"Timed out waiting for '{service_name}' to become healthy")
+            time.sleep(delay)
+            delay = min(delay * 2, 2.0)
+
+    # (내부 함수) compose 서비스 정의를 컨테이너 생성 요청 본문으로 바꿉니다.
+    def _container_config(self, service_name: str, service: dict, blueprint: dict, image_id) -> dict:
+        for key in service:
+            if key not in SUPPORTED_SERVICE_KEYS and key not in self._warned_keys:
+                self._warned_keys.add(key)
+                print(f"  - ⚠️ Warning: '{key}' is not supported by the Docker Engine backend and is ignored.")
+
+        labels = _key_value_mapping(service.get('labels'))
+        labels.update({
+            LABEL_PROJECT: self.project_name,
+            LABEL_SERVICE: service_name,
+            LABEL_NUMBER: '1',
+            LABEL_ONEOFF: 'False',
+            LABEL_WORKING_DIR: self.project_dir,
+            LABEL_CONFIG_FILES: self.compose_file_path,
+            LABEL_CONFIG_HASH: hashlib.sha256(
+                json.dumps(service, sort_keys=True, default=str).encode('utf-8')).hexdigest(),
+        })
+
+        exposed_ports, port_bindings = {}, {}
+        for port in service.get('ports') or []:
+            for container_port, binding in _parse_port(port):
+                exposed_ports[container_port] = {}
+                if binding is not None:
+                    port_bindings.setdefault(container_port, []).append(binding)
+        for port in service.get('expose') or []:
+            port = str(port)
+            exposed_ports[port if '/' in port else f"{port}/tcp"] = {}
+
+        binds, anonymous_volumes = [], {}
+        for volume in service.get('volumes') or []:
+            bind = self._parse_volume(volume, blueprint)
+            if bind is None:
+                anonymous_volumes[volume if isinstance(volume, str) else volume.get('target')] = {}
+            else:
+                binds.append(bind)
+
+        declared_networks = blueprint.get('networks') or {}
+        networks = [self._network_name(name, declared_networks) for name in _service_networks(service)]
+
+        host_config = {
+            'PortBindings': port_bindings,
+            'Binds': binds,
+            'RestartPolicy': _restart_policy(service.get('restart')),
+            'NetworkMode': networks[0],
+            'Privileged': bool(service.get('privileged', False)),
+        }
+        if service.get('logging'):
+            host_config['LogConfig'] = {'Type': service['logging'].get('driver', 'json-file'),
+                                        'Config': {key: str(value) for key, value in
+                                                   (service['logging'].get('options') or {}).items()}}
+
+        config = {
+            'Image': image_id or service.get('image'),
+            'Env': [f"{key}={value}" if value is not None else key
+                    for key, value in _key_value_mapping(service.get('environment')).items()],
+            'Labels': labels,
+            'ExposedPorts': exposed_ports,
+            'Volumes': anonymous_volumes,
+            'Tty': bool(service.get('tty', False)),
+            'OpenStdin': bool(service.get('stdin_open', False)),
+            'HostConfig': host_config,
+            'NetworkingConfig': {'EndpointsConfig': {networks[0]: {'Aliases': [service_name]}}},
+            '_networks': networks,
+        }
+        for key, target in (('command', 'Cmd'), ('entrypoint', 'Entrypoint')):
+            value = service.get(key)
+            if value is not None:
+                config[target] = shlex.split(value) if isinstance(value, str) else list(value)
+        for key, target in (('working_dir', 'WorkingDir'), ('user', 'User'), ('hostname', 'Hostname')):
+            if service.get(key):
+                config[target] = str(service[key])
+        if service.get('healthcheck'):
+            config['Healthcheck'] = _healthcheck(service['healthcheck'])
+        return config
+
+    # (내부 함수) 볼륨 한 줄을 Binds 항목으로 바꿉니다. 익명 볼륨이면 None.
+    def _parse_volume(self, volume, blueprint: dict):
+        if isinstance(volume, Mapping):
+            source, target = volume.get('source'), volume.get('target')
+            mode = 'ro' if volume.get('read_only') else None
+        else:
+            parts = volume.split(':')
+            if len(parts) == 1:
+                return None
+            source, target = parts[0], parts[1]
+            mode = parts[2] if len(parts) > 2 else None
+        if not source:
+            return None
+
+        if source.startswith(('.', '/', '~')):
+            source = os.path.normpath(os.path.join(self.project_dir, os.path.expanduser(source)))
+        else:
+            options = (blueprint.get('volumes') or {}).get(source) or {}
+            source = options.get('name') or (source if options.get('external') else f"{self.project_name}_{source}")
+        return f"{source}:{target}" + (f":{mode}" if mode else '')
+
+    def _network_name(self, network: str, declared: dict) -> str:
+        options = declared.get(network) or {}
+        if options.get('name'):
+            return options['name']
+        if options.get('external'):
+            return network
+        return f"{self.project_name}_{network}"
+
+# --- compose 형식 해석 도우미 ---
+
+# docker-compose와 같은 규칙으로 프로젝트 이름을 정합니다.
+# (지정한 이름 → COMPOSE_PROJECT_NAME → compose 파일이 있는 디렉토리 이름, 소문자/영숫자/_/- 만 사용)
+def compose_project_name(compose_file_path: str, project_name: str = None) -> str:
+    name = project_name or os.environ.get('COMPOSE_PROJECT_NAME') or \
+        os.path.basename(os.path.dirname(os.path.abspath(compose_file_path)))
+    return re.sub(r'[^a-z0-9_-]', '', name.lower()) or 'default'
+
+def _container_name(container: dict) -> str:
+    names = container.get('Names') or [container.get('Id', '')[:12]]
+    return names[0].lstrip('/')
+
+def _dependencies(service: dict) -> list:
+    depends_on = service.get('depends_on') or []
+    return list(depends_on.keys()) if isinstance(depends_on, Mapping) else list(depends_on)
+
+def _service_networks(service: dict) -> list:
+    networks = service.get('networks')
+    if not networks:
+        return ['default']
+    return list(networks.keys()) if isinstance(networks, Mapping) else list(networks)
+
+# environment / labels 는 리스트('KEY=VALUE')와 딕셔너리 형식을 모두 허용합니다.
+def _key_value_mapping(value) -> dict:
+    if not value:
+        return {}
+    if isinstance(value, Mapping):
+        return {str(key): (None if item is None else str(item)) for key, item in value.items()}
+    mapping = {}
+    for item in value:
+        key, sep, item_value = str(item).partition('=')
+        mapping[key] = item_value if sep else None
+    return mapping
+
+# 포트 한 줄을 [(컨테이너 포트/프로토콜, 호스트 바인딩 또는 None)] 목록으로 바꿉니다.
+#   '8080:80', '127.0.0.1:8080:80', '80', '24224:24224/udp', '8000-8001:80-81', {'target': 80, 'published': 8080}
+def _parse_port(port) -> list:
+    if isinstance(port, Mapping):
+        container_port = f"{port['target']}/{port.get('protocol', 'tcp')}"
+        published = port.get('published')
+        return [(container_port, {'HostIp': port.get('host_ip', ''), 'HostPort': str(published)} if published else None)]
+
+    spec, _, protocol = str(port).partition('/')
+    protocol = protocol or 'tcp'
+    parts = spec.rsplit(':', 2)
+    container_range = parts[-1]
+    host_range = parts[-2] if len(parts) >= 2 else None
+    host_ip = parts[0] if len(parts) == 3 else ''
+
+    container_ports = _expand_port_range(container_range)
+    host_ports = _expand_port_range(host_range) if host_range else [None] * len(container_ports)
+    if len(host_ports) == 1 and len(container_ports) > 1:
+        host_ports = host_ports * len(container_ports)
+    if len(host_ports) != len(container_ports):
+        raise DockerEngineError(400, f"Invalid port mapping '{port}'")
+
+    return [(f"{container_port}/{protocol}",
+             {'HostIp': host_ip, 'HostPort': str(host_port)} if host_port is not None else None)
+            for container_port, host_port in zip(container_ports, host_ports)]
+
+def _expand_port_range(value: str) -> list:
+    start, _, end = value.partition('-')
+    return list(range(int(start), int(end) + 1)) if end else [int(start)]
+
+def _restart_policy(value) -> dict:
+    if not value or value == 'no':
+        return {'Name': ''}
+    name, _, retries = str(value).partition(':')
+    policy = {'Name': name}
+    if retries:
+        policy['MaximumRetryCount'] = int(retries)
+    return policy
+
+def _healthcheck(healthcheck: dict) -> dict:
+    if healthcheck.get('disable'):
+        return {'Test': ['NONE']}
+    test = healthcheck.get('test')
+    if isinstance(test, str):
+        test = ['CMD-SHELL', test]
+    result = {'Test': list(test or [])}
+    for key, target in (('interval', 'Interval'), ('timeout', 'Timeout'), ('start_period', 'StartPeriod')):
+        if healthcheck.get(key):
+            result[target] = _duration_ns(healthcheck[key])
+    if healthcheck.get('retries') is not None:
+        result['Retries'] = int(healthcheck['retries'])
+    return result
+
+# compose 기간 표기('1m30s', '500ms', '10s', 숫자=초)를 나노초로 바꿉니다.
+def _duration_ns(value) -> int:
+    if isinstance(value, (int, float)):
+        return int(value * 1_000_000_000)
+    units = {'h': 3600, 'm': 60, 's': 1, 'ms': 1e-3, 'us': 1e-6, 'ns': 1e-9}
+    total = 0.0
+    for amount, unit in re.findall(r'(\d+(?:\.\d+)?)(ms|us|ns|h|m|s)', str(value)):
+        total += float(amount) * units[unit]
+    return int(total * 1_000_000_000)
+
+def _split_image_reference(image: str):
+    if '@' in image:
+        return image, None
+    name, sep, tag = image.rpartition(':')
+    if not sep or '/' in tag:
+        return image, 'latest'
+    return name, tag
+
+# 빌드 컨텍스트 디렉토리를 메모리의 tar로 묶습니다. .dockerignore의 단순한 패턴(경로 glob, '**/이름' 형식)은 제외합니다.
+def _tar_build_context(context_dir: str) -> bytes:
+    patterns = []
+    ignore_file = os.path.join(context_dir, '.dockerignore')
+    if os.path.isfile(ignore_file):
+        with open(ignore_file, 'r', encoding='utf-8') as f:
+            patterns = [line.strip().strip('/') for line in f if line.strip() and not line.startswith('#')]
+
+    def ignored(relative_path: str) -> bool:
+        for pattern in patterns:
+            if pattern.startswith('**/'):
+                if fnmatch.fnmatchcase(os.path.basename(relative_path), pattern[3:]):
+                    return True
+            elif fnmatch.fnmatchcase(relative_path, os.path.normpath(pattern)):
+                return True
+        return False
+
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode='w') as tar:
+        for root, dirs, files in os.walk(context_dir):
+            relative_root = os.path.relpath(root, context_dir)
+            dirs[:] = sorted(d for d in dirs if not ignored(os.path.normpath(os.path.join(relative_root, d))))
+            for file_name in sorted(files):
+                relative_path = os.path.normpath(os.path.join(relative_root, file_name))
+                if ignored(relative_path):
+                    continue
+                tar.add(os.path.join(root, file_name), arcname=relative_path, recursive=False)
+    return buffer.getvalue()
+
+
+if __name__ == '__main__':
+    import sys
+
+    # python Docker_Engine_Backend.py <compose 파일> [up|down|status] [--socket=<경로>]
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    socket_args = [arg.split('=', 1)[1] for arg in sys.argv[1:] if arg.startswith('--socket=')]
+    if not args:
+        print("Usage: python Docker_Engine_Backend.py <compose-file> [up|down|status] [--socket=<path>]")
+        sys.exit(1)
+
+    backend = DockerEngineBackend(args[0], socket_path=socket_args[0] if socket_args else None)
+    action = args[1] if len(args) > 1 else 'status'
+    if action == 'up':
+        ok = backend.up(build=True)
+    elif action == 'down':
+        ok = backend.down()
+    else:
+        ok = backend.status() is not None
+    sys.exit(0 if ok else 1)
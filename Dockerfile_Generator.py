@@ -1,10 +1,34 @@
 import os
-import shutil # 파일/디렉토리 복사를 위해 shutil 라이브러리를 임포트
+import re
+import hashlib
 from pathlib import Path
+from Fake_App_Sync import FakeAppSynchronizer, DOCKERIGNORE_PATTERNS # 바뀐 파일만 복사하는 가짜 앱 동기화기
+from Metrics import metrics
+
+IMAGE_REPOSITORY = 'honeybot' # 내용 해시 태그 이미지의 저장소 이름 (honeybot/<서비스>:<해시 12자리>)
+
+# 서비스 이름과 내용 해시로 이미지 태그를 만듭니다. (도커 저장소 이름 규칙에 맞게 정리)
+def content_image_tag(service_name: str, content_hash: str) -> str:
+    name = re.sub(r'[^a-z0-9._-]', '-', str(service_name).lower()).strip('._-') or 'service'
+    return f"{IMAGE_REPOSITORY}/{name}:{content_hash[:12]}"
+
+# 이미지 이름이 내용 해시 태그인지 확인합니다. (같은 태그가 로컬에 있으면 빌드를 건너뛸 수 있음)
+def is_content_image(image) -> bool:
+    return isinstance(image, str) and image.startswith(f"{IMAGE_REPOSITORY}/") and ':' in image
 
 # 정책에 따라 허니팟용 Dockerfile을 동적으로 생성합니다.
+# 빌드 캐시가 잘 맞도록 자주 바뀌지 않는 것부터(기반 이미지 → 의존성 설치 → 가짜 앱) 층을 쌓고,
+# BuildKit의 pip 캐시 마운트를 사용합니다.
 class DockerfileGenerator:
 
+    # :param link_mode: 가짜 앱 동기화 방식 ('auto', 'hardlink', 'copy'). FakeAppSynchronizer 참고
+    # :param buildkit: True이면 BuildKit 전용 문법(RUN --mount)을 사용합니다.
+    #                  배포 백엔드가 기존 빌더로 빌드하는 경우(Engine API 백엔드)에는 False를 넘겨야 합니다.
+    #                  (Deployer.backend_supports_buildkit 참고)
+    def __init__(self, link_mode: str = 'auto', buildkit: bool = True):
+        self.app_sync = FakeAppSynchronizer(link_mode)
+        self.buildkit = buildkit
+
     # (내부 함수) 원본 Dockerfile에서 특정 지시어(FROM, EXPOSE 등)를 파싱합니다.
     def _get_original_info(self, original_context_path: str, instruction: str):
         try:
@@ -18,6 +42,7 @@ class DockerfileGenerator:
         return None
 
     # 주어진 정책에 따라 Dockerfile.honeypot 파일을 생성합니다.
+    @metrics.staged('dockerfile', context='original_context_path')
     def generate(self, build_policy: dict, original_context_path: str, output_filename: str = "Dockerfile.honeypot"):
         
         print(f"DockerfileGenerator: Generating '{output_filename}' for context '{original_context_path}'...")
@@ -33,55 +58,109 @@ class DockerfileGenerator:
         honeypot_app_in_context = Path(original_context_path) / "_honeypot_app"
 
         try:
-            # 대상 폴더가 이미 있으면 삭제 후 다시 복사
-            if honeypot_app_in_context.exists():
-                shutil.rmtree(honeypot_app_in_context)
-            shutil.copytree(fake_app_source, honeypot_app_in_context)
-            print(f"  - Copied fake app to '{honeypot_app_in_context}'")
+            # 삭제 후 전체 복사 대신, 바뀐 파일만 동기화하여 Docker 빌드 캐시를 유지
+            stats = self.app_sync.sync(fake_app_source, honeypot_app_in_context)
+            metrics.incr('fake_app_files_copied', stats['copied'])
+            print(f"  - Synced fake app to '{honeypot_app_in_context}' "
+                  f"({stats['copied']} copied, {stats['unchanged']} unchanged, {stats['removed']} removed)")
         except Exception as e:
             print(f"❌ DockerfileGenerator: Failed to copy fake app. Error: {e}")
             return None
         # --- 복사 로직 끝 ---
 
         dockerfile_lines = []
-        
+        if self.buildkit:
+            dockerfile_lines.append("# syntax=docker/dockerfile:1")
+
         # 2. 기반 이미지(FROM) 결정
-        # ... (이전 코드와 동일) ...
-        base_image_line = "FROM python:3.9-slim"
+        base_image = "python:3.9-slim"
         if build_policy.get('use_original_base_image'):
             original_from = self._get_original_info(original_context_path, 'FROM')
             if original_from:
-                base_image_line = original_from
-        dockerfile_lines.append(base_image_line)
+                base_image = self._base_image(original_from)
+        dockerfile_lines.append(f"FROM {base_image}")
 
-        # 3. 작업 디렉토리(WORKDIR) 설정
+        # 3. 작업 디렉토리(WORKDIR)와 고정 환경 변수 설정
         dockerfile_lines.append("WORKDIR /app")
+        dockerfile_lines.append("ENV PYTHONDONTWRITEBYTECODE=1 PYTHONUNBUFFERED=1 PIP_DISABLE_PIP_VERSION_CHECK=1")
 
         # 4. 의존성 파일 복사 및 설치
-        dependencies = build_policy.get('copy_dependencies', [])
+        # 정책에 적힌 순서와 관계없이 같은 층이 나오도록 정렬하고, 한 번의 COPY로 복사합니다.
+        dependencies = self._dependencies(build_policy)
         if dependencies:
-            for dep_file in dependencies:
-                dockerfile_lines.append(f"COPY {dep_file} .")
-            dockerfile_lines.append("RUN pip install -r requirements.txt")
+            dockerfile_lines.append(f"COPY {' '.join(dependencies)} ./")
+            requirements = [dep for dep in dependencies if re.fullmatch(r'requirements.*\.txt', Path(dep).name)]
+            if requirements:
+                install = ' '.join(f"-r {Path(dep).name}" for dep in requirements)
+                if self.buildkit:
+                    # pip 다운로드 캐시는 이미지 밖(빌드 캐시)에 두어 requirements가 바뀌어도 다시 받지 않음
+                    dockerfile_lines.append(f"RUN --mount=type=cache,target=/root/.cache/pip pip install {install}")
+                else:
+                    dockerfile_lines.append(f"RUN pip install --no-cache-dir {install}")
+
+        # 5. 가짜 애플리케이션 복사 (가장 자주 바뀌므로 마지막 층)
+        dockerfile_lines.append(f"COPY {honeypot_app_in_context.name}/ ./")
 
-        # --- 5. 가짜 애플리케이션 복사 (단순화된 경로) ---
-        dockerfile_lines.append(f"COPY {honeypot_app_in_context.name} .")
-        # --- 수정 끝 ---
-        
         # 6. 실행 명령어(CMD) 설정
         dockerfile_lines.append('CMD ["python", "app.py"]')
 
-        # 7. 파일 생성
+        # 7. 파일 생성 (인터프리터 캐시가 빌드 컨텍스트로 전송되지 않도록 .dockerignore도 함께 준비)
         try:
+            self._ensure_dockerignore(Path(original_context_path))
             output_path = Path(original_context_path) / output_filename
-            with open(output_path, 'w', encoding='utf-8') as f:
-                f.write("\n".join(dockerfile_lines))
+            content = "\n".join(dockerfile_lines) + "\n"
+            # 내용이 같으면 다시 쓰지 않아 파일의 mtime을 유지
+            if not output_path.exists() or output_path.read_text(encoding='utf-8') != content:
+                with open(output_path, 'w', encoding='utf-8') as f:
+                    f.write(content)
             print(f"[SUCCESS] DockerfileGenerator: Successfully created '{output_path}'")
             return output_path
         except Exception as e:
             print(f"[FAILED] DockerfileGenerator: Failed to create file. Error: {e}")
             return None
 
+    # 생성된 Dockerfile, 빌드 컨텍스트에 동기화된 가짜 앱, 의존성 파일의 내용으로 이미지 내용 해시를 계산합니다.
+    # 해시가 같으면 이미지 내용도 같으므로, 같은 태그의 이미지가 로컬에 있으면 빌드를 건너뛸 수 있습니다.
+    def image_hash(self, build_policy: dict, original_context_path: str, dockerfile_path) -> str:
+        context = Path(original_context_path)
+        digest = hashlib.sha256()
+        digest.update(b"dockerfile\0" + Path(dockerfile_path).read_bytes() + b"\0")
+        digest.update(f"app\0{self.app_sync.tree_hash(context / '_honeypot_app')}\0".encode('utf-8'))
+        for dep_file in self._dependencies(build_policy):
+            digest.update(f"dep\0{dep_file}\0".encode('utf-8'))
+            try:
+                digest.update((context / dep_file).read_bytes())
+            except OSError:
+                pass
+        return digest.hexdigest()
+
+    # (내부 함수) 빌드 컨텍스트의 .dockerignore에 인터프리터 캐시 제외 규칙이 없으면 덧붙입니다. (기존 규칙은 유지)
+    def _ensure_dockerignore(self, context: Path):
+        ignore_file = context / '.dockerignore'
+        try:
+            existing = ignore_file.read_text(encoding='utf-8')
+        except FileNotFoundError:
+            existing = ''
+        lines = {line.strip() for line in existing.splitlines()}
+        missing = [pattern for pattern in DOCKERIGNORE_PATTERNS if pattern not in lines]
+        if not missing:
+            return
+        prefix = '' if not existing or existing.endswith('\n') else '\n'
+        with open(ignore_file, 'a', encoding='utf-8') as f:
+            f.write(prefix + "# Added by DockerfileGenerator: interpreter caches are never part of the honeypot image\n"
+                    + "\n".join(missing) + "\n")
+
+    # (내부 함수) 정책의 의존성 파일 목록을 중복 없이 정렬된 순서로 반환합니다.
+    def _dependencies(self, build_policy: dict) -> list:
+        return sorted(set(build_policy.get('copy_dependencies') or []))
+
+    # (내부 함수) 'FROM [--platform=..] 이미지 [AS 이름]' 줄에서 이미지(와 플랫폼 옵션)만 남깁니다.
+    def _base_image(self, from_line: str) -> str:
+        words = from_line.split()[1:]
+        if len(words) >= 3 and words[-2].upper() == 'AS':
+            words = words[:-2]
+        return ' '.join(words)
+
 if __name__ == '__main__':
     # 테스트를 위한 정책 페이로드 정의 (policy.yml의 action.payload 부분)
     test_policy_payload = {
@@ -0,0 +1,177 @@
+import os
+import json
+import errno
+import shutil
+import hashlib
+from pathlib import Path
+
+try:
+    import fcntl
+    FICLONE = 0x40049409 # Linux ioctl: 파일 내용을 복사 없이 공유(reflink)
+except ImportError: # Windows 등 fcntl이 없는 환경
+    fcntl = None
+
+IGNORED_DIRS = ('__pycache__',)      # 가짜 앱을 로컬에서 실행하면 생기는 인터프리터 캐시
+IGNORED_SUFFIXES = ('.pyc', '.pyo')
+DOCKERIGNORE_PATTERNS = ('**/__pycache__', '**/*.pyc', '**/*.pyo') # 빌드 컨텍스트의 .dockerignore에 넣을 같은 규칙
+
+# 가짜 앱 트리의 상대 경로가 동기화/해시에서 제외되는 파일(인터프리터 캐시)인지 확인합니다.
+# 호스트 인터프리터가 만든 .pyc가 이미지에 들어가거나, 앱을 실행한 것만으로 내용 해시가 바뀌지 않게 합니다.
+def is_ignored(relative_path) -> bool:
+    relative_path = Path(relative_path)
+    return any(part in IGNORED_DIRS for part in relative_path.parts) or relative_path.name.endswith(IGNORED_SUFFIXES)
+
+# (내부 함수) 디렉토리 아래에서 제외 대상이 아닌 파일들을 정렬된 순서로 반환합니다.
+def _tree_files(root: Path) -> list:
+    return sorted(p for p in root.rglob('*') if p.is_file() and not is_ignored(p.relative_to(root)))
+
+# 가짜 앱 디렉토리를 빌드 컨텍스트로 동기화하는 클래스.
+# 매번 삭제 후 전체 복사하는 대신, 파일별 크기/해시 매니페스트를 비교하여
+# 바뀐 파일만 복사하고 나머지 파일의 타임스탬프는 그대로 유지합니다.
+class FakeAppSynchronizer:
+
+    # :param link_mode: 'auto'  - reflink를 시도하고, 불가능하면 일반 복사
+    #                   'hardlink' - reflink → 하드링크 → 일반 복사 순으로 시도
+    #                   'copy'  - 항상 일반 복사
+    # 하드링크는 원본과 대상이 같은 inode를 공유하므로 대상 파일을 직접 수정하면
+    # 원본 가짜 앱도 바뀝니다. 그래서 명시적으로 선택한 경우에만 사용합니다.
+    def __init__(self, link_mode: str = 'auto'):
+        self.link_mode = link_mode
+
+    # source 디렉토리의 내용을 target 디렉토리와 일치시킵니다.
+    # :return: {'copied': n, 'unchanged': n, 'removed': n} 통계
+    def sync(self, source, target) -> dict:
+        source, target = Path(source), Path(target)
+        if not source.is_dir():
+            raise FileNotFoundError(errno.ENOENT, "Fake app directory not found", str(source))
+
+        manifest_path = self._manifest_path(target)
+        manifest = self._load_manifest(manifest_path, source)
+        source_manifest, target_manifest = {}, {}
+        stats = {'copied': 0, 'unchanged': 0, 'removed': 0}
+
+        if target.exists() and not target.is_dir():
+            target.unlink()
+        target.mkdir(parents=True, exist_ok=True)
+
+        for source_file in _tree_files(source):
+            relative = source_file.relative_to(source).as_posix()
+            target_file = target / relative
+
+            source_stat = source_file.stat()
+            source_hash = self._cached_hash(source_file, source_stat, manifest['source'].get(relative))
+            source_manifest[relative] = [source_stat.st_size, source_stat.st_mtime_ns, source_hash]
+
+            target_stat = self._stat(target_file)
+            if target_stat is not None and target_stat.st_size == source_stat.st_size:
+                target_hash = self._cached_hash(target_file, target_stat, manifest['target'].get(relative))
+                if target_hash == source_hash:
+                    target_manifest[relative] = [target_stat.st_size, target_stat.st_mtime_ns, target_hash]
+                    stats['unchanged'] += 1
+                    continue
+
+            self._place(source_file, target_file)
+            target_stat = target_file.stat()
+            target_manifest[relative] = [target_stat.st_size, target_stat.st_mtime_ns, source_hash]
+            stats['copied'] += 1
+
+        # 원본에서 사라진 파일(제외 대상인 인터프리터 캐시 포함)과 빈 디렉토리 정리
+        for target_file in sorted(target.rglob('*'), reverse=True):
+            relative = target_file.relative_to(target).as_posix()
+            if target_file.is_dir() and not target_file.is_symlink():
+                if not any(target_file.iterdir()):
+                    target_file.rmdir()
+            elif relative not in target_manifest:
+                target_file.unlink()
+                stats['removed'] += 1
+
+        self._save_manifest(manifest_path, source, source_manifest, target_manifest)
+        return stats
+
+    # 동기화된 대상 디렉토리 전체의 내용 해시(상대 경로 + 파일 해시)를 반환합니다.
+    # 매니페스트에 기록된 파일 해시를 재사용하므로, 크기/mtime이 같은 파일은 다시 읽지 않습니다.
+    def tree_hash(self, target) -> str:
+        target = Path(target)
+        entries = {}
+        try:
+            with open(self._manifest_path(target), 'r', encoding='utf-8') as f:
+                entries = json.load(f).get('target', {})
+        except (OSError, ValueError):
+            pass
+
+        digest = hashlib.sha256()
+        for target_file in _tree_files(target):
+            relative = target_file.relative_to(target).as_posix()
+            file_hash = self._cached_hash(target_file, target_file.stat(), entries.get(relative))
+            digest.update(f"{relative}\0{file_hash}\0".encode('utf-8'))
+        return digest.hexdigest()
+
+    # (내부 함수) 매니페스트는 COPY 대상 디렉토리 밖(옆)에 두어 이미지에 포함되지 않게 합니다.
+    def _manifest_path(self, target: Path) -> Path:
+        return target.parent / f".{target.name}.manifest.json"
+
+    def _load_manifest(self, manifest_path: Path, source: Path) -> dict:
+        empty = {'source': {}, 'target': {}}
+        try:
+            with open(manifest_path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return empty
+        # 다른 가짜 앱에서 동기화된 매니페스트의 원본 항목은 신뢰하지 않음
+        if manifest.get('source_root') != str(source.resolve()):
+            manifest['source'] = {}
+        return {'source': manifest.get('source', {}), 'target': manifest.get('target', {})}
+
+    def _save_manifest(self, manifest_path: Path, source: Path, source_manifest: dict, target_manifest: dict):
+        manifest = {'source_root': str(source.resolve()), 'source': source_manifest, 'target': target_manifest}
+        tmp_path = manifest_path.with_name(manifest_path.name + '.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f)
+        os.replace(tmp_path, manifest_path)
+
+    # (내부 함수) 크기와 mtime이 매니페스트와 같으면 기록된 해시를 재사용하고, 아니면 새로 계산합니다.
+    def _cached_hash(self, path: Path, stat_result, entry) -> str:
+        if entry and entry[0] == stat_result.st_size and entry[1] == stat_result.st_mtime_ns:
+            return entry[2]
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def _stat(self, path: Path):
+        try:
+            return path.stat()
+        except FileNotFoundError:
+            return None
+
+    # (내부 함수) 파일 시스템이 허용하면 reflink/하드링크를, 아니면 일반 복사를 사용합니다.
+    def _place(self, source_file: Path, target_file: Path):
+        target_file.parent.mkdir(parents=True, exist_ok=True)
+        if target_file.is_dir() and not target_file.is_symlink():
+            shutil.rmtree(target_file)
+        elif target_file.exists() or target_file.is_symlink():
+            target_file.unlink()
+
+        if self.link_mode != 'copy' and self._try_reflink(source_file, target_file):
+            return
+        if self.link_mode == 'hardlink':
+            try:
+                os.link(source_file, target_file)
+                return
+            except OSError:
+                pass
+        shutil.copy2(source_file, target_file)
+
+    def _try_reflink(self, source_file: Path, target_file: Path) -> bool:
+        if fcntl is None:
+            return False
+        try:
+            with open(source_file, 'rb') as src, open(target_file, 'wb') as dst:
+                fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+        except OSError:
+            if target_file.exists():
+                target_file.unlink()
+            return False
+        shutil.copystat(source_file, target_file)
+        return True
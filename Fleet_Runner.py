@@ -0,0 +1,250 @@
+import io
+import os
+import sys
+import json
+import time
+import hashlib
+import traceback
+import contextlib
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import Yaml_Backend
+from Policy_Engine import PolicyEngine
+from Metrics import metrics
+from main import run_pipeline_generation
+
+# 여러 애플리케이션 스택(프로젝트)의 허니팟 청사진을 한 번에 생성하는 fleet 모드.
+# 프로젝트마다 원본 IaC, 정책, 출력 경로를 따로 두고, parse → tag → generate → render 파이프라인을
+# 작업자 프로세스 풀에서 병렬로 실행한 뒤 성공/실패와 단계별 시간을 모아 보고합니다.
+#
+# 프로젝트 목록은 매니페스트 파일(YAML/JSON)이나 디렉토리로 지정합니다.
+#   projects:
+#     - name: shop                     # 생략하면 작업 디렉토리 이름
+#       source: stacks/shop/docker-compose.yml
+#       policy: policy.yml             # 생략하면 --policy 값 (기본값: 매니페스트 옆의 policy.yml)
+#       output: stacks/shop/deception-compose.yml   # 생략하면 원본 옆의 deception-compose.yml
+#       workdir: stacks/shop           # 생략하면 원본 IaC가 있는 디렉토리
+# 매니페스트의 상대 경로는 매니페스트 파일 위치를 기준으로 합니다.
+# 디렉토리를 넘기면 바로 아래의 하위 디렉토리 중 docker-compose.yml(또는 compose.yml)이 있는 것을 프로젝트로 봅니다.
+# (하위 디렉토리에 policy.yml이 있으면 그 정책을, 없으면 --policy 값을 사용)
+#
+# 각 프로젝트는 작업 디렉토리로 이동한 뒤 실행되므로, 빌드 컨텍스트나 정책의 fake_app_path 같은 상대 경로는
+# 그 프로젝트 디렉토리에서 main.py를 실행했을 때와 똑같이 해석됩니다.
+#
+# 같은 내용의 정책 파일은 한 번만 컴파일합니다. 풀을 만들기 전에 부모 프로세스에서 미리 컴파일해 두면
+# fork된 작업자들이 그대로 물려받고, fork를 쓸 수 없는 환경에서는 작업자마다 처음 사용할 때 한 번 컴파일합니다.
+
+COMPOSE_FILE_NAMES = ('docker-compose.yml', 'docker-compose.yaml', 'compose.yml', 'compose.yaml')
+REPORT_STAGES = ('policy_load', 'parse', 'tag', 'generate', 'dockerfile', 'render')
+
+_policy_engines = {} # 정책 파일 내용 해시 -> 컴파일된 PolicyEngine (프로세스마다 하나)
+
+# 매니페스트 파일이나 디렉토리에서 프로젝트 목록을 읽습니다.
+# :return: [{'name', 'source', 'policy', 'output', 'workdir'}, ...] (모두 절대 경로)
+def load_projects(target: str, default_policy: str = None) -> list:
+    target = os.path.abspath(target)
+    base_dir = target if os.path.isdir(target) else os.path.dirname(target)
+    default_policy = os.path.abspath(default_policy) if default_policy else os.path.join(base_dir, 'policy.yml')
+
+    if os.path.isdir(target):
+        entries = []
+        for name in sorted(os.listdir(target)):
+            project_dir = os.path.join(target, name)
+            source = next((os.path.join(project_dir, file_name) for file_name in COMPOSE_FILE_NAMES
+                           if os.path.isfile(os.path.join(project_dir, file_name))), None)
+            if source:
+                # 프로젝트 디렉토리에 자체 policy.yml이 있으면 그것을 사용
+                policy = os.path.join(project_dir, 'policy.yml')
+                entries.append({'name': name, 'source': source,
+                                'policy': policy if os.path.isfile(policy) else None})
+    else:
+        manifest = Yaml_Backend.load_file(target, use_cache=False) or {}
+        entries = manifest.get('projects', []) if isinstance(manifest, dict) else manifest
+
+    projects, names = [], set()
+    for entry in entries:
+        if 'source' not in entry:
+            print(f"⚠️ Warning: Skipping project without 'source': {entry}")
+            continue
+        source = os.path.join(base_dir, entry['source'])
+        workdir = os.path.join(base_dir, entry['workdir']) if entry.get('workdir') else os.path.dirname(source)
+        project = {
+            'name': str(entry.get('name') or os.path.basename(workdir)),
+            'source': os.path.abspath(source),
+            'policy': os.path.abspath(os.path.join(base_dir, entry['policy'])) if entry.get('policy') else default_policy,
+            'output': os.path.abspath(os.path.join(base_dir, entry['output']) if entry.get('output')
+                                      else os.path.join(os.path.dirname(source), 'deception-compose.yml')),
+            'workdir': os.path.abspath(workdir),
+        }
+        if project['name'] in names:
+            project['name'] = f"{project['name']}#{len(projects)}"
+        names.add(project['name'])
+        projects.append(project)
+    return projects
+
+# 정책 파일의 내용 해시. 읽을 수 없으면 경로를 대신 사용합니다. (PolicyEngine이 오류를 보고하도록)
+def policy_hash(policy_path: str) -> str:
+    try:
+        with open(policy_path, 'rb') as f:
+            return hashlib.sha256(f.read()).hexdigest()
+    except OSError:
+        return 'missing:' + policy_path
+
+# 컴파일된 정책 엔진을 반환합니다. 같은 내용의 정책은 이 프로세스에서 한 번만 컴파일합니다.
+# 정책 안의 상대 경로는 프로젝트 작업 디렉토리 기준으로 쓰이므로 내용이 같으면 그대로 공유할 수 있습니다.
+def get_policy_engine(policy_path: str) -> PolicyEngine:
+    key = policy_hash(policy_path)
+    engine = _policy_engines.get(key)
+    if engine is None:
+        engine = PolicyEngine(policy_path)
+        _policy_engines[key] = engine
+    return engine
+
+# (작업자 프로세스) 프로젝트 하나의 파이프라인을 실행하고 결과를 반환합니다.
+def run_project(project: dict, use_cache: bool = True) -> dict:
+    result = {'name': project['name'], 'output': project['output'], 'ok': False, 'error': None,
+              'pid': os.getpid(), 'stages': {}}
+    before = metrics.snapshot()
+    log = io.StringIO()
+    started = time.perf_counter()
+    previous_dir = os.getcwd()
+    try:
+        with contextlib.redirect_stdout(log):
+            os.chdir(project['workdir'])
+            policy_compiled = policy_hash(project['policy']) not in _policy_engines
+            engine = get_policy_engine(project['policy'])
+            result['policy_compiled'] = policy_compiled
+            output = run_pipeline_generation(project['source'], project['policy'], project['output'],
+                                             policy_engine=engine, use_cache=use_cache)
+        result['ok'] = output is not None
+        if not result['ok']:
+            result['error'] = 'pipeline returned no output (see log)'
+    except Exception as e:
+        result['error'] = f"{type(e).__name__}: {e}"
+        log.write(traceback.format_exc())
+    finally:
+        os.chdir(previous_dir)
+
+    result['seconds'] = time.perf_counter() - started
+    # 이 프로세스의 누적 지표에서 이번 실행분만 골라냄
+    after = metrics.snapshot()
+    for name, entry in after['stages'].items():
+        seconds = entry['total_seconds'] - before['stages'].get(name, {}).get('total_seconds', 0.0)
+        if seconds > 0:
+            result['stages'][name] = seconds
+    cache_hits = after['counters'].get('blueprint_cache_hits', 0) - before['counters'].get('blueprint_cache_hits', 0)
+    result['cached'] = cache_hits > 0
+    result['log'] = log.getvalue()
+    return result
+
+# 모든 프로젝트의 파이프라인을 병렬로 실행합니다.
+# :param workers: 작업자 프로세스 수 (기본값: CPU 수). 1이면 현재 프로세스에서 차례로 실행
+# :return: 집계 보고서 (dict)
+def run_fleet(projects: list, workers: int = None, use_cache: bool = True, verbose: bool = False) -> dict:
+    workers = max(1, min(workers or os.cpu_count() or 1, len(projects) or 1))
+    started = time.perf_counter()
+
+    # 여러 프로젝트가 함께 쓰는 정책은 fork 전에 미리 컴파일하여 작업자들이 물려받도록 함
+    use_fork = workers > 1 and 'fork' in multiprocessing.get_all_start_methods()
+    policy_users = {}
+    for project in projects:
+        policy_users.setdefault(policy_hash(project['policy']), []).append(project['policy'])
+    if use_fork:
+        with contextlib.redirect_stdout(io.StringIO()):
+            for paths in policy_users.values():
+                if len(paths) > 1:
+                    get_policy_engine(paths[0])
+        metrics.flush() # 작업자들이 부모의 미기록 이벤트를 물려받아 중복 기록하지 않도록
+
+    print(f"Fleet: generating blueprints for {len(projects)} projects with {workers} worker(s), "
+          f"{len(policy_users)} distinct policies...")
+    results = []
+
+    def collect(result: dict):
+        results.append(result)
+        status = '[SUCCESS]' if result['ok'] else '[ERROR]'
+        print(f"  {status} {result['name']} ({result['seconds']:.2f}s{', cached' if result.get('cached') else ''})"
+              + (f" - {result['error']}" if result['error'] else ''))
+        if verbose or not result['ok']:
+            lines = result['log'].rstrip().splitlines()
+            for line in (lines if verbose else lines[-15:]):
+                print(f"      | {line}")
+
+    if workers == 1:
+        for project in projects:
+            collect(run_project(project, use_cache))
+    else:
+        context = multiprocessing.get_context('fork' if use_fork else None)
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor:
+            futures = {executor.submit(run_project, project, use_cache): project for project in projects}
+            for future in as_completed(futures):
+                try:
+                    collect(future.result())
+                except Exception as e: # 작업자 프로세스가 죽은 경우 등
+                    project = futures[future]
+                    collect({'name': project['name'], 'output': project['output'], 'ok': False,
+                             'error': f"{type(e).__name__}: {e}", 'seconds': 0.0, 'stages': {}, 'log': ''})
+
+    order = {project['name']: index for index, project in enumerate(projects)}
+    results.sort(key=lambda result: order.get(result['name'], 0))
+    wall_seconds = time.perf_counter() - started
+    busy_seconds = sum(result['seconds'] for result in results)
+    stage_totals = {}
+    for result in results:
+        for name, seconds in result['stages'].items():
+            stage_totals[name] = stage_totals.get(name, 0.0) + seconds
+    return {
+        'projects': len(results),
+        'succeeded': sum(1 for result in results if result['ok']),
+        'failed': sum(1 for result in results if not result['ok']),
+        'cached': sum(1 for result in results if result.get('cached')),
+        'workers': workers,
+        'distinct_policies': len(policy_users),
+        'policy_compilations': sum(1 for result in results if result.get('policy_compiled')),
+        'wall_seconds': round(wall_seconds, 3),
+        'busy_seconds': round(busy_seconds, 3),
+        'parallel_speedup': round(busy_seconds / wall_seconds, 2) if wall_seconds else None,
+        'stage_seconds': {name: round(seconds, 3) for name, seconds in sorted(stage_totals.items())},
+        'results': [{key: value for key, value in result.items() if key != 'log'} for result in results],
+    }
+
+# 집계 보고서를 표 형태로 출력합니다.
+def print_report(report: dict):
+    print("\n======= Fleet Report =======")
+    print(f"{'PROJECT':<28} {'STATUS':<8} {'TOTAL':>8} " + ' '.join(f"{stage[:10]:>10}" for stage in REPORT_STAGES))
+    for result in report['results']:
+        status = 'cached' if result.get('cached') else ('ok' if result['ok'] else 'FAILED')
+        stages = ' '.join(f"{result['stages'].get(stage, 0.0):>10.3f}" for stage in REPORT_STAGES)
+        print(f"{result['name'][:28]:<28} {status:<8} {result['seconds']:>8.3f} {stages}")
+    print(f"\nProjects: {report['projects']}  succeeded: {report['succeeded']}  failed: {report['failed']}  "
+          f"cached: {report['cached']}")
+    print(f"Wall time: {report['wall_seconds']:.2f}s  worker time: {report['busy_seconds']:.2f}s  "
+          f"speedup: x{report['parallel_speedup']}  workers: {report['workers']}")
+    print(f"Policies: {report['distinct_policies']} distinct, compiled {report['policy_compilations']} time(s) in workers")
+
+
+# --- fleet 명령 ---
+# python Fleet_Runner.py <매니페스트 파일 | 프로젝트 디렉토리> [--workers=N] [--policy=<기본 정책>]
+#                        [--no-cache] [--report=<json 경로>] [--verbose]
+if __name__ == '__main__':
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    options = dict(arg[2:].split('=', 1) if '=' in arg else (arg[2:], '') for arg in sys.argv[1:] if arg.startswith('--'))
+    if not args:
+        print("Usage: python Fleet_Runner.py <manifest.yml | projects dir> [--workers=N] [--policy=policy.yml] "
+              "[--no-cache] [--report=fleet-report.json] [--verbose]")
+        sys.exit(1)
+
+    projects = load_projects(args[0], options.get('policy'))
+    if not projects:
+        print(f"❌ No projects found in '{args[0]}'.")
+        sys.exit(1)
+
+    report = run_fleet(projects, workers=int(options['workers']) if options.get('workers') else None,
+                       use_cache='no-cache' not in options, verbose='verbose' in options)
+    print_report(report)
+    if options.get('report'):
+        with open(options['report'], 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"Report saved to '{options['report']}'.")
+    sys.exit(0 if report['failed'] == 0 else 1)
@@ -1,22 +1,27 @@
 # iac_parser.py
 import yaml
 import pprint # 딕셔너리를 예쁘게 출력하기 위해 사용
+import Yaml_Backend # libyaml 로더와 mtime 기반 파싱 캐시
+from Metrics import metrics # 단계별 시간/메모리 계측
 
 class IaCParser:
     # IaC 파일을 파싱하여 Python 객체로 변환하는 클래스.
-    def parse(self, file_path: str) -> dict:
+    @metrics.staged('parse', file='file_path')
+    def parse(self, file_path: str, use_cache: bool = True) -> dict:
 
         # 지정된 경로의 YAML 파일을 읽고 파싱하여 딕셔너리로 반환합니다.
+        # 파일 경로/수정 시각/크기가 같으면 이전 파싱 결과를 재사용하므로,
+        # 반환된 딕셔너리는 읽기 전용으로 다뤄야 합니다.
 
         # :param file_path: docker-compose.yml 파일의 경로
+        # :param use_cache: False이면 캐시를 거치지 않고 항상 새로 파싱
         # :return: 파싱된 데이터를 담은 딕셔너리
 
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                # yaml.safe_load()를 사용하여 안전하게 YAML 파일을 로드합니다.
-                data = yaml.safe_load(f)
-                print(f"Successfully parsed: \n'{file_path}'\n")
-                return data
+            # libyaml이 있으면 C 기반 SafeLoader로 안전하게 YAML 파일을 로드합니다.
+            data = Yaml_Backend.load_file(file_path, use_cache)
+            print(f"Successfully parsed: \n'{file_path}'\n")
+            return data
         except FileNotFoundError:
             print(f"ERROR: The file '{file_path}' was not found.")
             return None
@@ -24,6 +29,7 @@ class IaCParser:
             print(f"ERROR: Failed to parse YAML file '{file_path}'.\n{e}")
             return None
 
+
 if __name__ == "__main__":
 
     # 1. 파싱할 파일 경로 지정
@@ -1,8 +1,11 @@
-import yaml
 import pprint
+import Yaml_Backend
+from Blueprint_Overlay import materialize
+from Metrics import metrics
 
 class IaCRenderer:
     # Python 딕셔너리 형태의 청사진을 실제 YAML 파일로 변환(렌더링)합니다.
+    @metrics.staged('render', file='output_path')
     def render(self, blueprint: dict, output_path: str):
         
         # 주어진 청사진 딕셔너리를 지정된 경로에 YAML 파일로 저장합니다.
@@ -12,9 +15,10 @@ class IaCRenderer:
         print(f"Rendering final blueprint to '{output_path}'...")
         try:
             with open(output_path, 'w', encoding='utf-8') as f:
-                # yaml.dump를 사용하여 딕셔너리를 YAML 형식으로 파일에 씁니다.
-                yaml.dump (
-                    blueprint, 
+                # libyaml이 있으면 C 기반 SafeDumper로 딕셔너리를 YAML 형식으로 파일에 씁니다.
+                # 오버레이로 기록된 변경 사항은 이 시점에 한 번만 실제 딕셔너리로 변환됩니다.
+                Yaml_Backend.safe_dump (
+                    materialize(blueprint), 
                     f, 
                     sort_keys=False,        # 키를 알파벳순으로 정렬하지 않아 'version'이 위로 오게 함
                     indent=2,               # 가독성을 위해 들여쓰기 2칸 적용
@@ -1,42 +1,125 @@
-import yaml
+import os
 import pprint
+import itertools
+import Yaml_Backend
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
+YAML_SUFFIXES = ('.yaml', '.yml')
+PARALLEL_FILE_THRESHOLD = 16 # 파일 수가 이보다 적으면 프로세스 풀을 띄우지 않고 순차 처리 (풀 시작 비용이 더 큼)
+
+# (작업자 프로세스 함수) 하나의 Manifest 파일에 들어 있는 모든 리소스를 파싱합니다.
+# 프로세스 풀에서 피클링될 수 있도록 모듈 최상위 함수로 정의합니다.
+def _load_manifest_file(file_path: str) -> list:
+    with open(file_path, 'r', encoding='utf-8') as f:
+        # '---'로 구분된 여러 문서를 모두 로드하고, 빈 문서(예: 파일 끝의 '---')는 걸러냄
+        # libyaml이 있으면 C 로더를, 없으면 순수 파이썬 로더를 사용합니다.
+        return [doc for doc in Yaml_Backend.safe_load_all(f) if doc]
+
+# (작업자 프로세스 함수) 파일 하나를 파싱하되, 실패하면 예외 대신 오류 메시지를 돌려줍니다.
+# 잘못된 파일 하나 때문에 나머지 파일의 리소스 스트림이 중단되지 않도록 합니다.
+# :return: (리소스 리스트, 오류 메시지 또는 None)
+def _load_manifest_file_safe(file_path: str) -> tuple:
+    try:
+        return _load_manifest_file(file_path), None
+    except Exception as e:
+        return [], f"{type(e).__name__}: {e}"
+
 # 지정된 디렉토리에서 쿠버네티스 YAML Manifest 파일들을 파싱하여
 # Python 객체 리스트로 변환하는 클래스.
 class KubernetesParser:
-    
-    def parse(self, directory_path: str) -> list:
-        
+
+    # :param max_workers: 파일 파싱에 사용할 프로세스 수 (None이면 CPU 수, 1이면 현재 프로세스에서 순차 처리)
+    # :param max_files_in_flight: 동시에 파싱 중이거나 결과 대기 중인 파일 수의 상한 (메모리 상한)
+    # :param parallel_threshold: 파일이 이 수 이상일 때만 프로세스 풀을 사용
+    def __init__(self, max_workers: int = None, max_files_in_flight: int = None,
+                 parallel_threshold: int = PARALLEL_FILE_THRESHOLD):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_files_in_flight = max_files_in_flight or self.max_workers * 4
+        self.parallel_threshold = parallel_threshold
+
+    # 디렉토리 안의 .yaml/.yml 파일 경로를 정렬된 순서로 하나씩 생성합니다.
+    # 전체 목록을 메모리에 올리지 않도록 디렉토리 단위로 순회합니다.
+    def iter_manifest_files(self, directory_path: str, recursive: bool = True):
+        if not recursive:
+            path = Path(directory_path)
+            yield from sorted(p for p in path.glob('*') if p.suffix in YAML_SUFFIXES and p.is_file())
+            return
+
+        for root, dirs, files in os.walk(directory_path):
+            dirs.sort()
+            for name in sorted(files):
+                if name.endswith(YAML_SUFFIXES):
+                    yield Path(root) / name
+
+    # 디렉토리의 Manifest들을 파싱하면서 리소스를 하나씩 생성(yield)합니다.
+    # 파일이 parallel_threshold개 이상이면 프로세스 풀에서 병렬로 파싱되지만, 결과는 파일 순서대로 나옵니다.
+    # 메모리 사용량은 전체 클러스터 크기가 아니라 max_files_in_flight개의 파일에 비례합니다.
+    # 파싱에 실패한 파일은 경고를 출력하고 건너뜁니다.
+    # :param on_file: 파일 하나의 파싱이 끝날 때마다 (파일 경로, 리소스 수)로 호출되는 콜백
+    def iter_resources(self, directory_path: str, recursive: bool = True, on_file=None):
+        files = self.iter_manifest_files(directory_path, recursive)
+        # 임계값만큼만 미리 읽어 보고, 그보다 적으면 순차 처리
+        head = list(itertools.islice(files, self.parallel_threshold))
+
+        if self.max_workers <= 1 or len(head) < self.parallel_threshold:
+            for file_path in itertools.chain(head, files):
+                yield from self._report(file_path, _load_manifest_file_safe(str(file_path)), on_file)
+            return
+
+        with ProcessPoolExecutor(max_workers=self.max_workers) as executor:
+            in_flight = deque()
+            for file_path in itertools.chain(head, files):
+                in_flight.append((file_path, executor.submit(_load_manifest_file_safe, str(file_path))))
+                if len(in_flight) >= self.max_files_in_flight:
+                    yield from self._drain_one(in_flight, on_file)
+            while in_flight:
+                yield from self._drain_one(in_flight, on_file)
+
+    # (내부 함수) 가장 먼저 제출된 파일의 결과를 기다렸다가 리소스들을 내보냅니다.
+    def _drain_one(self, in_flight: deque, on_file):
+        file_path, future = in_flight.popleft()
+        yield from self._report(file_path, future.result(), on_file)
+
+    # (내부 함수) 파일 하나의 파싱 결과를 보고하고 리소스들을 내보냅니다. 실패한 파일은 경고 후 건너뜀
+    def _report(self, file_path, result: tuple, on_file):
+        resources, error = result
+        if error:
+            print(f"⚠️ Warning: Skipping '{file_path}': failed to parse manifest ({error})")
+        if on_file:
+            on_file(file_path, len(resources))
+        yield from resources
+
+    # Manifest 파일 하나에 들어 있는 리소스 리스트를 반환합니다. (변경된 파일만 다시 파싱할 때 사용)
+    def parse_file(self, file_path: str) -> list:
+        return _load_manifest_file(str(file_path))
+
+    def parse(self, directory_path: str, recursive: bool = False) -> list:
+
         # 디렉토리 내의 모든 .yaml 또는 .yml 파일을 읽고 파싱하여
         # 리소스 딕셔너리의 리스트로 반환합니다.
+        # 대용량 디렉토리는 리스트 대신 iter_resources()로 스트리밍하세요.
 
         # :param directory_path: 쿠버네티스 Manifest 파일들이 있는 디렉토리 경로
+        # :param recursive: 하위 디렉토리까지 탐색할지 여부
         # :return: 파싱된 리소스들을 담은 딕셔너리의 리스트
-        
+
         print(f"🔍 Parsing Kubernetes manifests in '{directory_path}'...")
-        all_resources = []
-        
-        # 디렉토리 경로를 Path 객체로 변환
-        try:
-            path = Path(directory_path)
+        parsed_files = []
 
-            # .yaml과 .yml 파일을 모두 찾음
-            yaml_files = list(path.glob('*.yaml')) + list(path.glob('*.yml'))
+        def report(file_path, count):
+            parsed_files.append(file_path)
+            if count:
+                print(f"  - Successfully parsed {count} resource(s) from '{file_path.name}'")
 
-            if not yaml_files:
+        try:
+            all_resources = list(self.iter_resources(directory_path, recursive, on_file=report))
+
+            if not parsed_files:
                 print(f"[ERROR]: No YAML files found in '{directory_path}'.")
                 return []
 
-            for file_path in yaml_files:
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    # '---'로 구분된 여러 문서를 모두 로드하기 위해 safe_load_all 사용
-                    # filter(None, ...)는 빈 문서(예: 파일 끝의 '---')를 걸러냄
-                    resources_in_file = list(filter(None, yaml.safe_load_all(f)))
-                    if resources_in_file:
-                        print(f"  - Successfully parsed {len(resources_in_file)} resource(s) from '{file_path.name}'")
-                        all_resources.extend(resources_in_file)
-            
             print(f"✅ Total {len(all_resources)} Kubernetes resources parsed.")
             return all_resources
 
@@ -66,4 +149,8 @@ if __name__ == "__main__":
                 image = first_resource["spec"]["template"]["spec"]["containers"][0]["image"]
                 print(f"Deployment's container image: {image}")
             except (KeyError, IndexError):
-                print("Could not access the image path.")
\ No newline at end of file
+                print("Could not access the image path.")
+
+        print("\n======= Streaming Example (recursive) =======")
+        for resource in parser.iter_resources(k8s_manifest_dir):
+            print(f"  - {resource.get('kind')}/{resource.get('metadata', {}).get('name')}")
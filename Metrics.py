@@ -0,0 +1,252 @@
+import os
+import json
+import time
+import cProfile
+import functools
+import inspect
+import threading
+import tracemalloc
+from contextlib import contextmanager
+
+# 파이프라인 각 구성 요소(IaCParser, PolicyEngine, HoneypotBlueprintGenerator,
+# DockerfileGenerator, IaCRenderer, DeploymentActuator)가 공유하는 계측 레이어.
+# 단계별 소요 시간, 메모리 최대 할당량(tracemalloc), 카운터, docker-compose 호출 시간을 기록하고
+# JSON-lines 파일과 Prometheus textfile 형식으로 내보냅니다.
+#
+# 환경 변수로 설정합니다. (설정하지 않으면 메모리에만 기록하고 파일로는 쓰지 않음)
+#   HONEYBOT_METRICS_FILE    : 이벤트를 추가할 JSON-lines 파일 경로
+#   HONEYBOT_PROMETHEUS_FILE : node_exporter textfile collector용 .prom 파일 경로
+#   HONEYBOT_TRACEMALLOC=1   : 가장 바깥 단계의 최대 메모리 할당량 측정 (실행 속도가 느려짐)
+#   HONEYBOT_PROFILE_DIR     : 지정하면 단계마다 cProfile 결과(.prof)를 이 디렉토리에 저장
+#   HONEYBOT_PROFILE_STAGES  : 프로파일링할 단계 이름 목록 (쉼표 구분, 기본값: 모든 단계)
+class PipelineMetrics:
+
+    def __init__(self, metrics_file: str = None, prometheus_file: str = None,
+                 trace_memory: bool = None, profile_dir: str = None):
+        self.metrics_file = metrics_file or os.environ.get('HONEYBOT_METRICS_FILE')
+        self.prometheus_file = prometheus_file or os.environ.get('HONEYBOT_PROMETHEUS_FILE')
+        if trace_memory is None:
+            trace_memory = os.environ.get('HONEYBOT_TRACEMALLOC', '') not in ('', '0', 'false')
+        self.trace_memory = trace_memory
+        self.profile_dir = profile_dir or os.environ.get('HONEYBOT_PROFILE_DIR')
+        stages = os.environ.get('HONEYBOT_PROFILE_STAGES', '')
+        self.profile_stages = {name.strip() for name in stages.split(',') if name.strip()} or None
+        self._profiling = False   # 프로파일러는 프로세스당 하나만 활성화할 수 있음
+        self._tracing_lock = threading.Lock()
+        self._tracing_depth = 0   # 현재 진행 중인 단계 수 (모든 스레드 합계)
+        self._owns_tracing = False  # tracemalloc을 이 계측기가 시작했는지 여부
+
+        self._lock = threading.Lock()
+        self._pending = []        # 아직 파일로 내보내지 않은 이벤트
+        self.counters = {}        # 카운터 이름 -> 누적 값
+        self.stages = {}          # 단계 이름 -> {'runs', 'total_seconds', 'last_seconds', 'peak_bytes'}
+        self.commands = {}        # 명령 이름 -> {'runs', 'failures', 'total_seconds', 'last_seconds'}
+
+    # 코드 블록 하나를 단계로 측정합니다.
+    #   with metrics.stage('parse', file=path): ...
+    # tracemalloc은 프로세스 전체에 하나뿐이므로, 최대 메모리는 진행 중인 단계가 없을 때 시작된
+    # 가장 바깥 단계에서만 측정합니다. 그 사이에 (다른 스레드 포함) 시작된 단계는 시간만 기록하며,
+    # 마지막 단계가 끝날 때 tracemalloc을 멈춥니다.
+    # 이미 프로파일링 중인 단계 안의 단계는 따로 프로파일링하지 않습니다. (바깥 결과에 포함됨)
+    # :param profile: False이면 HONEYBOT_PROFILE_DIR이 설정되어 있어도 이 단계는 프로파일링하지 않음
+    @contextmanager
+    def stage(self, name: str, profile: bool = True, **labels):
+        measure_memory = False
+        if self.trace_memory:
+            with self._tracing_lock:
+                if self._tracing_depth == 0:
+                    if tracemalloc.is_tracing():
+                        self._owns_tracing = False
+                    else:
+                        tracemalloc.start()
+                        self._owns_tracing = True
+                    tracemalloc.reset_peak()
+                    measure_memory = True
+                self._tracing_depth += 1
+
+        profiler = None
+        if self.profile_dir and profile and (self.profile_stages is None or name in self.profile_stages):
+            with self._lock:
+                if not self._profiling:
+                    self._profiling = True
+                    profiler = cProfile.Profile()
+            if profiler is not None:
+                try:
+                    profiler.enable()
+                except ValueError: # 다른 프로파일링 도구가 이미 활성화된 경우
+                    profiler = None
+                    self._profiling = False
+
+        start = time.perf_counter()
+        status = 'ok'
+        try:
+            yield
+        except BaseException:
+            status = 'error'
+            raise
+        finally:
+            duration = time.perf_counter() - start
+
+            if profiler is not None:
+                profiler.disable()
+                self._profiling = False
+                os.makedirs(self.profile_dir, exist_ok=True)
+                profiler.dump_stats(os.path.join(self.profile_dir, f"{name}-{int(time.time() * 1000)}-{os.getpid()}.prof"))
+
+            peak_bytes = None
+            if self.trace_memory:
+                with self._tracing_lock:
+                    if measure_memory:
+                        peak_bytes = tracemalloc.get_traced_memory()[1]
+                    self._tracing_depth -= 1
+                    if self._tracing_depth == 0 and self._owns_tracing:
+                        tracemalloc.stop()
+                        self._owns_tracing = False
+
+            self._record_stage(name, duration, peak_bytes, status, labels)
+
+    # 함수 전체를 하나의 단계로 측정하는 데코레이터입니다.
+    #   @metrics.staged('parse', file='file_path')
+    # :param label_args: 레이블 이름 -> 값으로 사용할 함수 인자 이름
+    def staged(self, name: str, profile: bool = True, **label_args):
+        def decorator(func):
+            signature = inspect.signature(func)
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                labels = {}
+                if label_args:
+                    bound = signature.bind_partial(*args, **kwargs)
+                    bound.apply_defaults()
+                    arguments = bound.arguments
+                    labels = {label: str(arguments.get(arg)) for label, arg in label_args.items()}
+                with self.stage(name, profile, **labels):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    # 카운터를 증가시킵니다. (예: rules_evaluated, services_matched)
+    def incr(self, name: str, value: int = 1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    # 외부 명령(docker-compose 등) 한 번의 실행 시간을 기록합니다.
+    def record_command(self, command: list, duration: float, returncode):
+        # 'docker-compose -f x.yml up --build -d' -> 'docker-compose up'
+        name = command[0] if command else 'unknown'
+        for arg, prev in zip(command[1:], command[:-1]):
+            if not arg.startswith('-') and prev not in ('-f', '-p', '--file', '--project-name'):
+                name = f"{command[0]} {arg}"
+                break
+
+        with self._lock:
+            entry = self.commands.setdefault(name, {'runs': 0, 'failures': 0, 'total_seconds': 0.0, 'last_seconds': 0.0})
+            entry['runs'] += 1
+            entry['total_seconds'] += duration
+            entry['last_seconds'] = duration
+            if returncode != 0:
+                entry['failures'] += 1
+            self._pending.append({'type': 'command', 'ts': time.time(), 'command': name,
+                                  'argv': command, 'duration': duration, 'returncode': returncode})
+
+    # 쌓인 이벤트를 JSON-lines 파일에 추가하고 Prometheus textfile을 갱신합니다.
+    def flush(self):
+        with self._lock:
+            events, self._pending = self._pending, []
+            counters = dict(self.counters)
+            stages = {name: dict(entry) for name, entry in self.stages.items()}
+            commands = {name: dict(entry) for name, entry in self.commands.items()}
+
+        if events and counters:
+            events.append({'type': 'counters', 'ts': time.time(), 'counters': counters})
+
+        try:
+            if self.metrics_file and events:
+                with open(self.metrics_file, 'a', encoding='utf-8') as f:
+                    for event in events:
+                        f.write(json.dumps(event, default=str) + "\n")
+            if self.prometheus_file:
+                self._write_prometheus(stages, counters, commands)
+        except OSError as e:
+            print(f"Warning: Failed to export metrics: {e}")
+
+    # 현재까지의 집계를 딕셔너리로 반환합니다.
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                'counters': dict(self.counters),
+                'stages': {name: dict(entry) for name, entry in self.stages.items()},
+                'commands': {name: dict(entry) for name, entry in self.commands.items()}
+            }
+
+    def reset(self):
+        with self._lock:
+            self._pending = []
+            self.counters = {}
+            self.stages = {}
+            self.commands = {}
+
+    def _record_stage(self, name: str, duration: float, peak_bytes, status: str, labels: dict):
+        with self._lock:
+            entry = self.stages.setdefault(name, {'runs': 0, 'total_seconds': 0.0, 'last_seconds': 0.0, 'peak_bytes': None})
+            entry['runs'] += 1
+            entry['total_seconds'] += duration
+            entry['last_seconds'] = duration
+            if peak_bytes is not None:
+                entry['peak_bytes'] = peak_bytes
+
+            event = {'type': 'stage', 'ts': time.time(), 'stage': name, 'duration': duration, 'status': status}
+            if peak_bytes is not None:
+                event['peak_bytes'] = peak_bytes
+            if labels:
+                event['labels'] = labels
+            self._pending.append(event)
+
+    # (내부 함수) Prometheus textfile collector 형식으로 원자적으로 씁니다.
+    def _write_prometheus(self, stages: dict, counters: dict, commands: dict):
+        lines = [
+            "# HELP honeybot_stage_duration_seconds Duration of the last run of a pipeline stage.",
+            "# TYPE honeybot_stage_duration_seconds gauge",
+        ]
+        for name, entry in sorted(stages.items()):
+            lines.append(f'honeybot_stage_duration_seconds{{stage="{name}"}} {entry["last_seconds"]:.6f}')
+        lines += ["# HELP honeybot_stage_seconds_total Total time spent in a pipeline stage.",
+                  "# TYPE honeybot_stage_seconds_total counter"]
+        for name, entry in sorted(stages.items()):
+            lines.append(f'honeybot_stage_seconds_total{{stage="{name}"}} {entry["total_seconds"]:.6f}')
+        lines += ["# HELP honeybot_stage_runs_total Number of runs of a pipeline stage.",
+                  "# TYPE honeybot_stage_runs_total counter"]
+        for name, entry in sorted(stages.items()):
+            lines.append(f'honeybot_stage_runs_total{{stage="{name}"}} {entry["runs"]}')
+
+        peak_stages = [(name, entry) for name, entry in sorted(stages.items()) if entry['peak_bytes'] is not None]
+        if peak_stages:
+            lines += ["# HELP honeybot_stage_peak_bytes Peak traced allocation during the last run of a stage.",
+                      "# TYPE honeybot_stage_peak_bytes gauge"]
+            for name, entry in peak_stages:
+                lines.append(f'honeybot_stage_peak_bytes{{stage="{name}"}} {entry["peak_bytes"]}')
+
+        for name, value in sorted(counters.items()):
+            lines += [f"# TYPE honeybot_{name}_total counter", f"honeybot_{name}_total {value}"]
+
+        if commands:
+            lines += ["# HELP honeybot_command_seconds_total Total time spent in external commands.",
+                      "# TYPE honeybot_command_seconds_total counter"]
+            for name, entry in sorted(commands.items()):
+                lines.append(f'honeybot_command_seconds_total{{command="{name}"}} {entry["total_seconds"]:.6f}')
+            lines += ["# HELP honeybot_command_runs_total Number of external command runs.",
+                      "# TYPE honeybot_command_runs_total counter"]
+            for name, entry in sorted(commands.items()):
+                lines.append(f'honeybot_command_runs_total{{command="{name}"}} {entry["runs"]}')
+            lines += ["# HELP honeybot_command_failures_total Number of failed external command runs.",
+                      "# TYPE honeybot_command_failures_total counter"]
+            for name, entry in sorted(commands.items()):
+                lines.append(f'honeybot_command_failures_total{{command="{name}"}} {entry["failures"]}')
+
+        tmp_path = f"{self.prometheus_file}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write("\n".join(lines) + "\n")
+        os.replace(tmp_path, self.prometheus_file)
+
+# 프로세스 전체에서 공유하는 기본 계측기
+metrics = PipelineMetrics()
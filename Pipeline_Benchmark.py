@@ -0,0 +1,195 @@
+# Pipeline_Benchmark.py
+# 청사진 생성 파이프라인의 확장성 벤치마크.
+# generate_test_files.py의 생성기로 여러 규모의 입력을 만들고, parse / tag / generate / render
+# 단계별 시간을 측정하여 JSON으로 기록합니다. 저장된 기준(baseline)과 비교해 회귀를 잡아냅니다.
+#
+# 사용 예:
+#   python Pipeline_Benchmark.py --sizes small,medium --output bench.json
+#   python Pipeline_Benchmark.py --sizes small,medium --baseline bench_baseline.json --tolerance 0.25
+#   python Pipeline_Benchmark.py --sizes small --save-baseline bench_baseline.json
+import io
+import os
+import sys
+import json
+import time
+import shutil
+import platform
+import argparse
+import tempfile
+import contextlib
+from datetime import datetime, timezone
+
+import generate_test_files
+import Yaml_Backend
+from IaC_Parser import IaCParser
+from Policy_Engine import PolicyEngine
+from Blueprint_Generator import HoneypotBlueprintGenerator
+from IaC_Renderer import IaCRenderer
+from Kubernetes_Parser import KubernetesParser
+
+# 규모 프리셋: (서비스 수, 규칙 수, 빌드 가능한 서비스 수, 쿠버네티스 리소스 수)
+SIZE_PRESETS = {
+    'small':  {'services': 25,      'rules': 10,     'buildable': 1, 'k8s_resources': 100},
+    'medium': {'services': 1000,    'rules': 100,    'buildable': 4, 'k8s_resources': 2000},
+    'large':  {'services': 10000,   'rules': 1000,   'buildable': 8, 'k8s_resources': 20000},
+    'xlarge': {'services': 100000,  'rules': 10000,  'buildable': 16, 'k8s_resources': 100000},
+}
+
+COMPOSE_STAGES = ('policy_load', 'parse', 'tag', 'generate', 'render')
+K8S_STAGES = ('policy_load', 'parse_and_tag')
+
+# 한 단계의 실행 시간을 측정합니다. 파이프라인의 진행 메시지는 측정 중에 버립니다.
+def _timed(func):
+    with contextlib.redirect_stdout(io.StringIO()) as sink:
+        start = time.perf_counter()
+        result = func()
+        duration = time.perf_counter() - start
+    sink.close()
+    return result, duration
+
+# 컴포즈 파이프라인의 단계별 시간을 한 번 측정합니다.
+def _run_compose_once(paths: dict, work_dir: str) -> dict:
+    timings = {}
+    Yaml_Backend.parse_cache.invalidate()
+
+    engine, timings['policy_load'] = _timed(lambda: PolicyEngine(paths['policy']))
+    data, timings['parse'] = _timed(lambda: IaCParser().parse(paths['compose'], use_cache=False))
+    tagged, timings['tag'] = _timed(lambda: engine.apply(data))
+    blueprint, timings['generate'] = _timed(lambda: HoneypotBlueprintGenerator().generate(tagged))
+    output_path = os.path.join(work_dir, 'deception-compose.bench.yml')
+    _, timings['render'] = _timed(lambda: IaCRenderer().render(blueprint, output_path))
+    return timings
+
+# 쿠버네티스 파이프라인(스트리밍 파싱 + 태깅)의 단계별 시간을 한 번 측정합니다.
+def _run_k8s_once(k8s_dir: str, policy_path: str, workers: int) -> dict:
+    timings = {}
+    Yaml_Backend.parse_cache.invalidate()
+
+    engine, timings['policy_load'] = _timed(lambda: PolicyEngine(policy_path))
+    parser = KubernetesParser(max_workers=workers)
+    count, timings['parse_and_tag'] = _timed(
+        lambda: sum(1 for _ in engine.apply_iter(parser.iter_resources(k8s_dir))))
+    return timings
+
+# 각 단계별로 여러 번 실행한 값 중 가장 빠른 값을 사용합니다. (노이즈 최소화)
+def _best_of(run, repeat: int) -> dict:
+    best = None
+    for _ in range(repeat):
+        timings = run()
+        best = timings if best is None else {stage: min(best[stage], timings[stage]) for stage in best}
+    best['total'] = sum(best.values())
+    return best
+
+# 하나의 규모 프리셋에 대해 컴포즈/쿠버네티스 벤치마크를 실행합니다.
+def run_size(size_name: str, repeat: int = 3, k8s_workers: int = None, skip_k8s: bool = False) -> list:
+    preset = SIZE_PRESETS[size_name]
+    results = []
+    work_dir = tempfile.mkdtemp(prefix=f'honeybot-bench-{size_name}-')
+    try:
+        print(f"[{size_name}] Generating {preset['services']} services / {preset['rules']} rules...")
+        paths = generate_test_files.generate_scaled_files(
+            work_dir, preset['services'], preset['rules'], preset['buildable'],
+            fake_app_path=os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fake_apps', 'python-flask-generic'))
+
+        timings = _best_of(lambda: _run_compose_once(paths, work_dir), repeat)
+        results.append({
+            'case': f'compose-{size_name}',
+            'services': preset['services'], 'rules': preset['rules'], 'buildable': preset['buildable'],
+            'stages': timings
+        })
+        print(f"[{size_name}] compose: " + ", ".join(f"{k}={v:.4f}s" for k, v in timings.items()))
+
+        if not skip_k8s:
+            k8s_dir = os.path.join(work_dir, 'k8s')
+            k8s_policy = os.path.join(work_dir, 'policy_k8s.bench.yml')
+            print(f"[{size_name}] Generating {preset['k8s_resources']} Kubernetes resources...")
+            generate_test_files.generate_k8s_tree(k8s_dir, preset['k8s_resources'])
+            with open(k8s_policy, 'w') as f:
+                Yaml_Backend.safe_dump(generate_test_files.build_k8s_policy_data(preset['rules']), f, sort_keys=False)
+
+            timings = _best_of(lambda: _run_k8s_once(k8s_dir, k8s_policy, k8s_workers), repeat)
+            results.append({
+                'case': f'k8s-{size_name}',
+                'resources': preset['k8s_resources'], 'rules': preset['rules'],
+                'stages': timings
+            })
+            print(f"[{size_name}] k8s: " + ", ".join(f"{k}={v:.4f}s" for k, v in timings.items()))
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return results
+
+# 현재 결과를 기준 결과와 비교하여 허용치(tolerance)를 넘게 느려진 단계 목록을 반환합니다.
+# :param min_seconds: 이보다 짧은 단계는 측정 노이즈가 크므로 비교하지 않음
+def compare_with_baseline(report: dict, baseline: dict, tolerance: float, min_seconds: float = 0.005) -> list:
+    baseline_cases = {result['case']: result for result in baseline.get('results', [])}
+    regressions = []
+    for result in report['results']:
+        base = baseline_cases.get(result['case'])
+        if base is None:
+            continue
+        for stage, seconds in result['stages'].items():
+            base_seconds = base['stages'].get(stage)
+            if base_seconds is None or max(seconds, base_seconds) < min_seconds:
+                continue
+            ratio = seconds / base_seconds if base_seconds > 0 else float('inf')
+            if ratio > 1 + tolerance:
+                regressions.append({'case': result['case'], 'stage': stage,
+                                    'baseline': base_seconds, 'current': seconds, 'ratio': ratio})
+    return regressions
+
+def build_report(results: list) -> dict:
+    return {
+        'meta': {
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'libyaml': Yaml_Backend.HAS_LIBYAML,
+        },
+        'results': results
+    }
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Scalability benchmark for the blueprint pipeline.")
+    parser.add_argument('--sizes', default='small,medium',
+                        help=f"Comma-separated presets: {', '.join(SIZE_PRESETS)} (default: small,medium)")
+    parser.add_argument('--repeat', type=int, default=3, help="Runs per case; the fastest run is kept.")
+    parser.add_argument('--k8s-workers', type=int, default=None, help="Processes for the Kubernetes parser.")
+    parser.add_argument('--skip-k8s', action='store_true', help="Only benchmark the compose pipeline.")
+    parser.add_argument('--output', help="Write the JSON report to this file.")
+    parser.add_argument('--save-baseline', help="Write the JSON report as a new baseline file.")
+    parser.add_argument('--baseline', help="Compare against this baseline JSON and fail on regressions.")
+    parser.add_argument('--tolerance', type=float, default=0.25, help="Allowed slowdown ratio (0.25 = +25%%).")
+    args = parser.parse_args(argv)
+
+    sizes = [size.strip() for size in args.sizes.split(',') if size.strip()]
+    unknown = [size for size in sizes if size not in SIZE_PRESETS]
+    if unknown:
+        print(f"ERROR: Unknown size preset(s): {unknown}")
+        return 2
+
+    results = []
+    for size in sizes:
+        results.extend(run_size(size, args.repeat, args.k8s_workers, args.skip_k8s))
+    report = build_report(results)
+
+    for path in (args.output, args.save_baseline):
+        if path:
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(report, f, indent=2)
+            print(f"Saved benchmark report to '{path}'")
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare_with_baseline(report, baseline, args.tolerance)
+        if regressions:
+            print(f"\n❌ {len(regressions)} stage(s) regressed by more than {args.tolerance:.0%}:")
+            for item in regressions:
+                print(f"  - {item['case']}/{item['stage']}: {item['baseline']:.4f}s -> "
+                      f"{item['current']:.4f}s (x{item['ratio']:.2f})")
+            return 1
+        print(f"\n✅ No regressions against '{args.baseline}' (tolerance {args.tolerance:.0%}).")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,532 @@
+import os
+import sys
+import json
+import stat
+import time
+import socket
+import struct
+import tempfile
+import types
+import threading
+import traceback
+import socketserver
+from contextlib import contextmanager
+
+# 파이프라인 데몬.
+# main.py / main_k8s.py / Sync_Controller.py는 실행될 때마다 인터프리터를 띄우고 모듈을 임포트하고 정책을 다시 컴파일합니다.
+# 데몬은 한 번 떠서 컴파일된 PolicyEngine, YAML 파싱 캐시, 청사진 캐시, 배포 액츄에이터(Engine API 연결 풀 포함)를
+# 메모리에 유지하고, 유닉스 소켓으로 들어오는 생성/배포/상태 요청을 처리합니다.
+# 데몬이 떠 있으면 기존 스크립트들은 요청만 보내는 얇은 클라이언트로 동작합니다. (없으면 지금처럼 직접 실행)
+#
+# 프로토콜: 요청과 응답 모두 JSON 한 줄씩 (한 연결에서 여러 요청을 차례로 보낼 수 있음)
+#   요청: {"op": "generate", "args": {...}}
+#   진행 중 출력: {"log": "<파이프라인이 출력한 한 줄>"}  (0개 이상, 실시간으로 전달)
+#   스트리밍 결과: {"resource": {...}}  (k8s 요청에서 태깅된 리소스마다 하나씩)
+#   최종 응답: {"ok": true, "result": {...}} 또는 {"ok": false, "error": "<메시지>"}
+#
+# 요청 종류(op): ping, generate, deploy, redeploy, k8s, shutdown
+# 여러 클라이언트를 동시에 받으며(연결마다 스레드), 작업 디렉토리를 바꾸는 생성 요청은 하나씩,
+# 배포 요청은 compose 파일마다 하나씩 실행됩니다. ping은 다른 작업을 기다리지 않습니다.
+
+PROTOCOL_VERSION = 1
+
+# (내부 함수) 기본 소켓을 둘 사용자 전용 디렉토리를 반환합니다.
+# $XDG_RUNTIME_DIR(로그인 세션마다 사용자 전용)이 있으면 그 아래, 없으면 임시 디렉토리 아래의 사용자별 디렉토리를 씁니다.
+def _default_socket_dir() -> str:
+    runtime_dir = os.environ.get('XDG_RUNTIME_DIR')
+    if runtime_dir and os.path.isdir(runtime_dir):
+        return os.path.join(runtime_dir, 'honeybot')
+    return os.path.join(tempfile.gettempdir(), f"honeybot-{os.getuid() if hasattr(os, 'getuid') else 'user'}")
+
+DEFAULT_SOCKET_DIR = _default_socket_dir()
+DEFAULT_SOCKET_PATH = os.environ.get('HONEYBOT_DAEMON_SOCKET') or os.path.join(DEFAULT_SOCKET_DIR, 'pipeline.sock')
+
+# 데몬이 요청을 처리하지 못했을 때 발생하는 예외
+class DaemonError(Exception):
+    pass
+
+# 데몬에 연결할 수 없을 때 발생하는 예외 (클라이언트는 직접 실행으로 대체)
+class DaemonUnavailable(DaemonError):
+    pass
+
+# (내부 함수) 경로가 현재 사용자 소유인지 확인합니다. (uid가 없는 플랫폼에서는 항상 True)
+def _owned_by_current_user(info: os.stat_result) -> bool:
+    return not hasattr(os, 'getuid') or info.st_uid == os.getuid()
+
+# (내부 함수) 소켓 디렉토리를 0700으로 만들고, 이미 있으면 심볼릭 링크가 아닌 현재 사용자 소유의 0700 디렉토리인지 확인합니다.
+# 임시 디렉토리처럼 누구나 쓸 수 있는 곳에서 다른 사용자가 같은 이름을 먼저 만들어 둔 경우를 거부합니다.
+def _ensure_private_dir(directory: str):
+    try:
+        os.mkdir(directory, 0o700)
+    except FileExistsError:
+        pass
+    info = os.lstat(directory)
+    if not stat.S_ISDIR(info.st_mode) or not _owned_by_current_user(info) or info.st_mode & 0o077:
+        raise DaemonError(f"Refusing to use socket directory '{directory}': "
+                          "it must be a directory owned by the current user with mode 0700.")
+
+# (내부 함수) 유닉스 소켓 상대편 프로세스의 uid를 반환합니다. SO_PEERCRED가 없는 플랫폼에서는 None.
+def _peer_uid(sock):
+    if not hasattr(socket, 'SO_PEERCRED'):
+        return None
+    credentials = sock.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, struct.calcsize('3i'))
+    pid, uid, gid = struct.unpack('3i', credentials)
+    return uid
+
+# (내부 함수) 상대편이 현재 사용자와 같은 uid로 실행 중인지 확인합니다.
+def _trusted_peer(sock) -> bool:
+    uid = _peer_uid(sock)
+    return uid is None or not hasattr(os, 'getuid') or uid == os.getuid()
+
+# 스레드마다 출력 대상을 바꿀 수 있는 sys.stdout 대체 객체.
+# 요청을 처리하는 스레드의 print 출력만 그 요청의 클라이언트로 보내고, 나머지는 원래 표준 출력으로 보냅니다.
+class _ThreadLocalStdout:
+
+    def __init__(self, original):
+        self._original = original
+        self._local = threading.local()
+
+    def write(self, text):
+        target = getattr(self._local, 'target', None)
+        return (target or self._original).write(text)
+
+    def flush(self):
+        target = getattr(self._local, 'target', None)
+        (target or self._original).flush()
+
+    def __getattr__(self, name):
+        return getattr(self._original, name)
+
+    @contextmanager
+    def redirect(self, target):
+        previous = getattr(self._local, 'target', None)
+        self._local.target = target
+        try:
+            yield target
+        finally:
+            target.flush()
+            self._local.target = previous
+
+# 출력된 텍스트를 줄 단위로 끊어 클라이언트에 {"log": ...}로 보내는 쓰기 객체
+class _LogForwarder:
+
+    def __init__(self, send):
+        self._send = send
+        self._partial = ''
+
+    def write(self, text):
+        lines = (self._partial + text).split('\n')
+        self._partial = lines.pop()
+        for line in lines:
+            self._send({'log': line})
+        return len(text)
+
+    def flush(self):
+        if self._partial:
+            self._send({'log': self._partial})
+            self._partial = ''
+
+class PipelineDaemon:
+
+    def __init__(self, socket_path: str = None):
+        self.socket_path = socket_path or DEFAULT_SOCKET_PATH
+        self.started_at = time.time()
+        self.requests = 0
+        self._server = None
+        self._stdout = None
+        self._pipeline_lock = threading.Lock()  # 생성 파이프라인은 작업 디렉토리를 바꾸므로 하나씩 실행
+        self._deploy_locks = {}                 # compose 파일 경로 -> 잠금
+        self._actuators = {}                    # (compose 파일 경로, 백엔드) -> DeploymentActuator
+        self._state_lock = threading.Lock()
+        self.operations = {
+            'ping': self.op_ping,
+            'generate': self.op_generate,
+            'deploy': self.op_deploy,
+            'redeploy': self.op_redeploy,
+            'k8s': self.op_k8s,
+            'shutdown': self.op_shutdown,
+        }
+
+    # 소켓을 열고 요청을 처리합니다. (shutdown 요청이나 Ctrl+C로 종료)
+    def serve_forever(self):
+        if os.path.abspath(os.path.dirname(self.socket_path)) == os.path.abspath(DEFAULT_SOCKET_DIR):
+            _ensure_private_dir(DEFAULT_SOCKET_DIR)
+        if os.path.lexists(self.socket_path):
+            if not _owned_by_current_user(os.lstat(self.socket_path)):
+                raise DaemonError(f"'{self.socket_path}' exists and is owned by another user.")
+            if DaemonClient(self.socket_path, timeout=2).available():
+                raise DaemonError(f"A pipeline daemon is already listening on '{self.socket_path}'.")
+            os.unlink(self.socket_path) # 비정상 종료로 남은 소켓 파일
+
+        daemon = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                # 소켓 권한과 별개로, 다른 사용자의 프로세스가 보낸 요청은 처리하지 않음
+                if not _trusted_peer(self.connection):
+                    print(f"Warning: Rejected a connection from uid {_peer_uid(self.connection)}.",
+                          file=daemon._stdout._original)
+                    return
+                daemon._handle_connection(self.rfile, self.wfile)
+
+        # 무거운 모듈은 데몬 시작 시 한 번만 임포트하여 이후 요청에서는 바로 사용
+        import main, Fleet_Runner, Kubernetes_Parser, Blueprint_Diff, Deployer # noqa: F401
+
+        self._stdout = _ThreadLocalStdout(sys.stdout)
+        sys.stdout = self._stdout
+        # bind가 만드는 소켓 파일이 처음부터 같은 사용자만 접근 가능(0600)하도록 umask를 잠시 바꿈
+        # (chmod만 하면 bind와 chmod 사이에 다른 사용자가 연결할 수 있음)
+        previous_umask = os.umask(0o177)
+        try:
+            self._server = socketserver.ThreadingUnixStreamServer(self.socket_path, Handler)
+        finally:
+            os.umask(previous_umask)
+        self._server.daemon_threads = True
+        os.chmod(self.socket_path, 0o600)
+        print(f"Pipeline daemon listening on '{self.socket_path}' (pid {os.getpid()}). Press Ctrl+C to stop.")
+        try:
+            self._server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self._server.server_close()
+            sys.stdout = self._stdout._original
+            try:
+                os.unlink(self.socket_path)
+            except FileNotFoundError:
+                pass
+            for actuator in self._actuators.values():
+                if actuator.engine:
+                    actuator.engine.close()
+            print("Pipeline daemon stopped.")
+
+    # (내부 함수) 연결 하나에서 들어오는 요청들을 차례로 처리합니다.
+    def _handle_connection(self, rfile, wfile):
+        def send(message: dict):
+            wfile.write(json.dumps(message, ensure_ascii=False, default=str).encode('utf-8') + b'\n')
+            wfile.flush()
+
+        for line in rfile:
+            if not line.strip():
+                continue
+            try:
+                request = json.loads(line)
+                operation = self.operations.get(request.get('op'))
+                if operation is None:
+                    raise DaemonError(f"Unknown operation: '{request.get('op')}'")
+                with self._state_lock:
+                    self.requests += 1
+                with self._stdout.redirect(_LogForwarder(send)):
+                    result = operation(**(request.get('args') or {}))
+                    if isinstance(result, types.GeneratorType):
+                        result = self._stream(result, send)
+                send({'ok': True, 'result': result})
+            except (BrokenPipeError, ConnectionResetError):
+                return # 클라이언트가 먼저 끊음
+            except DaemonError as e: # 잘못된 요청 등 예상된 실패
+                detail = str(e)
+                print(f"Warning: Pipeline daemon request failed: {detail}", file=self._stdout._original)
+                try:
+                    send({'ok': False, 'error': detail})
+                except OSError:
+                    return
+            except Exception as e:
+                detail = f"{type(e).__name__}: {e}"
+                print(f"[ERROR] Pipeline daemon request failed: {detail}\n{traceback.format_exc()}",
+                      file=self._stdout._original)
+                try:
+                    send({'ok': False, 'error': detail})
+                except OSError:
+                    return
+
+    # --- 요청 처리 ---
+
+    def op_ping(self):
+        import Fleet_Runner
+        return {
+            'protocol': PROTOCOL_VERSION,
+            'pid': os.getpid(),
+            'uptime': round(time.time() - self.started_at, 1),
+            'requests': self.requests,
+            'policies': len(Fleet_Runner._policy_engines),
+            'actuators': len(self._actuators),
+        }
+
+    # 청사진 생성 파이프라인을 실행합니다. 상대 경로는 cwd(클라이언트의 작업 디렉토리) 기준입니다.
+    # changed_paths를 넘기면(Sync_Controller의 재배포) cwd의 의존성 그래프를 갱신하고, 영향받은 서비스를 'affected'로 돌려줍니다.
+    def op_generate(self, source: str = 'docker-compose.yml', policy: str = 'policy.yml',
+                    output: str = 'deception-compose.yml', cwd: str = None, use_cache: bool = True,
+                    changed_paths: list = None, backend: str = None, buildkit: bool = None):
+        from main import run_pipeline_generation
+        from Deployer import backend_supports_buildkit
+        from Fleet_Runner import get_policy_engine
+        from Dependency_Graph import DependencyGraph, DEPENDENCY_FILE
+
+        started = time.perf_counter()
+        affected = None
+        # Dockerfile 문법은 데몬의 환경 변수가 아니라 클라이언트가 배포에 쓸 백엔드로 정함
+        if buildkit is None:
+            buildkit = backend_supports_buildkit(backend)
+        with self._in_directory(cwd):
+            graph = None
+            if changed_paths is not None:
+                graph = DependencyGraph.load(DEPENDENCY_FILE) or DependencyGraph(source, policy)
+            output_file = run_pipeline_generation(source, policy, output,
+                                                  policy_engine=get_policy_engine(policy), use_cache=use_cache,
+                                                  dependency_graph=graph, changed_paths=changed_paths or (),
+                                                  buildkit=buildkit)
+            output_path = os.path.abspath(output_file) if output_file else None
+            if graph is not None and graph.recorded:
+                graph.save(DEPENDENCY_FILE)
+                affected = sorted(graph.affected) if graph.affected is not None else None
+        return {'output': output_path, 'affected': affected, 'seconds': round(time.perf_counter() - started, 3)}
+
+    # 배포 명령(up / down / status)을 실행합니다.
+    def op_deploy(self, compose: str, action: str = 'up', build: bool = False, services: list = None,
+                  backend: str = None, strategy: str = None):
+        compose = os.path.abspath(compose)
+        with self._deploy_lock(compose):
+            actuator = self._actuator(compose, backend, strategy)
+            if action == 'up':
+                ok = actuator.up(build=build, services=services)
+            elif action == 'down':
+                ok = actuator.down()
+            elif action == 'status':
+                ok = actuator.status()
+            else:
+                raise DaemonError(f"Unknown deploy action: '{action}'")
+        return {'ok': bool(ok)}
+
+    # 청사진을 다시 생성하고, 이전 청사진과 비교하여 영향을 받은 서비스만 재배포합니다. (Sync_Controller용)
+    def op_redeploy(self, source: str = 'docker-compose.yml', policy: str = 'policy.yml',
+                    output: str = 'deception-compose.yml', cwd: str = None, backend: str = None,
+                    force_services: list = None, changed_paths: list = None, strategy: str = None,
+                    buildkit: bool = None):
+        from Blueprint_Diff import BlueprintDiffer
+
+        compose = os.path.abspath(os.path.join(cwd or '.', output))
+        differ = BlueprintDiffer()
+        with self._deploy_lock(compose):
+            previous_blueprint = differ.load(compose)
+            print("STEP 1/3: Regenerating blueprint...")
+            result = self.op_generate(source, policy, output, cwd, changed_paths=changed_paths,
+                                      backend=backend, buildkit=buildkit)
+            if not result['output']:
+                raise DaemonError("Blueprint generation failed.")
+            print("[SUCCESS]: Blueprint regenerated successfully.")
+            # 가짜 앱/Dockerfile/정책 규칙만 바뀐 서비스는 청사진이 같아도 다시 빌드해야 함
+            force_services = sorted(set(force_services or []) | set(result['affected'] or []))
+
+            print("\nSTEP 2/3: Comparing the new blueprint with the running one...")
+            new_blueprint = differ.load(compose)
+            diff = differ.diff(previous_blueprint, new_blueprint)
+            for category in ('added', 'removed', 'changed', 'unchanged'):
+                print(f"  - {category}: {diff[category]}")
+
+            print("\nSTEP 3/3: Redeploying only the affected services...")
+            self._actuator(compose, backend, strategy).apply_changes(diff, force_services=force_services, blueprint=new_blueprint)
+        return {'output': compose, 'diff': diff}
+
+    # 쿠버네티스 매니페스트 디렉토리를 파싱하고 정책을 적용한 결과를 반환합니다.
+    # 태깅된 리소스는 모아 두지 않고 하나씩 {"resource": ...} 메시지로 보내며, 최종 응답에는 개수만 담습니다.
+    # 작업 디렉토리를 바꾸지 않으므로(경로를 cwd 기준 절대 경로로 바꿈) 스트리밍 중에도 다른 생성 요청을 막지 않습니다.
+    def op_k8s(self, manifest_dir: str, policy: str, cwd: str = None):
+        from Kubernetes_Parser import KubernetesParser
+        from Fleet_Runner import get_policy_engine
+        from Blueprint_Overlay import materialize
+
+        policy_engine = get_policy_engine(os.path.join(cwd or '.', policy))
+        count = 0
+        for resource in policy_engine.apply_iter(KubernetesParser().iter_resources(os.path.join(cwd or '.', manifest_dir))):
+            yield {'resource': materialize(resource)}
+            count += 1
+        return {'count': count}
+
+    def op_shutdown(self):
+        print("Pipeline daemon is shutting down.")
+        threading.Thread(target=self._server.shutdown, daemon=True).start()
+        return {'stopping': True}
+
+    # --- 내부 함수 ---
+
+    # 제너레이터로 구현된 요청(op_k8s)이 만드는 메시지를 생성되는 대로 보내고, 반환값(최종 결과)을 돌려줍니다.
+    def _stream(self, messages, send):
+        while True:
+            try:
+                message = next(messages)
+            except StopIteration as stop:
+                return stop.value
+            send(message)
+
+    # 생성 파이프라인을 잠금 안에서 클라이언트의 작업 디렉토리로 옮겨 실행합니다.
+    @contextmanager
+    def _in_directory(self, cwd: str):
+        with self._pipeline_lock:
+            previous = os.getcwd()
+            if cwd:
+                os.chdir(cwd)
+            try:
+                yield
+            finally:
+                os.chdir(previous)
+
+    def _deploy_lock(self, compose: str) -> threading.Lock:
+        with self._state_lock:
+            return self._deploy_locks.setdefault(compose, threading.Lock())
+
+    # compose 파일마다 액츄에이터를 한 번만 만들고 재사용합니다. (Engine API 연결 풀 유지)
+    def _actuator(self, compose: str, backend: str = None, strategy: str = None):
+        from Deployer import DeploymentActuator
+
+        key = (compose, backend or os.environ.get('HONEYBOT_DEPLOY_BACKEND', 'compose'),
+               strategy or os.environ.get('HONEYBOT_DEPLOY_STRATEGY', 'recreate'))
+        with self._state_lock:
+            actuator = self._actuators.get(key)
+        if actuator is None:
+            actuator = DeploymentActuator(compose, backend=backend, strategy=strategy)
+            with self._state_lock:
+                actuator = self._actuators.setdefault(key, actuator)
+        return actuator
+
+# 데몬에 요청을 보내는 클라이언트
+class DaemonClient:
+
+    # :param timeout: 연결 타임아웃(초). 연결된 뒤에는 요청이 끝날 때까지 기다림
+    def __init__(self, socket_path: str = None, timeout: float = 5.0):
+        self.socket_path = socket_path or DEFAULT_SOCKET_PATH
+        self.timeout = timeout
+
+    # 데몬이 떠 있고 응답하는지 확인합니다.
+    def available(self) -> bool:
+        try:
+            self.call('ping')
+            return True
+        except DaemonError:
+            return False
+
+    # 요청 하나를 보내고 결과를 반환합니다. 처리 중 출력은 on_log(한 줄)로 전달됩니다.
+    # 스트리밍 요청(k8s)의 중간 메시지는 버리므로, 그 메시지가 필요하면 stream()을 사용합니다.
+    # :raises DaemonUnavailable: 데몬에 연결할 수 없거나 응답 도중 연결이 끊긴 경우
+    # :raises DaemonError: 데몬이 요청 처리에 실패한 경우
+    def call(self, op: str, on_log=None, **args):
+        messages = self.stream(op, on_log, **args)
+        while True:
+            try:
+                next(messages)
+            except StopIteration as stop:
+                return stop.value
+
+    # 요청 하나를 보내고, 데몬이 보내는 중간 메시지(예: {"resource": ...})를 도착하는 대로 하나씩 생성합니다.
+    # 최종 결과는 제너레이터의 반환값입니다. (result = yield from client.stream(...))
+    def stream(self, op: str, on_log=None, **args):
+        if not hasattr(socket, 'AF_UNIX'):
+            raise DaemonUnavailable("Unix domain sockets are not supported on this platform.")
+        try:
+            info = os.stat(self.socket_path)
+        except OSError as e:
+            raise DaemonUnavailable(f"Cannot connect to pipeline daemon at '{self.socket_path}': {e}")
+        # 다른 사용자가 만든 소켓이면 요청(작업 디렉토리, 파일 경로)을 보내지 않음
+        if not _owned_by_current_user(info):
+            raise DaemonUnavailable(f"Refusing to use '{self.socket_path}': it is owned by another user.")
+
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            sock.settimeout(self.timeout)
+            try:
+                sock.connect(self.socket_path)
+            except OSError as e:
+                raise DaemonUnavailable(f"Cannot connect to pipeline daemon at '{self.socket_path}': {e}")
+            if not _trusted_peer(sock):
+                raise DaemonUnavailable(f"Refusing to use '{self.socket_path}': "
+                                        f"the daemon is running as another user (uid {_peer_uid(sock)}).")
+            sock.settimeout(None)
+            sock.sendall(json.dumps({'op': op, 'args': args}, ensure_ascii=False).encode('utf-8') + b'\n')
+
+            with sock.makefile('rb') as stream:
+                for line in stream:
+                    message = json.loads(line)
+                    if 'log' in message:
+                        if on_log is not None:
+                            on_log(message['log'])
+                        continue
+                    if 'ok' not in message:
+                        yield message
+                        continue
+                    if message['ok']:
+                        return message.get('result')
+                    raise DaemonError(message.get('error') or 'Unknown daemon error')
+            raise DaemonUnavailable("Pipeline daemon closed the connection before responding.")
+        finally:
+            sock.close()
+
+    # --- 기존 스크립트용 편의 함수 ---
+
+    # 청사진을 생성하고 출력 파일 경로를 반환합니다. (실패하면 None)
+    def generate(self, source_iac_file: str, policy_file: str, output_iac_file: str, use_cache: bool = True,
+                 backend: str = None, buildkit: bool = None):
+        result = self.call('generate', on_log=print, source=source_iac_file, policy=policy_file,
+                           output=output_iac_file, cwd=os.getcwd(), use_cache=use_cache,
+                           backend=backend, buildkit=buildkit)
+        return output_iac_file if result.get('output') else None
+
+# DeploymentActuator와 같은 up/down/status를 데몬에 요청하는 대리 객체 (대화형 제어용)
+class RemoteActuator:
+
+    def __init__(self, client: DaemonClient, compose_file_path: str, backend: str = None, strategy: str = None):
+        self.client = client
+        self.compose_file_path = os.path.abspath(compose_file_path)
+        self.backend = backend
+        self.strategy = strategy
+        print(f"Deployer connected to pipeline daemon for '{self.compose_file_path}'")
+
+    def _deploy(self, action: str, **args) -> bool:
+        try:
+            result = self.client.call('deploy', on_log=print, compose=self.compose_file_path, action=action,
+                                      backend=self.backend, strategy=self.strategy, **args)
+        except DaemonError as e:
+            print(f"ERROR: Pipeline daemon request failed: {e}")
+            return False
+        return result.get('ok', False)
+
+    def up(self, build=False, services=None):
+        return self._deploy('up', build=build, services=services)
+
+    def down(self):
+        return self._deploy('down')
+
+    def status(self):
+        return self._deploy('status')
+
+# 데몬이 떠 있으면 클라이언트를, 아니면 None을 반환합니다.
+# HONEYBOT_DAEMON=0 이면 데몬을 사용하지 않습니다.
+def connect_daemon(socket_path: str = None):
+    if os.environ.get('HONEYBOT_DAEMON', '1') in ('0', 'false', 'off'):
+        return None
+    client = DaemonClient(socket_path)
+    if not os.path.exists(client.socket_path) or not client.available():
+        return None
+    return client
+
+
+# --- 데몬 실행 및 관리 명령 ---
+# python Pipeline_Daemon.py [serve | ping | stop] [--socket=<경로>]
+if __name__ == '__main__':
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    socket_args = [arg.split('=', 1)[1] for arg in sys.argv[1:] if arg.startswith('--socket=')]
+    socket_path = socket_args[0] if socket_args else None
+    command = args[0] if args else 'serve'
+
+    try:
+        if command == 'serve':
+            PipelineDaemon(socket_path).serve_forever()
+        elif command == 'ping':
+            print(json.dumps(DaemonClient(socket_path).call('ping'), indent=2))
+        elif command == 'stop':
+            DaemonClient(socket_path).call('shutdown', on_log=print)
+        else:
+            print(f"Unknown command: '{command}'")
+            print("Usage: python Pipeline_Daemon.py [serve | ping | stop] [--socket=<path>]")
+            sys.exit(1)
+    except DaemonError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
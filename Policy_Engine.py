@@ -1,85 +1,246 @@
-import yaml
-import copy
 import pprint
+import Yaml_Backend
+from collections import deque
+from collections.abc import Mapping
+from Blueprint_Overlay import BlueprintOverlay
+from Metrics import metrics
+
+
+# image_name_contains 조건들을 한 번에 검사하기 위한 다중 패턴 부분 문자열 매처 (Aho-Corasick).
+# 규칙 수와 관계없이 이미지 이름 길이에 비례하는 시간으로 매칭된 규칙 인덱스들을 찾습니다.
+class _MultiPatternMatcher:
+
+    def __init__(self):
+        self._goto = [{}]       # 상태별 전이 테이블
+        self._fail = [0]        # 실패 링크
+        self._output = [set()]  # 상태에서 끝나는 패턴들의 규칙 인덱스
+        self._always = set()    # 빈 패턴(모든 문자열에 포함됨)의 규칙 인덱스
+
+    def add(self, pattern: str, rule_index: int):
+        if not pattern:
+            self._always.add(rule_index)
+            return
+        state = 0
+        for char in pattern:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append(set())
+            state = next_state
+        self._output[state].add(rule_index)
+
+    # 모든 패턴을 추가한 뒤 한 번 호출하여 실패 링크를 계산합니다.
+    def build(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                candidate = self._goto[fallback].get(char, 0)
+                self._fail[next_state] = candidate if candidate != next_state else 0
+                self._output[next_state] |= self._output[self._fail[next_state]]
+
+    # 텍스트에 포함된 패턴들의 규칙 인덱스 집합을 반환합니다.
+    def find_all(self, text: str) -> set:
+        found = set(self._always)
+        if len(self._goto) == 1:
+            return found
+        state = 0
+        for char in text:
+            while state and char not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(char, 0)
+            if self._output[state]:
+                found |= self._output[state]
+        return found
+
+
+# 점 표기법 경로(예: 'spec.template.spec.containers.*.image')를 한 번만 컴파일해 둔 접근자.
+# - 숫자 키는 리스트 인덱스로 처리합니다. (예: containers.0.image)
+# - '*'는 리스트의 모든 원소 / 딕셔너리의 모든 값으로 펼쳐집니다. (예: 사이드카 포함 모든 컨테이너)
+# 값은 제너레이터로 하나씩 만들어지므로, 호출자는 첫 매칭에서 바로 멈출 수 있습니다.
+class _PathAccessor:
+    WILDCARD = '*'
+
+    def __init__(self, path: str):
+        self.path = path
+        self._steps = []
+        for key in path.split('.'):
+            if key == self.WILDCARD:
+                self._steps.append((self.WILDCARD, None))
+            elif key.isdigit(): # 키가 숫자면 리스트 인덱스로 처리
+                self._steps.append(('index', int(key)))
+            else:
+                self._steps.append(('key', key))
+
+    # 경로에 해당하는 값들을 차례로 생성합니다. 경로가 없으면 아무 값도 생성하지 않습니다.
+    def iter_values(self, data):
+        return self._walk(data, 0)
+
+    def _walk(self, current, step_index: int):
+        if step_index == len(self._steps):
+            yield current
+            return
+
+        step, key = self._steps[step_index]
+        if step == 'key':
+            if isinstance(current, Mapping) and key in current:
+                yield from self._walk(current[key], step_index + 1)
+        elif step == 'index':
+            if isinstance(current, list) and key < len(current):
+                yield from self._walk(current[key], step_index + 1)
+        elif isinstance(current, list):
+            for item in current:
+                yield from self._walk(item, step_index + 1)
+        elif isinstance(current, Mapping):
+            for value in current.values():
+                yield from self._walk(value, step_index + 1)
+
+    # 경로의 첫 번째 값을 반환합니다. 없으면 None.
+    def first(self, data):
+        return next(self.iter_values(data), None)
+
 
 class PolicyEngine:
+    @metrics.staged('policy_load', file='policy_file_path')
     def __init__(self, policy_file_path: str):
         try:
-            with open(policy_file_path, 'r', encoding='utf-8') as f:
-                self.policy_data = yaml.safe_load(f)
-                self.rules = self.policy_data.get('rules', [])
-                print(f"PolicyEngine: Successfully loaded {len(self.rules)} rules from '{policy_file_path}'")
+            self.policy_data = Yaml_Backend.load_file(policy_file_path)
+            self.rules = self.policy_data.get('rules', [])
+            print(f"PolicyEngine: Successfully loaded {len(self.rules)} rules from '{policy_file_path}'")
         except Exception as e:
             print(f"ERROR: PolicyEngine failed loading policy file: {e}")
             self.rules = []
 
+        self._compile_rules()
+
+    # 정책 로드 시 한 번만 실행되어 규칙들을 조건 유형별 인덱스로 컴파일합니다.
+    # 매칭 단계에서는 규칙 목록 전체를 순회하지 않고, 인덱스에서 후보 규칙만 찾아
+    # 가장 앞선 규칙(first-match-wins)을 선택합니다.
+    def _compile_rules(self):
+        self._image_matcher = _MultiPatternMatcher()
+        self._build_context_index = {}  # build_context 값 -> 규칙 인덱스 목록
+        self._k8s_kind_index = {}       # kind -> [(규칙 인덱스, 경로 접근자, value_contains), ...]
+
+        for index, rule in enumerate(self.rules):
+            condition = rule.get('condition') or {}
+
+            if 'image_name_contains' in condition:
+                self._image_matcher.add(str(condition['image_name_contains']), index)
+            if 'build_context' in condition:
+                try:
+                    self._build_context_index.setdefault(condition['build_context'], []).append(index)
+                except TypeError:
+                    print(f"Warning: Unhashable build_context in rule '{rule.get('name')}'. Rule ignored.")
+            if 'kubernetes_resource' in condition:
+                k8s_cond = condition['kubernetes_resource'] or {}
+                accessor = _PathAccessor(k8s_cond.get('path', ''))
+                value_contains = k8s_cond.get('value_contains', '')
+                self._k8s_kind_index.setdefault(k8s_cond.get('kind'), []).append((index, accessor, value_contains))
+
+        self._image_matcher.build()
+
     # (내부 헬퍼 함수) 점 표기법 경로를 사용하여 딕셔너리의 값을 가져옵니다.
+    # 와일드카드('*')가 있으면 첫 번째로 찾은 값을 반환합니다.
     def _get_value_by_path(self, data: dict, path: str):
-        keys = path.split('.')
-        current = data
-        for key in keys:
-            if key.isdigit(): # 키가 숫자면 리스트 인덱스로 처리
-                key = int(key)
-                if not isinstance(current, list) or key >= len(current):
-                    return None
-            elif not isinstance(current, dict) or key not in current:
-                return None
-            current = current[key]
-        return current
+        return _PathAccessor(path).first(data)
 
     # 도커 컴포즈 데이터에 정책을 적용합니다.
     def _apply_docker_compose_rules(self, data: dict) -> dict:
         
         services = data.get('services', {})
+        rules_evaluated = matched = 0
         for service_name, service_details in services.items():
-            for rule in self.rules:
-                condition = rule.get('condition', {})
-                action = rule.get('action', {})
-                match = False
-
-                # 도커 컴포즈 규칙 조건 매칭
-                if 'image_name_contains' in condition and condition['image_name_contains'] in service_details.get('image', ''):
-                    match = True
-                elif 'build_context' in condition:
-                    build_info = service_details.get('build', {})
-                    build_context = build_info if isinstance(build_info, str) else build_info.get('context')
-                    if condition['build_context'] == build_context:
-                        match = True
-                
-                if match:
-                    service_details['x-honeypot-policy'] = action
-                    print(f"  - Tagged policy '{rule.get('name')}' on service '{service_name}'")
-                    break
+            rule_index, candidates = self._match_service(service_details)
+            rules_evaluated += candidates
+            if rule_index is None:
+                continue
+
+            rule = self.rules[rule_index]
+            service_details['x-honeypot-policy'] = rule.get('action', {})
+            matched += 1
+            print(f"  - Tagged policy '{rule.get('name')}' on service '{service_name}'")
+
+        metrics.incr('services_evaluated', len(services))
+        metrics.incr('rules_evaluated', rules_evaluated)
+        metrics.incr('services_matched', matched)
         return data
 
+    # (내부 함수) 서비스에 매칭되는 가장 앞선 규칙의 인덱스와, 인덱스에서 찾은 후보 규칙 수를 반환합니다.
+    def _match_service(self, service_details: dict):
+        image = service_details.get('image', '')
+        candidates = self._image_matcher.find_all(image) if isinstance(image, str) else set()
+
+        build_info = service_details.get('build', {})
+        build_context = build_info if isinstance(build_info, str) else build_info.get('context')
+        try:
+            candidates.update(self._build_context_index.get(build_context, ()))
+        except TypeError:
+            pass
+
+        return (min(candidates) if candidates else None), len(candidates)
+
+    # 서비스에 적용될 규칙(매칭되는 가장 앞선 규칙)을 반환합니다. 없으면 None. (의존성 그래프 기록용)
+    def match_rule(self, service_details: dict):
+        rule_index, _ = self._match_service(service_details)
+        return None if rule_index is None else self.rules[rule_index]
+
     # 쿠버네티스 리소스 리스트에 정책을 적용합니다.
     def _apply_kubernetes_rules(self, resource_list: list) -> list:
         
         for resource in resource_list:
-            for rule in self.rules:
-                condition = rule.get('condition', {})
-                action = rule.get('action', {})
-                match = False
-
-                # 쿠버네티스 규칙 조건 매칭
-                if 'kubernetes_resource' in condition:
-                    k8s_cond = condition['kubernetes_resource']
-                    if resource.get('kind') == k8s_cond.get('kind'):
-                        value = self._get_value_by_path(resource, k8s_cond.get('path', ''))
-                        
-                        # Fixed part: 논리적으로 잘못된 비교 구문 수정
-                        # 'value'가 존재하고, 'value_contains' 문자열을 포함하는지 확인
-                        if value and k8s_cond.get('value_contains', '') in str(value):
-                            match = True
-                
-                if match:
-                    resource['x-honeypot-policy'] = action
-                    # Fixed part: 'metedata' 오타 수정
-                    resource_name = resource.get('metadata', {}).get('name', '[unknown]')
-                    print(f"  - Tagged policy '{rule.get('name')}' on resource '{resource_name}'")
-                    break
+            self._tag_resource(resource)
         return resource_list
 
+    # (내부 함수) 리소스 하나에 첫 매칭 규칙의 action을 태깅합니다.
+    def _tag_resource(self, resource: dict):
+        rule_index, rules_evaluated = self._match_resource(resource)
+        metrics.incr('resources_evaluated')
+        metrics.incr('rules_evaluated', rules_evaluated)
+        if rule_index is None:
+            return
+        metrics.incr('resources_matched')
+
+        rule = self.rules[rule_index]
+        resource['x-honeypot-policy'] = rule.get('action', {})
+        # Fixed part: 'metedata' 오타 수정
+        resource_name = resource.get('metadata', {}).get('name', '[unknown]')
+        print(f"  - Tagged policy '{rule.get('name')}' on resource '{resource_name}'")
+
+    # 쿠버네티스 리소스 스트림(예: KubernetesParser.iter_resources)에 정책을 적용하면서
+    # 태깅된 리소스를 하나씩 생성합니다. 전체 리소스를 리스트로 모으지 않습니다.
+    def apply_iter(self, resources):
+        for resource in resources:
+            if not isinstance(resource, Mapping):
+                yield resource
+                continue
+            tagged_resource = BlueprintOverlay(resource)
+            self._tag_resource(tagged_resource)
+            yield tagged_resource
+
+    # (내부 함수) 리소스의 kind 버킷에 있는 규칙만 순서대로 검사하여
+    # 첫 매칭 규칙의 인덱스와 검사한 규칙 수를 반환합니다.
+    def _match_resource(self, resource: dict):
+        try:
+            bucket = self._k8s_kind_index.get(resource.get('kind'), ())
+        except TypeError:
+            return None, 0
+
+        for checked, (rule_index, accessor, value_contains) in enumerate(bucket, 1):
+            # 경로의 값(와일드카드면 여러 값) 중 하나라도 존재하고
+            # 'value_contains' 문자열을 포함하면 첫 매칭에서 바로 멈춤
+            for value in accessor.iter_values(resource):
+                if value and value_contains in str(value):
+                    return rule_index, checked
+        return None, len(bucket)
+
+    @metrics.staged('tag')
     def apply(self, parsed_data) -> any:
         
         # 파싱된 데이터의 각 서비스/리소스에 어떤 정책을 적용해야 하는지 '태깅'합니다.
@@ -88,17 +249,17 @@ class PolicyEngine:
         print("PolicyEngine: Applying policies by tagging...")
         
         # Fixed part: 입력 데이터 유형에 따라 다른 처리 로직을 호출하도록 전체 구조 변경
-        tagged_data = copy.deepcopy(parsed_data)
-
-        if isinstance(tagged_data, list):
+        # 원본을 깊은 복사하지 않고, 태그는 원본 위의 오버레이에만 기록합니다.
+        if isinstance(parsed_data, list):
             # 입력이 리스트이면 쿠버네티스 데이터로 간주
+            tagged_data = [BlueprintOverlay(item) if isinstance(item, Mapping) else item for item in parsed_data]
             return self._apply_kubernetes_rules(tagged_data)
-        elif isinstance(tagged_data, dict) and 'services' in tagged_data:
+        elif isinstance(parsed_data, Mapping) and 'services' in parsed_data:
             # 입력이 'services' 키를 가진 딕셔너리이면 도커 컴포즈 데이터로 간주
-            return self._apply_docker_compose_rules(tagged_data)
+            return self._apply_docker_compose_rules(BlueprintOverlay(parsed_data))
         else:
             print("Warning: Unrecognized data structure. No policies applied.")
-            return tagged_data
+            return BlueprintOverlay(parsed_data) if isinstance(parsed_data, Mapping) else parsed_data
         
 if __name__ == '__main__':
     from IaC_Parser import IaCParser
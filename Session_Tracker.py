@@ -0,0 +1,260 @@
+import os
+import re
+import sys
+import json
+import time
+import select
+from datetime import datetime
+from collections import OrderedDict
+
+from Attack_Log_Store import extract_source_ip
+
+# 허니팟 요청 기록을 공격자 세션 단위로 묶는 스트리밍 처리기.
+# (출발지 IP, 태그 그룹)마다 세션을 하나 두고, idle_timeout초 동안 요청이 없으면 세션을 닫아 요약을 내보냅니다.
+#
+# 메모리 사용량은 입력량과 관계없이 제한됩니다.
+#  - 열린 세션은 최근 활동 순서의 OrderedDict에 보관하고, max_sessions를 넘으면 가장 오래 조용한 세션부터 닫습니다.
+#    (수백만 개의 IP에서 오는 스캔 폭주도 최대 max_sessions개의 세션만 메모리에 유지)
+#  - 세션마다 경로는 max_paths개, 사용자 에이전트는 max_agents개까지만 기록하고 나머지는 개수만 셉니다.
+#  - max_session_seconds보다 길게 이어지는 세션은 중간에 잘라서 내보냅니다.
+#
+# 시간은 기록의 시각(이벤트 시간)을 기준으로 하며, 지금까지 본 가장 늦은 시각(watermark)에서
+# idle_timeout초 이상 지난 세션을 닫습니다.
+
+REQUEST_LINE = re.compile(r'"([A-Z]{3,10}) (\S+)(?: HTTP/[\d.]+)?" (\d{3})')
+LEGACY_REQUEST = re.compile(r'Request from \S+: ([A-Z]{3,10}) (?:https?://[^/\s]+)?(\S*) \|')
+
+# 기록에서 (메서드, 경로, 상태 코드, 사용자 에이전트)를 꺼냅니다. 알 수 없는 값은 None.
+# 가짜 앱의 구조화된 기록, nginx 접근 로그 줄, 예전 'Request from ...' 텍스트 로그를 지원합니다.
+def request_fields(record: dict):
+    if 'path' in record or 'method' in record:
+        headers = record.get('headers') or {}
+        return record.get('method'), record.get('path'), record.get('status'), headers.get('User-Agent')
+    message = record.get('log') or record.get('message') or ''
+    if not isinstance(message, str):
+        return None, None, None, None
+    match = REQUEST_LINE.search(message)
+    if match:
+        agent = re.search(r'"[^"]*" "([^"]*)"\s*$', message) # combined 형식의 마지막 필드
+        return match.group(1), match.group(2), int(match.group(3)), agent.group(1) if agent else None
+    match = LEGACY_REQUEST.search(message)
+    if match:
+        agent = re.search(r"'User-Agent': '([^']*)'", message)
+        return match.group(1), match.group(2).split('?', 1)[0] or '/', None, agent.group(1) if agent else None
+    return None, None, None, None
+
+class SessionTracker:
+
+    # :param on_session: 세션이 닫힐 때마다 요약(dict)을 받는 함수. None이면 closed 목록에 쌓음
+    # :param tag_depth: 세션을 나누는 태그 앞부분의 길이 (1이면 'honeypot' → 한 배포의 모든 미끼를 한 세션으로)
+    def __init__(self, idle_timeout: float = 300, max_sessions: int = 100000, max_paths: int = 50,
+                 max_agents: int = 5, max_session_seconds: float = 3600, tag_depth: int = 1, on_session=None):
+        self.idle_timeout = idle_timeout
+        self.max_sessions = max_sessions
+        self.max_paths = max_paths
+        self.max_agents = max_agents
+        self.max_session_seconds = max_session_seconds
+        self.tag_depth = tag_depth
+        self.on_session = on_session
+        self.closed = []
+        self.watermark = float('-inf')
+        self.skipped = 0   # 출발지 IP를 알 수 없어 건너뛴 기록 수
+        self.evicted = 0   # max_sessions 때문에 일찍 닫힌 세션 수
+        self._sessions = OrderedDict() # (ip, 태그 그룹) -> 세션 상태 (최근 활동 순서)
+
+    # 기록 한 건을 반영합니다.
+    def observe(self, timestamp: float, tag: str, record: dict, source_ip: str = None):
+        source_ip = source_ip or extract_source_ip(record)
+        if not source_ip:
+            self.skipped += 1
+            return
+        tag_parts = tag.split('.')
+        key = (source_ip, '.'.join(tag_parts[:self.tag_depth]))
+        decoy = tag_parts[self.tag_depth] if len(tag_parts) > self.tag_depth else tag
+
+        session = self._sessions.get(key)
+        if session is not None and (timestamp - session['last_seen'] > self.idle_timeout
+                                    or timestamp - session['first_seen'] > self.max_session_seconds):
+            self._close(key, 'idle' if timestamp - session['last_seen'] > self.idle_timeout else 'max_duration')
+            session = None
+        if session is None:
+            session = self._new_session(timestamp)
+            self._sessions[key] = session
+            if len(self._sessions) > self.max_sessions:
+                self.evicted += 1
+                self._close(next(iter(self._sessions)), 'evicted')
+        else:
+            self._sessions.move_to_end(key)
+
+        method, path, status, agent = request_fields(record)
+        session['requests'] += 1
+        session['first_seen'] = min(session['first_seen'], timestamp)
+        session['last_seen'] = max(session['last_seen'], timestamp)
+        _count_bounded(session['decoys'], decoy, self.max_paths)
+        if method:
+            _count_bounded(session['methods'], method, 16)
+        if status is not None:
+            _count_bounded(session['statuses'], str(status), 16)
+        if path is not None and not _count_bounded(session['paths'], path, self.max_paths):
+            session['paths_dropped'] += 1
+        if agent and agent not in session['agents'] and len(session['agents']) < self.max_agents:
+            session['agents'].append(agent)
+
+        if timestamp > self.watermark:
+            self.watermark = timestamp
+            self.expire()
+
+    # watermark(또는 now)에서 idle_timeout초 넘게 조용한 세션을 닫습니다.
+    # 입력이 한동안 없을 때도 세션을 내보내려면 벽시계 기준 시각을 now로 넘겨 호출합니다.
+    def expire(self, now: float = None):
+        horizon = (self.watermark if now is None else now) - self.idle_timeout
+        # 최근 활동 순서이므로 앞에서부터 조용한 세션만 확인하면 됨
+        while self._sessions:
+            key, session = next(iter(self._sessions.items()))
+            if session['last_seen'] >= horizon:
+                break
+            self._close(key, 'idle')
+
+    # 열린 세션을 모두 닫습니다. (입력이 끝났을 때)
+    def flush(self):
+        while self._sessions:
+            self._close(next(iter(self._sessions)), 'flush')
+
+    @property
+    def open_sessions(self) -> int:
+        return len(self._sessions)
+
+    def _new_session(self, timestamp: float) -> dict:
+        return {
+            'first_seen': timestamp,
+            'last_seen': timestamp,
+            'requests': 0,
+            'paths': {},
+            'paths_dropped': 0,
+            'decoys': {},
+            'methods': {},
+            'statuses': {},
+            'agents': [],
+        }
+
+    def _close(self, key, reason: str):
+        session = self._sessions.pop(key)
+        source_ip, tag_group = key
+        summary = {
+            'source_ip': source_ip,
+            'tag': tag_group,
+            'start': session['first_seen'],
+            'end': session['last_seen'],
+            'duration': round(session['last_seen'] - session['first_seen'], 3),
+            'requests': session['requests'],
+            'decoys': sorted(session['decoys']),
+            'paths': [path for path, _ in sorted(session['paths'].items(), key=lambda item: -item[1])],
+            'paths_dropped': session['paths_dropped'], # max_paths를 넘어 경로를 기록하지 못한 요청 수
+            'methods': session['methods'],
+            'statuses': session['statuses'],
+            'user_agents': session['agents'],
+            'closed': reason,
+        }
+        if self.on_session is not None:
+            self.on_session(summary)
+        else:
+            self.closed.append(summary)
+
+# 상한이 있는 카운터: 이미 있는 키이거나 자리가 남아 있으면 센 뒤 True, 가득 찼으면 False.
+def _count_bounded(counter: dict, key, limit: int) -> bool:
+    if key in counter:
+        counter[key] += 1
+        return True
+    if len(counter) >= limit:
+        return False
+    counter[key] = 1
+    return True
+
+# JSON 한 줄을 (시각, 태그, 기록, 출발지 IP)로 바꿉니다.
+# Attack_Log_Store.py query --json 출력과 fluentd 파일 출력(fluentd_time/fluentd_tag) 형식을 모두 받습니다.
+def parse_line(line: bytes):
+    try:
+        document = json.loads(line)
+    except ValueError:
+        return None
+    if not isinstance(document, dict):
+        return None
+    if 'record' in document and 'time' in document:
+        return float(document['time']), document.get('tag') or 'honeypot', document['record'], document.get('source_ip')
+    record = dict(document)
+    timestamp = record.pop('fluentd_time', None)
+    tag = record.pop('fluentd_tag', None) or 'honeypot'
+    try:
+        timestamp = float(timestamp) if timestamp is not None else time.time()
+    except (TypeError, ValueError):
+        timestamp = time.time()
+    return timestamp, tag, record, None
+
+# 세션 요약 한 건을 한 줄로 출력합니다.
+def format_session(summary: dict) -> str:
+    start = datetime.fromtimestamp(summary['start']).strftime('%Y-%m-%d %H:%M:%S')
+    paths = ', '.join(summary['paths'][:5]) + (' ...' if len(summary['paths']) > 5 or summary['paths_dropped'] else '')
+    count = f"{len(summary['paths'])}{'+' if summary['paths_dropped'] else ''}"
+    return (f"{start}  {summary['source_ip']:<16} {summary['requests']:>6} reqs  {summary['duration']:>8.1f}s  "
+            f"decoys={','.join(summary['decoys'])}  paths[{count}]={paths}  ({summary['closed']})")
+
+# 입력 스트림(파일 디스크립터)을 읽으며 세션을 만듭니다.
+# 입력이 잠시 멈춘 동안에도 벽시계로 watermark를 밀어 조용한 세션을 내보냅니다.
+def run_stream(tracker: SessionTracker, fd: int, poll_interval: float = 1.0):
+    pending = b''
+    last_input = time.monotonic()
+    while True:
+        ready, _, _ = select.select([fd], [], [], poll_interval)
+        if not ready:
+            if tracker.watermark != float('-inf'):
+                tracker.expire(tracker.watermark + (time.monotonic() - last_input))
+            continue
+        chunk = os.read(fd, 1024 * 1024)
+        if not chunk:
+            break
+        last_input = time.monotonic()
+        lines = (pending + chunk).split(b'\n')
+        pending = lines.pop()
+        for line in lines:
+            parsed = parse_line(line) if line.strip() else None
+            if parsed:
+                tracker.observe(parsed[0], parsed[1], parsed[2], parsed[3])
+    if pending.strip():
+        parsed = parse_line(pending)
+        if parsed:
+            tracker.observe(parsed[0], parsed[1], parsed[2], parsed[3])
+    tracker.flush()
+
+
+# --- 세션 요약 명령 ---
+# JSON 한 줄씩 된 기록을 표준 입력이나 파일에서 읽어, 세션이 닫힐 때마다 요약을 출력합니다.
+# python Session_Tracker.py [파일 ...] [--idle=300] [--max-sessions=100000] [--json]
+# 예) tail -F fluentd/log/honeypot*.log | python Session_Tracker.py
+#     python Attack_Log_Store.py query --since=1d --json | python Session_Tracker.py --json
+if __name__ == '__main__':
+    files = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    options = dict(arg[2:].split('=', 1) if '=' in arg else (arg[2:], '') for arg in sys.argv[1:] if arg.startswith('--'))
+    as_json = 'json' in options
+
+    def print_session(summary: dict):
+        print(json.dumps(summary, ensure_ascii=False) if as_json else format_session(summary), flush=True)
+
+    tracker = SessionTracker(
+        idle_timeout=float(options.get('idle', 300)),
+        max_sessions=int(options.get('max-sessions', 100000)),
+        on_session=print_session,
+    )
+    try:
+        if files and files != ['-']:
+            for path in files:
+                with open(path, 'rb') as f:
+                    for line in f:
+                        parsed = parse_line(line)
+                        if parsed:
+                            tracker.observe(parsed[0], parsed[1], parsed[2], parsed[3])
+            tracker.flush()
+        else:
+            run_stream(tracker, sys.stdin.fileno())
+    except KeyboardInterrupt:
+        tracker.flush()
+    print(f"Sessions evicted early: {tracker.evicted}, records without a source IP: {tracker.skipped}", file=sys.stderr)
@@ -0,0 +1,318 @@
+import json
+import time
+import queue
+import threading
+import http.client
+from Docker_Engine_Backend import (DockerEngineClient, DockerEngineError, compose_project_name,
+                                   LABEL_PROJECT, LABEL_SERVICE, LABEL_ONEOFF)
+
+# 도커 이벤트의 action → 컨테이너 상태 (목록에 없는 action은 상태를 바꾸지 않음)
+ACTION_STATES = {
+    'create': 'created',
+    'start': 'running',
+    'restart': 'running',
+    'unpause': 'running',
+    'pause': 'paused',
+    'die': 'exited',
+    'stop': 'exited',
+}
+
+# Docker Engine API의 /events 스트림에서 프로젝트 컨테이너 이벤트를 받아오는 이벤트 소스.
+# 이벤트 스트림은 오래 열려 있으므로 배포용 연결 풀과 따로, 타임아웃 없는 전용 연결을 사용합니다.
+class DockerEventsSource:
+
+    def __init__(self, project_name: str, socket_path: str = None):
+        self.project_name = project_name
+        self.client = DockerEngineClient(socket_path, pool_size=1, timeout=None)
+
+    # 현재 컨테이너 목록을 {'id', 'service', 'name', 'state', 'health'} 목록으로 반환합니다.
+    def initial_state(self) -> list:
+        rows = []
+        for container in self.client.list_containers([f"{LABEL_PROJECT}={self.project_name}"]):
+            labels = container.get('Labels') or {}
+            if labels.get(LABEL_ONEOFF) == 'True':
+                continue
+            health = None
+            if container.get('State') == 'running':
+                # 목록 API는 health를 Status 문자열에만 담아 주므로, 실행 중인 컨테이너만 상세 조회
+                state = self.client.inspect_container(container['Id'])['State']
+                health = (state.get('Health') or {}).get('Status')
+            rows.append({'id': container['Id'], 'service': labels.get(LABEL_SERVICE, ''),
+                         'name': (container.get('Names') or [''])[0].lstrip('/'),
+                         'state': container.get('State'), 'health': health})
+        return rows
+
+    # 컨테이너의 현재 헬스 상태. 헬스체크가 없으면 None.
+    def health_of(self, container_id: str):
+        try:
+            state = self.client.inspect_container(container_id)['State']
+        except (OSError, DockerEngineError, http.client.HTTPException):
+            return None
+        return (state.get('Health') or {}).get('Status')
+
+    # since(유닉스 시각) 이후의 컨테이너 이벤트를 하나씩 생성합니다. 연결이 끊기면 예외로 끝납니다.
+    def events(self, since: float = None):
+        filters = {'type': ['container'], 'label': [f"{LABEL_PROJECT}={self.project_name}"]}
+        params = {'filters': json.dumps(filters)}
+        if since is not None:
+            params['since'] = f"{since:.6f}"
+        yield from self.client.request_stream('GET', '/events', params)
+
+    # 열려 있는 이벤트 스트림 연결을 끊습니다. (구독 스레드의 읽기가 끝나고 예외로 빠져나옴)
+    def close(self):
+        self.client.close()
+
+# 테스트용 이벤트 소스. push()로 넣은 이벤트를 그대로 전달합니다.
+#   source = FakeEventsSource([{'id': 'c1', 'service': 'api', 'state': 'running', 'health': 'starting'}])
+#   source.push(FakeEventsSource.event('api', 'health_status: healthy', container_id='c1'))
+class FakeEventsSource:
+
+    def __init__(self, initial: list = None, healthchecks: dict = None):
+        self.initial = list(initial or [])
+        self.healthchecks = dict(healthchecks or {})
+        self._queue = queue.Queue()
+
+    def initial_state(self) -> list:
+        return [dict(row) for row in self.initial]
+
+    # 헬스체크가 있는 것으로 취급할 컨테이너 ID -> 시작 직후 헬스 상태 (기본값: 헬스체크 없음)
+    def health_of(self, container_id: str):
+        return self.healthchecks.get(container_id)
+
+    def events(self, since: float = None):
+        while True:
+            event = self._queue.get()
+            if event is None:
+                return
+            yield event
+
+    def push(self, event: dict):
+        self._queue.put(event)
+
+    def close(self):
+        self._queue.put(None)
+
+    # 도커 /events 형식의 컨테이너 이벤트를 만듭니다.
+    @staticmethod
+    def event(service: str, action: str, container_id: str = None, name: str = None) -> dict:
+        return {'Type': 'container', 'Action': action, 'time': int(time.time()), 'timeNano': time.time_ns(),
+                'Actor': {'ID': container_id or f"{service}-id",
+                          'Attributes': {LABEL_SERVICE: service, 'name': name or service}}}
+
+# 이벤트 스트림을 한 번만 구독해 서비스별 컨테이너 상태/헬스를 메모리에 유지하는 상태 서비스.
+# 상태 조회는 CLI를 실행하지 않고 표를 읽기만 하므로 대시보드가 자주 물어봐도 비용이 거의 없습니다.
+#
+#   service = StatusService.for_compose_file('deception-compose.yml').start()
+#   service.is_healthy('api')
+#   service.subscribe(lambda name, old, new: print(name, new['state'], new['health']))
+class StatusService:
+
+    # :param source: DockerEventsSource 또는 FakeEventsSource
+    # :param reconnect_delay: 이벤트 스트림이 끊겼을 때 다시 연결하기 전 최초 대기 시간(초, 최대 30초까지 늘어남)
+    def __init__(self, source, reconnect_delay: float = 1.0):
+        self.source = source
+        self.reconnect_delay = reconnect_delay
+        self._services = {}      # 서비스 이름 -> {'id', 'name', 'state', 'health', 'updated'}
+        self._subscribers = []
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+        self._changed = threading.Condition(self._lock)
+        self._stopped = threading.Event()
+        self._thread = None
+
+    # 실제 도커 데몬의 이벤트를 구독하는 상태 서비스를 만듭니다.
+    @classmethod
+    def for_compose_file(cls, compose_file_path: str, project_name: str = None, socket_path: str = None):
+        return cls(DockerEventsSource(compose_project_name(compose_file_path, project_name), socket_path))
+
+    # 백그라운드 스레드에서 구독을 시작합니다. 최초 상태를 읽을 때까지 최대 ready_timeout초 기다립니다.
+    def start(self, ready_timeout: float = 5.0):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='status-service', daemon=True)
+            self._thread.start()
+            self._ready.wait(ready_timeout)
+        return self
+
+    def stop(self):
+        self._stopped.set()
+        self.source.close()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    # 최초 상태를 읽었는지 여부 (False이면 조회 결과가 비어 있을 수 있음)
+    @property
+    def ready(self) -> bool:
+        return self._ready.is_set()
+
+    # 서비스 하나의 상태를 반환합니다. 모르는 서비스면 None.
+    def get(self, service_name: str):
+        with self._lock:
+            entry = self._services.get(service_name)
+            return dict(entry) if entry else None
+
+    # 실행 중이고, 헬스체크가 있다면 healthy인 경우 True
+    def is_healthy(self, service_name: str) -> bool:
+        with self._lock:
+            entry = self._services.get(service_name)
+            return bool(entry) and entry['state'] == 'running' and entry['health'] in (None, 'healthy')
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {name: dict(entry) for name, entry in self._services.items()}
+
+    # 상태가 바뀔 때마다 callback(서비스 이름, 이전 상태 또는 None, 새 상태 또는 None)을 호출합니다.
+    # 콜백은 이벤트 스레드에서 호출되므로 오래 걸리는 작업을 하면 안 됩니다. 구독 해제 함수를 반환합니다.
+    def subscribe(self, callback):
+        with self._lock:
+            self._subscribers.append(callback)
+
+        def unsubscribe():
+            with self._lock:
+                if callback in self._subscribers:
+                    self._subscribers.remove(callback)
+        return unsubscribe
+
+    # 서비스가 healthy가 될 때까지 기다립니다. 시간 안에 되지 않으면 False.
+    def wait_until_healthy(self, service_name: str, timeout: float = 60) -> bool:
+        deadline = time.monotonic() + timeout
+        with self._changed:
+            while True:
+                entry = self._services.get(service_name)
+                if entry and entry['state'] == 'running' and entry['health'] in (None, 'healthy'):
+                    return True
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._changed.wait(remaining)
+
+    # 상태 표를 docker-compose ps와 비슷한 형식으로 출력합니다.
+    def print_table(self):
+        print(f"{'SERVICE':<16} {'NAME':<32} {'STATE':<10} HEALTH")
+        for name, entry in sorted(self.snapshot().items()):
+            print(f"{name:<16} {entry['name'] or '':<32} {entry['state'] or '':<10} {entry['health'] or '-'}")
+
+    # (내부 함수) 최초 상태를 읽고 이벤트를 계속 반영합니다. 연결이 끊기면 상태를 다시 읽고 재구독합니다.
+    def _run(self):
+        delay = self.reconnect_delay
+        while not self._stopped.is_set():
+            try:
+                since = time.time()
+                self._load_initial(self.source.initial_state())
+                self._ready.set()
+                delay = self.reconnect_delay
+                # 목록을 읽는 동안 발생한 이벤트도 놓치지 않도록 목록을 읽기 직전 시각부터 구독합니다.
+                for event in self.source.events(since):
+                    if self._stopped.is_set():
+                        return
+                    self._apply_event(event)
+                if self._stopped.is_set():
+                    return
+                print(f"Warning: Docker events stream closed. Reconnecting in {delay:.0f}s...")
+            except (OSError, DockerEngineError, http.client.HTTPException, ValueError) as e:
+                if self._stopped.is_set():
+                    return
+                print(f"Warning: Docker events stream interrupted ({e}). Reconnecting in {delay:.0f}s...")
+            self._stopped.wait(delay)
+            delay = min(delay * 2, 30)
+
+    def _load_initial(self, rows: list):
+        now = time.time()
+        table = {row['service']: {'id': row.get('id'), 'name': row.get('name'), 'state': row.get('state'),
+                                  'health': row.get('health'), 'updated': now}
+                 for row in rows if row.get('service')}
+        with self._lock:
+            changes = [(name, self._services.get(name), table.get(name))
+                       for name in set(self._services) | set(table)
+                       if self._services.get(name, {}).get('state') != table.get(name, {}).get('state')
+                       or self._services.get(name, {}).get('health') != table.get(name, {}).get('health')]
+            self._services = table
+            self._changed.notify_all()
+        self._notify(changes)
+
+    # (내부 함수) 도커 이벤트 하나를 상태 표에 반영합니다.
+    # 재생성으로 교체된 이전 컨테이너의 늦은 이벤트(stop, destroy 등)는 무시합니다.
+    def _apply_event(self, event: dict):
+        if event.get('Type', 'container') != 'container':
+            return
+        actor = event.get('Actor') or {}
+        attributes = actor.get('Attributes') or {}
+        service_name = attributes.get(LABEL_SERVICE)
+        if not service_name or attributes.get(LABEL_ONEOFF) == 'True':
+            return
+
+        container_id = actor.get('ID')
+        action = event.get('Action') or event.get('status') or ''
+        # 시작 직후에는 아직 health_status 이벤트가 없으므로, 헬스체크가 있는 컨테이너인지 소스에 물어봄
+        start_health = self.source.health_of(container_id) if action in ('start', 'restart') else None
+
+        with self._lock:
+            old = self._services.get(service_name)
+            is_current = old is None or old.get('id') in (None, container_id)
+
+            if action.startswith('health_status:'):
+                if not is_current:
+                    return
+                entry = dict(old or self._new_entry(container_id, attributes))
+                entry['health'] = action.split(':', 1)[1].strip()
+            elif action == 'destroy':
+                if old is None or not is_current:
+                    return
+                entry = None
+            elif ACTION_STATES.get(action):
+                if action == 'create' or not is_current:
+                    if action not in ('create', 'start', 'restart'):
+                        return
+                    entry = self._new_entry(container_id, attributes) # 새 컨테이너로 교체됨
+                else:
+                    entry = dict(old or self._new_entry(container_id, attributes))
+                entry['state'] = ACTION_STATES[action]
+                if action in ('start', 'restart'):
+                    entry['health'] = start_health
+                elif entry['state'] != 'running':
+                    entry['health'] = None
+            else:
+                return
+
+            if entry is None:
+                self._services.pop(service_name, None)
+            else:
+                entry['updated'] = event.get('timeNano', time.time_ns()) / 1e9
+                self._services[service_name] = entry
+            self._changed.notify_all()
+        self._notify([(service_name, old, entry)])
+
+    @staticmethod
+    def _new_entry(container_id, attributes: dict) -> dict:
+        return {'id': container_id, 'name': attributes.get('name'), 'state': None, 'health': None, 'updated': None}
+
+    def _notify(self, changes: list):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for name, old, new in changes:
+            for callback in subscribers:
+                try:
+                    callback(name, dict(old) if old else None, dict(new) if new else None)
+                except Exception as e:
+                    print(f"Warning: Status subscriber failed: {e}")
+
+
+if __name__ == '__main__':
+    import sys
+
+    # python Status_Service.py [compose 파일] [--socket=<경로>]
+    # 프로젝트 컨테이너의 상태 변화를 실시간으로 출력합니다.
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    socket_args = [arg.split('=', 1)[1] for arg in sys.argv[1:] if arg.startswith('--socket=')]
+    service = StatusService.for_compose_file(args[0] if args else 'deception-compose.yml',
+                                             socket_path=socket_args[0] if socket_args else None)
+    service.subscribe(lambda name, old, new: print(
+        f"[STATUS] {name}: {(old or {}).get('state')}/{(old or {}).get('health')} -> "
+        f"{(new or {}).get('state')}/{(new or {}).get('health')}"))
+    service.start()
+    service.print_table()
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        service.stop()
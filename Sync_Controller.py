@@ -1,80 +1,334 @@
+import os
+import sys
 import time
-import subprocess
+import pprint
+import threading
 from pathlib import Path
 from watchdog.observers import Observer
 from watchdog.events import FileSystemEventHandler
 
 # --- 새로운 import ---
-# 수동 제어 모드 전환을 위해 main.py의 함수를 직접 임포트
-from main import start_interactive_control 
+# 수동 제어 모드 전환 및 파이프라인 인-프로세스 실행을 위해 main.py의 함수를 직접 임포트
+from main import start_interactive_control, run_pipeline_generation
 # 자동 재배포를 위해 DeploymentActuator 임포트
-from Deployer import DeploymentActuator 
+from Deployer import DeploymentActuator
+# 이전/새 청사진 비교를 위해 BlueprintDiffer 임포트
+from Blueprint_Diff import BlueprintDiffer
+# 정책을 한 번만 컴파일해 두고 재사용하기 위해 PolicyEngine 임포트
+from Policy_Engine import PolicyEngine
+# 파이프라인 데몬이 떠 있으면 재생성/재배포를 데몬에 맡김
+from Pipeline_Daemon import connect_daemon, DaemonError, DaemonUnavailable
+# 정책/가짜 앱/Dockerfile/쿠버네티스 Manifest 변경 시 영향받는 서비스만 고르기 위해 의존성 그래프 임포트
+from Dependency_Graph import DependencyGraph, DEPENDENCY_FILE
+from IaC_Parser import IaCParser
+from Kubernetes_Parser import KubernetesParser
 
-PIPELINE_SCRIPT = "main.py"
 TARGET_FILE = "docker-compose.yml"
+POLICY_FILE = "policy.yml"
 OUTPUT_FILE = "deception-compose.yml"
+K8S_DIR = "k8s"
+K8S_POLICY_FILE = "policy_k8s.yml"
+IGNORED_SUFFIXES = ('.pyc', '.swp', '.swx', '.tmp', '~') # 편집기/인터프리터가 만드는 파일은 변경으로 보지 않음
+DEBOUNCE_SECONDS = 0.5 # 이 시간 안에 연속으로 발생한 이벤트는 한 번의 실행으로 합칩니다.
+
+# 짧은 시간 안에 몰려오는 이벤트를 한 번의 실행으로 합치는 디바운서.
+# 실행 중에 들어온 요청은 최대 한 번의 후속 실행으로만 예약됩니다.
+class DebouncedRunner:
+
+    def __init__(self, callback, window: float = DEBOUNCE_SECONDS):
+        self.callback = callback
+        self.window = window
+        self._lock = threading.Lock()
+        self._timer = None
+        self._running = False
+        self._pending = False
+
+    # 이벤트가 들어올 때마다 호출합니다. 마지막 이벤트로부터 window 초 뒤에 실행됩니다.
+    def trigger(self):
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+            self._timer = threading.Timer(self.window, self._fire)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def cancel(self):
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+
+    # (내부 함수) 디바운스 타이머가 만료되면 실행됩니다.
+    def _fire(self):
+        with self._lock:
+            self._timer = None
+            if self._running:
+                # 이미 실행 중이면 후속 실행 하나만 예약 (여러 번 들어와도 하나로 합침)
+                self._pending = True
+                return
+            self._running = True
+
+        while True:
+            try:
+                self.callback()
+            except Exception as e:
+                print(f"[ERROR]: Re-deployment run failed: {e}")
+
+            with self._lock:
+                if not self._pending:
+                    self._running = False
+                    return
+                self._pending = False
 
 # 파일 변경 시 자동 재배포까지 수행하는 핸들러
+# 의존성 그래프에 기록된 모든 입력(원본 컴포즈 파일, 정책 파일, 가짜 앱 트리, 원본 Dockerfile,
+# 쿠버네티스 Manifest)을 감시하고, 바뀐 입력에 의존하는 서비스만 다시 생성/배포합니다.
 class ChangeHandler(FileSystemEventHandler):
-    
-    def __init__(self, filename):
+
+    # :param client: 파이프라인 데몬 클라이언트. 있으면 재생성/재배포를 데몬에 요청 (실패하면 직접 실행)
+    def __init__(self, filename, policy_file=POLICY_FILE, debounce_seconds=DEBOUNCE_SECONDS, client=None,
+                 k8s_dir=K8S_DIR, k8s_policy_file=K8S_POLICY_FILE, strategy=None):
         self.filename_to_watch = filename
-        # 액츄에이터를 미리 생성해 둠
-        self.actuator = DeploymentActuator(OUTPUT_FILE)
-        print(f"Watching for changes in: {self.filename_to_watch}")
+        self.policy_file = policy_file
+        self.client = client
+        self.strategy = strategy
+        self.k8s_dir = k8s_dir if os.path.isdir(k8s_dir) else None
+        self.k8s_policy_file = k8s_policy_file
+        # 액츄에이터를 미리 생성해 둠 (strategy='bluegreen'이면 새 세대를 띄운 뒤 전환하여 응답 공백이 없음)
+        self.actuator = DeploymentActuator(OUTPUT_FILE, strategy=strategy)
+        self.differ = BlueprintDiffer()
+        # 정책 엔진도 미리 컴파일해 두고, 정책 파일이 바뀐 경우에만 다시 로드함
+        # (데몬을 쓰는 경우에는 데몬이 컴파일된 정책을 유지하므로 처음 직접 실행할 때 로드)
+        self._policy_engine = None
+        self._policy_mtime = None
+        self._k8s_policy_engine = None
+        self._k8s_policy_mtime = None
+        if client is None:
+            self._load_policy_engine()
+        self.graph = self._load_graph()
+
+        # 디바운스 창 안에 바뀐 경로들을 모아 두었다가 한 번의 실행에서 함께 처리
+        self._changed_lock = threading.Lock()
+        self._changed_paths = set()
+        self.observer = None
+        self._watches = {} # (디렉토리, 재귀 여부) -> watchdog ObservedWatch
+        self.runner = DebouncedRunner(self.redeploy, debounce_seconds)
+        print(f"Watching for changes in: {self.filename_to_watch} and its inputs (debounce: {debounce_seconds}s)")
+
+    # (내부 함수) 정책 파일의 수정 시각이 바뀌었을 때만 PolicyEngine을 다시 생성합니다.
+    def _load_policy_engine(self):
+        try:
+            mtime = os.stat(self.policy_file).st_mtime_ns
+        except OSError:
+            mtime = None
+
+        if self._policy_engine is None or mtime != self._policy_mtime:
+            self._policy_engine = PolicyEngine(self.policy_file)
+            self._policy_mtime = mtime
+        return self._policy_engine
+
+    # (내부 함수) 쿠버네티스 정책 엔진도 같은 방식으로, 처음 필요할 때와 파일이 바뀌었을 때만 로드합니다.
+    def _load_k8s_policy_engine(self):
+        try:
+            mtime = os.stat(self.k8s_policy_file).st_mtime_ns
+        except OSError:
+            mtime = None
+
+        if self._k8s_policy_engine is None or mtime != self._k8s_policy_mtime:
+            self._k8s_policy_engine = PolicyEngine(self.k8s_policy_file)
+            self._k8s_policy_mtime = mtime
+        return self._k8s_policy_engine
+
+    # (내부 함수) 마지막 생성에서 저장된 의존성 그래프를 불러오고, 없으면 지금 입력으로 기록합니다.
+    def _load_graph(self) -> DependencyGraph:
+        graph = DependencyGraph.load(DEPENDENCY_FILE)
+        if graph is None or graph.source_file != os.path.abspath(self.filename_to_watch):
+            graph = DependencyGraph(self.filename_to_watch, self.policy_file)
+            parsed_data = IaCParser().parse(self.filename_to_watch)
+            if parsed_data:
+                graph.record(parsed_data, self._load_policy_engine())
+        graph.k8s_dir = os.path.abspath(self.k8s_dir) if self.k8s_dir else None
+        graph.k8s_policy_file = os.path.abspath(self.k8s_policy_file) if self.k8s_dir else None
+        if graph.recorded:
+            graph.save(DEPENDENCY_FILE)
+        return graph
+
+    # 옵저버에 그래프의 감시 경로들을 등록합니다. 재생성 후 입력이 바뀌면 다시 호출하여 감시 대상을 맞춥니다.
+    def schedule(self, observer):
+        self.observer = observer
+        wanted = set(self.graph.watch_paths())
+        for key in list(self._watches):
+            if key not in wanted:
+                observer.unschedule(self._watches.pop(key))
+        for directory, recursive in sorted(wanted):
+            if (directory, recursive) not in self._watches:
+                self._watches[(directory, recursive)] = observer.schedule(self, directory, recursive=recursive)
+                print(f"  - Watching '{directory}'{' (recursive)' if recursive else ''}")
 
     def on_modified(self, event):
-        if not event.is_directory and Path(event.src_path).name == self.filename_to_watch:
-            print(f"\n[CHANGE]: Change detected in '{self.filename_to_watch}'!")
-            
-            # 1. 설계도 재생성 (main.py --no-interactive 호출)
-            print("STEP 1/3: Regenerating blueprint...")
+        if not event.is_directory:
+            self._on_change(event.src_path)
+
+    # 편집기가 임시 파일을 만든 뒤 이름을 바꿔 저장하는 경우도 처리합니다.
+    def on_created(self, event):
+        self.on_modified(event)
+
+    def on_deleted(self, event):
+        self.on_modified(event)
+
+    def on_moved(self, event):
+        if not event.is_directory:
+            self._on_change(event.src_path)
+            self._on_change(event.dest_path)
+
+    def _on_change(self, path):
+        if '__pycache__' in Path(path).parts or path.endswith(IGNORED_SUFFIXES) or not self.graph.is_input(path):
+            return
+        path = os.path.abspath(path)
+        with self._changed_lock:
+            if path in self._changed_paths:
+                return
+            self._changed_paths.add(path)
+        print(f"\n[CHANGE]: Change detected in '{os.path.relpath(path)}'!")
+        self.runner.trigger()
+
+    # 디바운스된 변경 한 묶음에 대해 재생성과 재배포를 수행합니다.
+    def redeploy(self):
+        with self._changed_lock:
+            changed_paths = sorted(self._changed_paths)
+            self._changed_paths.clear()
+
+        # 쿠버네티스 Manifest는 바뀐 파일만 다시 파싱/태깅 (도커 컴포즈 배포와는 무관)
+        manifests = self.graph.k8s_changes(changed_paths)
+        if manifests:
+            self._retag_manifests(manifests)
+        changed_paths = [path for path in changed_paths if not self.graph.is_k8s_input(path)]
+        if not changed_paths:
+            print("\nWatching for changes again...")
+            return
+
+        if self.client is not None:
             try:
-                subprocess.run(
-                    ["python", PIPELINE_SCRIPT, "--no-interactive"], 
-                    check=True, text=True, encoding='utf-8'
-                )
-                print("[SUCCESS]: Blueprint regenerated successfully.")
-            except Exception as e:
-                print(f"[ERROR]: Blueprint generation failed: {e}")
+                self.client.call('redeploy', on_log=print, source=self.filename_to_watch, policy=self.policy_file,
+                                 output=OUTPUT_FILE, cwd=os.getcwd(), changed_paths=changed_paths,
+                                 strategy=self.strategy, backend='engine' if self.actuator.engine else 'compose',
+                                 buildkit=self.actuator.buildkit)
+                self._reload_graph()
+                print("\nAuto re-deployment finished successfully!")
+                print(f"\nWatching for changes again...")
+                return
+            except DaemonUnavailable as e:
+                print(f"[ERROR]: Pipeline daemon is unavailable ({e}). Running the pipeline locally.")
+            except DaemonError as e:
+                print(f"[ERROR]: Re-deployment failed in the pipeline daemon: {e}")
                 print("\nWatching for changes again...")
-                return # 실패 시 재배포 중단
+                return
+
+        # 재생성 전에 현재 배포된 청사진을 보관해 둠 (diff 기준)
+        previous_blueprint = self.differ.load(OUTPUT_FILE)
+
+        # 1. 설계도 재생성 (새 인터프리터를 띄우지 않고 현재 프로세스에서 파이프라인 호출)
+        # 의존성 그래프가 영향받는 서비스를 계산하고, 그 서비스의 빌드 컨텍스트만 다시 준비합니다.
+        print("STEP 1/3: Regenerating blueprint...")
+        output_file = run_pipeline_generation(
+            source_iac_file=self.filename_to_watch,
+            policy_file=self.policy_file,
+            output_iac_file=OUTPUT_FILE,
+            policy_engine=self._load_policy_engine(),
+            dependency_graph=self.graph,
+            changed_paths=changed_paths,
+            buildkit=self.actuator.buildkit
+        )
+        if not output_file:
+            print("[ERROR]: Blueprint generation failed.")
+            print("\nWatching for changes again...")
+            return # 실패 시 재배포 중단
+        self.graph.save(DEPENDENCY_FILE)
+        affected = sorted(self.graph.affected or [])
+        print(f"[SUCCESS]: Blueprint regenerated successfully. Affected services: {affected}")
+
+        # 2. 이전 청사진과 비교하여 서비스별 변경 사항 분류
+        print("\nSTEP 2/3: Comparing the new blueprint with the running one...")
+        new_blueprint = self.differ.load(OUTPUT_FILE)
+        diff = self.differ.diff(previous_blueprint, new_blueprint)
+        for category in ('added', 'removed', 'changed', 'unchanged'):
+            print(f"  - {category}: {diff[category]}")
+
+        # 3. 영향을 받은 서비스만 재배포 (나머지 허니팟은 계속 실행)
+        # 가짜 앱/Dockerfile만 바뀐 서비스는 청사진이 같아도 다시 빌드해야 하므로 강제 재빌드 대상으로 넘김
+        print("\nSTEP 3/3: Redeploying only the affected services...")
+        self.actuator.apply_changes(diff, force_services=affected, blueprint=new_blueprint)
 
-            # 2. 기존 환경 중지
-            print("\nSTEP 2/3: Shutting down the old environment...")
-            self.actuator.down()
+        if self.observer is not None:
+            self.schedule(self.observer)
+        print("\nAuto re-deployment finished successfully!")
+        print(f"\nWatching for changes again...")
 
-            # 3. 새로운 환경 시작
-            print("\nSTEP 3/3: Deploying the new environment...")
-            self.actuator.up(build=True)
-            
-            print("\nAuto re-deployment finished successfully!")
-            print(f"\nWatching for changes again...")
+    # (내부 함수) 데몬이 갱신한 의존성 그래프를 다시 읽고 감시 경로를 맞춥니다.
+    def _reload_graph(self):
+        graph = DependencyGraph.load(DEPENDENCY_FILE)
+        if graph is None:
+            return
+        graph.k8s_dir, graph.k8s_policy_file = self.graph.k8s_dir, self.graph.k8s_policy_file
+        self.graph = graph
+        if self.observer is not None:
+            self.schedule(self.observer)
+
+    # (내부 함수) 바뀐 쿠버네티스 Manifest 파일만 다시 파싱하고 정책을 적용한 결과를 출력합니다.
+    def _retag_manifests(self, manifests: list):
+        print(f"\n[K8S]: Re-tagging {len(manifests)} changed manifest file(s)...")
+        policy_engine = self._load_k8s_policy_engine()
+        parser = KubernetesParser(max_workers=1)
+        for manifest in manifests:
+            try:
+                resources = parser.parse_file(manifest)
+            except Exception as e:
+                print(f"[ERROR]: Failed to parse '{manifest}': {e}")
+                continue
+            print(f"\n--- [Result] Tagged Kubernetes Resources in '{os.path.relpath(manifest)}' ---")
+            for resource in policy_engine.apply_iter(resources):
+                pprint.pprint(resource)
+
+# '--debounce=<초>' 인자로 디바운스 시간을 바꿀 수 있습니다.
+def _get_debounce_seconds():
+    for arg in sys.argv[1:]:
+        if arg.startswith('--debounce='):
+            try:
+                return float(arg.split('=', 1)[1])
+            except ValueError:
+                print(f"Warning: Invalid debounce value '{arg}'. Using {DEBOUNCE_SECONDS}s.")
+    return DEBOUNCE_SECONDS
 
 def main():
-    path = "."
-    event_handler = ChangeHandler(TARGET_FILE)
+    client = None if '--no-daemon' in sys.argv else connect_daemon()
+    if client is not None:
+        print(f"Using the pipeline daemon at '{client.socket_path}'.")
+    # '--blue-green' 인자가 있으면 재배포를 무중단(blue/green) 방식으로 수행
+    strategy = 'bluegreen' if '--blue-green' in sys.argv else None
+    event_handler = ChangeHandler(TARGET_FILE, debounce_seconds=_get_debounce_seconds(), client=client,
+                                  strategy=strategy)
     observer = Observer()
-    observer.schedule(event_handler, path, recursive=False)
-    
+    event_handler.schedule(observer)
+
     observer.start()
     print("====== Sync Controller Started (Auto-Deploy Mode) ======")
-    print(f"Watching for modifications in '{TARGET_FILE}'. Press Ctrl+C to switch to manual control.")
-    
+    print(f"Watching for modifications in '{TARGET_FILE}' and its inputs. Press Ctrl+C to switch to manual control.")
+
     try:
         while True:
             time.sleep(1)
     except KeyboardInterrupt:
         observer.stop()
+        event_handler.runner.cancel()
         print("\n======= Sync Controller Stopped =======")
         print(" handing over to manual control mode. =======")
-        
+
         # --- 컨트롤러 종료 후 수동 제어 모드 시작 ---
-        start_interactive_control(OUTPUT_FILE)
-    
+        start_interactive_control(OUTPUT_FILE, client=client, strategy=strategy)
+
     observer.join()
     print("\nExited manual control. Program finished.")
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
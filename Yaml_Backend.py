@@ -0,0 +1,75 @@
+import os
+import yaml
+import threading
+from collections import OrderedDict
+
+# libyaml(C 확장)이 설치되어 있으면 C 기반 로더/덤퍼를 사용하고,
+# 없으면 PyYAML의 순수 파이썬 구현으로 자동 대체합니다.
+SafeLoader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+SafeDumper = getattr(yaml, 'CSafeDumper', yaml.SafeDumper)
+HAS_LIBYAML = SafeLoader is not yaml.SafeLoader
+
+def safe_load(stream):
+    return yaml.load(stream, Loader=SafeLoader)
+
+def safe_load_all(stream):
+    return yaml.load_all(stream, Loader=SafeLoader)
+
+def safe_dump(data, stream=None, **kwargs):
+    return yaml.dump(data, stream, Dumper=SafeDumper, **kwargs)
+
+# 파일 경로, 수정 시각(mtime), 크기를 키로 파싱 결과를 보관하는 캐시.
+# 장시간 실행되는 프로세스(감시자, 데몬 등)에서 바뀌지 않은 파일을 다시 파싱하지 않게 합니다.
+#
+# 주의: 캐시된 객체는 호출자들 사이에 공유되므로 읽기 전용으로 다뤄야 합니다.
+# (PolicyEngine과 HoneypotBlueprintGenerator는 BlueprintOverlay를 통해 원본을 수정하지 않습니다.)
+class YamlParseCache:
+
+    def __init__(self, max_entries: int = 128):
+        self.max_entries = max_entries
+        self._entries = OrderedDict() # 실제 경로 -> ((mtime_ns, size), 파싱 결과)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    # 파일을 파싱하여 반환합니다. 파일이 바뀌지 않았으면 이전 파싱 결과를 재사용합니다.
+    # FileNotFoundError, yaml.YAMLError 등은 그대로 호출자에게 전달됩니다.
+    def load(self, file_path: str):
+        real_path = os.path.realpath(file_path)
+        stat_result = os.stat(real_path)
+        signature = (stat_result.st_mtime_ns, stat_result.st_size)
+
+        with self._lock:
+            entry = self._entries.get(real_path)
+            if entry is not None and entry[0] == signature:
+                self._entries.move_to_end(real_path)
+                self.hits += 1
+                return entry[1]
+
+        with open(real_path, 'r', encoding='utf-8') as f:
+            data = safe_load(f)
+
+        with self._lock:
+            self.misses += 1
+            self._entries[real_path] = (signature, data)
+            self._entries.move_to_end(real_path)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return data
+
+    def invalidate(self, file_path: str = None):
+        with self._lock:
+            if file_path is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(os.path.realpath(file_path), None)
+
+# 프로세스 전체에서 공유하는 기본 파싱 캐시
+parse_cache = YamlParseCache()
+
+# YAML 파일을 읽어 파싱합니다. use_cache가 True이면 공유 파싱 캐시를 사용합니다.
+def load_file(file_path: str, use_cache: bool = True):
+    if use_cache:
+        return parse_cache.load(file_path)
+    with open(file_path, 'r', encoding='utf-8') as f:
+        return safe_load(f)
@@ -0,0 +1,100 @@
+# load_test.py
+# 가짜 앱 서버의 처리량을 측정하는 부하 테스트 (표준 라이브러리만 사용).
+# 여러 연결을 동시에 열고 정해진 시간 동안 요청을 보내 초당 요청 수와 지연 시간 분포를 출력합니다.
+#
+# 사용 예:
+#   HONEYPOT_WORKERS=4 python fake_apps/python-flask-generic/app.py &
+#   python fake_apps/load_test.py --port 5000 --connections 64 --duration 10
+#   python fake_apps/load_test.py --no-keepalive --min-rps 2000   # 목표 미달이면 종료 코드 1
+import sys
+import time
+import asyncio
+import argparse
+
+# 연결 하나로 deadline까지 요청을 반복해서 보냅니다.
+async def _client(host: str, port: int, request: bytes, keepalive: bool, deadline: float,
+                  latencies: list, errors: list):
+    reader = writer = None
+    while time.perf_counter() < deadline:
+        try:
+            if writer is None:
+                reader, writer = await asyncio.open_connection(host, port)
+            start = time.perf_counter()
+            writer.write(request)
+            head = await reader.readuntil(b'\r\n\r\n')
+            length = 0
+            for line in head.split(b'\r\n'):
+                if line.lower().startswith(b'content-length:'):
+                    length = int(line.split(b':', 1)[1])
+            if length:
+                await reader.readexactly(length)
+            latencies.append(time.perf_counter() - start)
+            if not head.startswith(b'HTTP/1.1 200'):
+                errors.append(head.split(b'\r\n', 1)[0].decode('latin-1'))
+            if not keepalive:
+                writer.close()
+                writer = None
+        except (OSError, asyncio.IncompleteReadError) as e:
+            errors.append(type(e).__name__)
+            if writer is not None:
+                writer.close()
+            writer = None
+            await asyncio.sleep(0.01)
+    if writer is not None:
+        writer.close()
+
+async def run_load(host: str, port: int, connections: int, duration: float, keepalive: bool,
+                   method: str = 'GET', path: str = '/probe', body: bytes = b'') -> dict:
+    headers = [f"{method} {path} HTTP/1.1", f"Host: {host}:{port}", "User-Agent: honeybot-load-test/1.0"]
+    if body:
+        headers.append(f"Content-Length: {len(body)}")
+    if not keepalive:
+        headers.append("Connection: close")
+    request = ("\r\n".join(headers) + "\r\n\r\n").encode('latin-1') + body
+
+    latencies, errors = [], []
+    deadline = time.perf_counter() + duration
+    started = time.perf_counter()
+    await asyncio.gather(*(_client(host, port, request, keepalive, deadline, latencies, errors)
+                           for _ in range(connections)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    def percentile(p):
+        return latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000 if latencies else 0.0
+    return {
+        'requests': len(latencies), 'errors': len(errors), 'seconds': elapsed,
+        'rps': len(latencies) / elapsed if elapsed else 0.0,
+        'p50_ms': percentile(0.50), 'p90_ms': percentile(0.90), 'p99_ms': percentile(0.99),
+        'error_samples': sorted(set(errors))[:5],
+    }
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Throughput test for the honeypot fake app server.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=5000)
+    parser.add_argument('--connections', type=int, default=64, help="Concurrent connections.")
+    parser.add_argument('--duration', type=float, default=10.0, help="Test duration in seconds.")
+    parser.add_argument('--no-keepalive', action='store_true', help="Open a new connection for every request.")
+    parser.add_argument('--method', default='GET')
+    parser.add_argument('--path', default='/probe')
+    parser.add_argument('--body-size', type=int, default=0, help="Send a request body of this many bytes.")
+    parser.add_argument('--min-rps', type=float, default=None, help="Exit with status 1 below this throughput.")
+    args = parser.parse_args(argv)
+
+    result = asyncio.run(run_load(args.host, args.port, args.connections, args.duration, not args.no_keepalive,
+                                  args.method, args.path, b'x' * args.body_size))
+    print(f"{result['requests']} requests in {result['seconds']:.2f}s "
+          f"({args.connections} connections, "
+          f"keep-alive={'off' if args.no_keepalive else 'on'})")
+    print(f"  throughput : {result['rps']:.0f} req/s")
+    print(f"  latency    : p50={result['p50_ms']:.2f}ms p90={result['p90_ms']:.2f}ms p99={result['p99_ms']:.2f}ms")
+    print(f"  errors     : {result['errors']} {result['error_samples'] if result['errors'] else ''}")
+
+    if args.min_rps is not None and result['rps'] < args.min_rps:
+        print(f"❌ Throughput {result['rps']:.0f} req/s is below the target of {args.min_rps:.0f} req/s.")
+        return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,23 +1,415 @@
-from flask import Flask, request
+import os
+import sys
+import time
+import socket
+import struct
+import asyncio
 import logging
+import platform
+import tempfile
+import logging.handlers
+import multiprocessing
+from queue import SimpleQueue
+from email.utils import formatdate
+from urllib.parse import quote
+from body_capture import BodyCapture
+from log_shipper import FluentForwardSender
 
-# 기본 로깅 설정
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(message)s')
+# 기존 Flask 개발 서버와 같은 catch-all 응답을 돌려주는 비동기(asyncio) 가짜 앱 서버.
+# 요청 처리 중에는 블로킹하지 않고, 로그는 큐를 통해 별도 스레드에서 기록합니다.
+# 외부 라이브러리 없이 표준 라이브러리만 사용하므로 어떤 원본 이미지 위에서도 실행됩니다.
+#
+# 환경 변수:
+#   HONEYPOT_PORT          : 수신 포트 (기본값 5000)
+#   HONEYPOT_WORKERS       : 워커 프로세스 수 (기본값 1, SO_REUSEPORT로 같은 포트를 나눠 받음)
+#   HONEYPOT_KEEPALIVE     : 1이면 HTTP/1.1 keep-alive 허용, 0이면 원래 서버처럼 매 응답 후 연결 종료 (기본값 1)
+#   HONEYPOT_SERVER_HEADER : Server 응답 헤더 (기본값은 원래 개발 서버의 값)
+#   HONEYPOT_INLINE_BODY   : 로그 한 줄에 직접 남길 요청 본문 앞부분 크기(바이트, 기본값 1024)
+#   HONEYPOT_MAX_BODY      : 요청 하나에서 저장할 최대 본문 크기(바이트, 기본값 10MB). 넘는 부분은 읽고 버림
+#   HONEYPOT_SPOOL_DIR     : 긴 본문 전체를 내용 해시 이름으로 저장할 디렉토리 (기본값 <임시 디렉토리>/honeypot_spool)
+#                            컨테이너를 다시 만들어도 남기려면 볼륨을 연결하세요.
+#   HONEYPOT_SPOOL_MAX_BYTES : 스풀 디렉토리의 최대 크기(바이트, 기본값 256MB). 넘으면 오래된 파일부터 삭제
+#   FLUENTD_HOST           : 지정하면 요청마다 구조화된 기록을 fluentd forward 프로토콜로 묶어서 전송
+#   FLUENTD_PORT           : fluentd forward 포트 (기본값 24224)
+#   HONEYPOT_TAG           : 구조화된 기록의 fluentd 태그 (기본값 honeypot.app.requests)
+#   HONEYPOT_STDOUT_LOG    : 1이면 기존 형식의 텍스트 로그도 표준 출력에 남김
+#                            (기본값: FLUENTD_HOST가 없으면 1, 있으면 0 — 같은 요청이 두 번 수집되지 않도록)
+#   HONEYPOT_PROXY_PROTOCOL : 1이면 연결마다 PROXY 프로토콜(v1/v2) 헤더를 요구하고, 그 안의 원래 클라이언트 주소를 기록
+#                            (blue/green 배포의 앞단 nginx 뒤에서 실행될 때 Blue_Green_Deployer가 설정. 기본값 0)
 
-app = Flask(__name__)
+PORT = int(os.environ.get('HONEYPOT_PORT', 5000))
+WORKERS = max(1, int(os.environ.get('HONEYPOT_WORKERS', 1)))
+KEEPALIVE = os.environ.get('HONEYPOT_KEEPALIVE', '1') not in ('0', 'false', '')
+SERVER_HEADER = os.environ.get('HONEYPOT_SERVER_HEADER', f"Werkzeug/2.3.8 Python/{platform.python_version()}")
+INLINE_BODY = int(os.environ.get('HONEYPOT_INLINE_BODY', 1024))
+MAX_BODY = int(os.environ.get('HONEYPOT_MAX_BODY', 10 * 1024 * 1024))
+SPOOL_DIR = os.environ.get('HONEYPOT_SPOOL_DIR', os.path.join(tempfile.gettempdir(), 'honeypot_spool'))
+SPOOL_MAX_BYTES = int(os.environ.get('HONEYPOT_SPOOL_MAX_BYTES', 256 * 1024 * 1024))
+READ_CHUNK = 64 * 1024
+FLUENTD_HOST = os.environ.get('FLUENTD_HOST', '')
+FLUENTD_PORT = int(os.environ.get('FLUENTD_PORT', 24224))
+HONEYPOT_TAG = os.environ.get('HONEYPOT_TAG', 'honeypot.app.requests')
+STDOUT_LOG = os.environ.get('HONEYPOT_STDOUT_LOG', '0' if FLUENTD_HOST else '1') not in ('0', 'false', '')
+PROXY_PROTOCOL = os.environ.get('HONEYPOT_PROXY_PROTOCOL', '0') not in ('0', 'false', '')
+PROXY_V2_SIGNATURE = b'\r\n\r\n\x00\r\nQUIT\n'
+PROXY_V1_MAX_BYTES = 107 # 'PROXY ...\r\n' 한 줄의 최대 길이 (명세)
+MAX_HEADER_BYTES = 64 * 1024
+IDLE_TIMEOUT = 30
+URL_SAFE_CHARS = "/%:@!$&'()*+,;=-._~"
 
-@app.route('/', defaults={'path': ''})
-@app.route('/<path:path>', methods=['GET', 'POST', 'PUT', 'DELETE'])
-def catch_all(path):
-    # 모든 요청에 대한 상세 정보 로깅
-    log_message = (
-        f"Request from {request.remote_addr}: "
-        f"{request.method} {request.url} | "
-        f"Headers: {dict(request.headers)} | "
-        f"Body: {request.get_data(as_text=True)}"
+# 원래 앱의 라우트: '/'는 GET만, '/<path>'는 GET/POST/PUT/DELETE (HEAD, OPTIONS는 Flask가 자동으로 추가)
+ROOT_METHODS = ('GET', 'HEAD', 'OPTIONS')
+PATH_METHODS = ('DELETE', 'GET', 'HEAD', 'OPTIONS', 'POST', 'PUT')
+
+METHOD_NOT_ALLOWED_BODY = (
+    b'<!doctype html>\n<html lang=en>\n<title>405 Method Not Allowed</title>\n'
+    b'<h1>Method Not Allowed</h1>\n<p>The method is not allowed for the requested URL.</p>\n')
+BAD_REQUEST_BODY = (
+    b'<!doctype html>\n<html lang=en>\n<title>400 Bad Request</title>\n'
+    b'<h1>Bad Request</h1>\n<p>The browser (or proxy) sent a request that this server could not understand.</p>\n')
+REASONS = {200: 'OK', 400: 'BAD REQUEST', 405: 'METHOD NOT ALLOWED'}
+
+# 기본 로깅 설정 (원래 앱과 같은 형식).
+# 핸들러는 큐에 넣기만 하고, 실제 출력은 QueueListener 스레드가 담당하므로 이벤트 루프가 멈추지 않습니다.
+def setup_logging():
+    log_queue = SimpleQueue()
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(logging.Formatter('%(asctime)s - %(message)s'))
+    listener = logging.handlers.QueueListener(log_queue, stream_handler)
+    root = logging.getLogger()
+    root.handlers[:] = [logging.handlers.QueueHandler(log_queue)]
+    root.setLevel(logging.INFO)
+    listener.start()
+    return listener
+
+class BadRequest(Exception):
+    pass
+
+capture = None # 워커 프로세스마다 run_worker에서 만드는 BodyCapture
+shipper = None # FLUENTD_HOST가 있으면 워커 프로세스마다 만드는 FluentForwardSender
+
+# Date 헤더는 초 단위로만 바뀌므로 한 번 만든 값을 재사용합니다.
+_date_cache = [0, '']
+def http_date() -> str:
+    now = int(time.time())
+    if _date_cache[0] != now:
+        _date_cache[0] = now
+        _date_cache[1] = formatdate(now, usegmt=True)
+    return _date_cache[1]
+
+# PROXY 프로토콜(v1/v2) 헤더를 읽고 원래 클라이언트의 (주소, 포트)를 반환합니다.
+# 앞단 자신의 연결(v2 LOCAL)이거나 주소를 알 수 없는 경우(UNKNOWN, UNSPEC)에는 None을 반환합니다.
+async def read_proxy_header(reader: asyncio.StreamReader):
+    start = await reader.readexactly(12)
+    if start == PROXY_V2_SIGNATURE:
+        version_command, family, length = struct.unpack('!BBH', await reader.readexactly(4))
+        addresses = await reader.readexactly(length)
+        if version_command >> 4 != 2 or (version_command & 0x0F) not in (0, 1):
+            raise BadRequest()
+        if version_command & 0x0F == 0: # LOCAL
+            return None
+        if family >> 4 == 1 and len(addresses) >= 12:
+            return socket.inet_ntop(socket.AF_INET, addresses[:4]), struct.unpack('!H', addresses[8:10])[0]
+        if family >> 4 == 2 and len(addresses) >= 36:
+            return socket.inet_ntop(socket.AF_INET6, addresses[:16]), struct.unpack('!H', addresses[32:34])[0]
+        return None
+
+    if not start.startswith(b'PROXY '):
+        raise BadRequest()
+    try:
+        line = start + await reader.readuntil(b'\r\n')
+    except (asyncio.LimitOverrunError, ValueError):
+        raise BadRequest()
+    if len(line) > PROXY_V1_MAX_BYTES:
+        raise BadRequest()
+    parts = line[:-2].decode('ascii', errors='replace').split(' ')
+    if parts[1:2] == ['UNKNOWN']:
+        return None
+    if len(parts) != 6 or parts[1] not in ('TCP4', 'TCP6'):
+        raise BadRequest()
+    try:
+        socket.inet_pton(socket.AF_INET if parts[1] == 'TCP4' else socket.AF_INET6, parts[2])
+        port = int(parts[4])
+    except (OSError, ValueError):
+        raise BadRequest()
+    return parts[2], port
+
+# 요청 한 건을 읽습니다. 연결이 끝났으면 None.
+# :return: (메서드, 대상, 버전, 헤더 목록, 본문, 헤더를 다 받은 시각)
+async def read_request(reader: asyncio.StreamReader):
+    try:
+        head = await reader.readuntil(b'\r\n\r\n')
+    except asyncio.IncompleteReadError as e:
+        if e.partial.strip():
+            raise BadRequest()
+        return None
+    except asyncio.LimitOverrunError:
+        raise BadRequest()
+
+    started = time.perf_counter()
+    lines = head[:-4].decode('latin-1').split('\r\n')
+    parts = lines[0].split(' ')
+    if len(parts) != 3 or not parts[2].startswith('HTTP/'):
+        raise BadRequest()
+    method, target, version = parts
+
+    headers = []
+    for line in lines[1:]:
+        name, sep, value = line.partition(':')
+        if not sep or not name or name != name.strip():
+            raise BadRequest()
+        headers.append((name, value.strip()))
+
+    body = await read_body(reader, headers)
+    return method, target, version, headers, body, started
+
+# 요청 본문을 조각 단위로 읽어 캡처 파이프라인에 넘깁니다. (Content-Length 또는 chunked)
+# 본문 전체를 메모리에 올리지 않으며, 결과로 CaptureResult(앞부분 + 스풀 참조)를 반환합니다.
+async def read_body(reader: asyncio.StreamReader, headers: list):
+    lowered = {name.lower(): value for name, value in headers}
+    session = capture.begin()
+    try:
+        if 'chunked' in lowered.get('transfer-encoding', '').lower():
+            while True:
+                size_line = await read_line(reader)
+                try:
+                    chunk_size = int(size_line.split(b';', 1)[0].strip(), 16)
+                except ValueError:
+                    raise BadRequest()
+                if chunk_size == 0:
+                    while (await read_line(reader)) != b'\r\n': # trailer 헤더 무시
+                        pass
+                    break
+                await stream_into(reader, session, chunk_size)
+                if await reader.readexactly(2) != b'\r\n':
+                    raise BadRequest()
+        else:
+            try:
+                length = int(lowered.get('content-length', 0))
+            except ValueError:
+                raise BadRequest()
+            if length < 0:
+                raise BadRequest()
+            await stream_into(reader, session, length)
+
+        if session.needs_io(0):
+            return await asyncio.get_running_loop().run_in_executor(None, session.finish)
+        return session.finish()
+    except BaseException:
+        session.abort()
+        raise
+
+# chunked 본문의 크기 줄/trailer 줄을 읽습니다. 스트림 한도보다 긴 줄은 헤더와 같이 400으로 처리합니다.
+async def read_line(reader: asyncio.StreamReader) -> bytes:
+    try:
+        return await reader.readuntil(b'\r\n')
+    except (asyncio.LimitOverrunError, ValueError):
+        raise BadRequest()
+
+# length 바이트를 읽어 캡처 세션에 넣습니다. 파일 쓰기가 필요한 조각만 작업 스레드에서 처리합니다.
+async def stream_into(reader: asyncio.StreamReader, session, length: int):
+    loop = asyncio.get_running_loop()
+    remaining = length
+    while remaining > 0:
+        data = await reader.read(min(remaining, READ_CHUNK))
+        if not data:
+            raise asyncio.IncompleteReadError(b'', remaining)
+        remaining -= len(data)
+        if session.needs_io(len(data)):
+            await loop.run_in_executor(None, session.feed, data)
+        else:
+            session.feed(data)
+
+# 요청 대상을 Flask의 request.url과 같은 전체 URL로 만듭니다.
+def build_url(target: str, headers: list) -> str:
+    host = next((value for name, value in headers if name.lower() == 'host'), f"localhost:{PORT}")
+    path, _, query = target.partition('?')
+    if path.startswith(('http://', 'https://')):
+        return target # 프록시 형식의 절대 URL
+    return f"http://{host}{quote(path, safe=URL_SAFE_CHARS)}" + (f"?{query}" if query else '')
+
+# Werkzeug의 EnvironHeaders처럼 'User-Agent' 형태의 이름을 사용하고, 같은 이름은 쉼표로 합칩니다.
+def header_dict(headers: list) -> dict:
+    result = {}
+    for name, value in headers:
+        key = '-'.join(part.capitalize() for part in name.split('-'))
+        result[key] = f"{result[key]},{value}" if key in result else value
+    return result
+
+# 원래 앱과 같은 형식의 요청 로그 메시지를 만듭니다.
+# 본문은 앞부분만 싣고, 스풀에 저장된 경우 그 파일(sha256)을 함께 기록합니다.
+def format_log_message(peer: str, method: str, target: str, headers: list, body) -> str:
+    return (
+        f"Request from {peer}: "
+        f"{method} {build_url(target, headers)} | "
+        f"Headers: {header_dict(headers)} | "
+        f"Body: {body.inline.decode('utf-8', errors='replace')}"
+        f"{body.log_suffix(capture.spool_dir)}"
     )
-    logging.info(log_message)
-    return "OK", 200
+
+def build_response(status: int, body: bytes, keep_alive: bool, extra_headers=(), head_only: bool = False,
+                   content_type: str = 'text/html; charset=utf-8') -> bytes:
+    lines = [f"HTTP/1.1 {status} {REASONS[status]}",
+             f"Server: {SERVER_HEADER}",
+             f"Date: {http_date()}",
+             f"Content-Type: {content_type}",
+             f"Content-Length: {len(body)}"]
+    lines.extend(f"{name}: {value}" for name, value in extra_headers)
+    if not keep_alive:
+        lines.append("Connection: close")
+    head = ("\r\n".join(lines) + "\r\n\r\n").encode('latin-1')
+    return head if head_only else head + body
+
+# 구조화된 요청 기록을 전송 대기열에 넣습니다. (블로킹 없음)
+def ship_record(peer_info, method: str, target: str, version: str, headers: list, body, status: int,
+                started: float):
+    path, _, query = target.partition('?')
+    record = {
+        'source_ip': peer_info[0] if isinstance(peer_info, tuple) else str(peer_info),
+        'source_port': peer_info[1] if isinstance(peer_info, tuple) else None,
+        'method': method,
+        'path': path,
+        'query': query,
+        'url': build_url(target, headers),
+        'http_version': version,
+        'headers': header_dict(headers),
+        'status': status,
+        'duration_ms': round((time.perf_counter() - started) * 1000, 3),
+        'body_size': body.size,
+        'body': body.inline.decode('utf-8', errors='replace'),
+        'worker_pid': os.getpid(),
+    }
+    if body.spool_path:
+        record.update(body_sha256=body.sha256, body_spool=os.path.relpath(body.spool_path, capture.spool_dir),
+                      body_stored=body.stored, body_duplicate=body.duplicate)
+    shipper.emit(record)
+
+# 요청 한 건에 대한 응답을 만듭니다. (원래 Flask 앱의 라우팅/응답과 동일)
+# :return: (상태 코드, 응답 바이트)
+def handle_request(peer: str, method: str, target: str, headers: list, body, keep_alive: bool):
+    path = target.split('?', 1)[0]
+    if path.startswith(('http://', 'https://')):
+        path = '/' + path.split('/', 3)[-1] if path.count('/') >= 3 else '/'
+    allowed = ROOT_METHODS if path == '/' else PATH_METHODS
+
+    if method not in allowed:
+        return 405, build_response(405, METHOD_NOT_ALLOWED_BODY, keep_alive, [('Allow', ', '.join(allowed))])
+    if method == 'OPTIONS':
+        return 200, build_response(200, b'', keep_alive, [('Allow', ', '.join(allowed))])
+
+    # 모든 요청에 대한 상세 정보 로깅
+    if STDOUT_LOG:
+        logging.info(format_log_message(peer, method, target, headers, body))
+    return 200, build_response(200, b'OK', keep_alive, head_only=(method == 'HEAD'))
+
+# 연결 하나를 처리합니다. keep-alive가 허용되면 같은 연결에서 여러 요청을 순서대로 처리합니다.
+async def handle_connection(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+    peer_info = writer.get_extra_info('peername')
+    peer = peer_info[0] if isinstance(peer_info, tuple) else str(peer_info)
+    try:
+        if PROXY_PROTOCOL:
+            # 앞단이 보낸 원래 클라이언트 주소를 기록에 사용 (헤더가 없거나 잘못되었으면 응답 없이 연결 종료)
+            try:
+                client = await asyncio.wait_for(read_proxy_header(reader), IDLE_TIMEOUT)
+            except BadRequest:
+                return
+            if client is not None:
+                peer_info, peer = client, client[0]
+        while True:
+            try:
+                request = await asyncio.wait_for(read_request(reader), IDLE_TIMEOUT)
+            except BadRequest:
+                writer.write(build_response(400, BAD_REQUEST_BODY, False))
+                break
+            if request is None:
+                break
+
+            method, target, version, headers, body, started = request
+            connection = next((value.lower() for name, value in headers if name.lower() == 'connection'), '')
+            keep_alive = KEEPALIVE and (
+                'keep-alive' in connection if version == 'HTTP/1.0' else 'close' not in connection)
+
+            status, response = handle_request(peer, method, target, headers, body, keep_alive)
+            writer.write(response)
+            if shipper is not None:
+                ship_record(peer_info, method, target, version, headers, body, status, started)
+            if not keep_alive:
+                break
+            if writer.transport.get_write_buffer_size() > 65536:
+                await writer.drain()
+        await writer.drain()
+    except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError):
+        pass
+    finally:
+        writer.close()
+
+# 수신 소켓을 만듭니다. 워커가 여러 개이면 SO_REUSEPORT로 커널이 연결을 워커들에게 나눠 줍니다.
+def create_listen_socket(port: int, reuse_port: bool) -> socket.socket:
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    if reuse_port:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+    sock.bind(('0.0.0.0', port))
+    sock.listen(1024)
+    sock.setblocking(False)
+    return sock
+
+async def serve(sock: socket.socket):
+    server = await asyncio.start_server(handle_connection, sock=sock, limit=MAX_HEADER_BYTES)
+    async with server:
+        await server.serve_forever()
+
+# 스풀 디렉토리를 만들 수 없으면(읽기 전용 파일 시스템 등) 임시 디렉토리를 사용합니다.
+def create_capture() -> BodyCapture:
+    try:
+        return BodyCapture(SPOOL_DIR, INLINE_BODY, MAX_BODY, SPOOL_MAX_BYTES)
+    except OSError as e:
+        fallback = tempfile.mkdtemp(prefix='honeypot_spool-')
+        print(f"Warning: Cannot use spool directory '{SPOOL_DIR}' ({e}). Using '{fallback}'.", file=sys.stderr)
+        return BodyCapture(fallback, INLINE_BODY, MAX_BODY, SPOOL_MAX_BYTES)
+
+# 워커 프로세스 하나를 실행합니다. (uvloop이 설치되어 있으면 사용)
+def run_worker(port: int, reuse_port: bool):
+    global capture, shipper
+    listener = setup_logging()
+    capture = create_capture()
+    if FLUENTD_HOST:
+        shipper = FluentForwardSender(FLUENTD_HOST, FLUENTD_PORT, HONEYPOT_TAG)
+    try:
+        import uvloop
+        uvloop.install()
+    except ImportError:
+        pass
+    try:
+        asyncio.run(serve(create_listen_socket(port, reuse_port)))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if shipper is not None:
+            shipper.close()
+        listener.stop()
+
+def main():
+    reuse_port = WORKERS > 1 and hasattr(socket, 'SO_REUSEPORT')
+    workers = WORKERS if reuse_port else 1
+    if WORKERS > 1 and not reuse_port:
+        print("SO_REUSEPORT is not available; running a single worker.", file=sys.stderr)
+
+    print(f" * Serving honeypot app on http://0.0.0.0:{PORT} ({workers} worker(s))", file=sys.stderr)
+    if workers == 1:
+        run_worker(PORT, False)
+        return
+
+    processes = [multiprocessing.Process(target=run_worker, args=(PORT, True), daemon=True)
+                 for _ in range(workers)]
+    for process in processes:
+        process.start()
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        for process in processes:
+            process.terminate()
 
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=5000)
\ No newline at end of file
+    main()
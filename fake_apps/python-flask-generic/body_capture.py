@@ -0,0 +1,178 @@
+import os
+import hashlib
+import tempfile
+import threading
+from collections import OrderedDict
+
+# 요청 본문을 한 번에 메모리에 올리지 않고 조각(chunk) 단위로 받아 저장하는 캡처 파이프라인.
+#  - 앞부분(inline_bytes)만 메모리에 남겨 로그에 그대로 싣고,
+#  - 그보다 긴 본문은 전체(최대 max_bytes)를 스풀 디렉토리에 sha256 이름으로 저장합니다.
+#  - 같은 내용(스캐너가 반복해서 보내는 페이로드)은 한 번만 저장됩니다.
+#  - 스풀 디렉토리 전체 크기가 max_spool_bytes를 넘으면 가장 오래된 파일부터 지웁니다.
+#
+# 스풀 파일 경로: <spool_dir>/<sha256 앞 2글자>/<sha256>
+class BodyCapture:
+
+    # :param spool_dir: 본문을 저장할 디렉토리
+    # :param inline_bytes: 로그에 직접 남길 앞부분 크기 (이보다 짧은 본문은 스풀에 쓰지 않음)
+    # :param max_bytes: 요청 하나에서 저장할 최대 크기. 넘는 부분은 읽고 버림 (크기만 기록)
+    # :param max_spool_bytes: 스풀 디렉토리 전체의 최대 크기
+    #   (여러 워커 프로세스가 같은 디렉토리를 쓰면 각자 계산하므로 근사치입니다)
+    def __init__(self, spool_dir: str, inline_bytes: int = 1024, max_bytes: int = 10 * 1024 * 1024,
+                 max_spool_bytes: int = 256 * 1024 * 1024):
+        self.spool_dir = spool_dir
+        self.inline_bytes = inline_bytes
+        self.max_bytes = max_bytes
+        self.max_spool_bytes = max_spool_bytes
+        self._lock = threading.Lock()
+        self._index = OrderedDict() # 스풀 파일 경로 -> 크기 (오래된 순서)
+        self._total = 0
+        os.makedirs(spool_dir, exist_ok=True)
+        self._scan()
+
+    # 요청 하나의 본문 캡처를 시작합니다.
+    def begin(self):
+        return CaptureSession(self)
+
+    # (내부 함수) 기존 스풀 파일을 수정 시각 순서로 색인합니다.
+    def _scan(self):
+        entries = []
+        for root, _, files in os.walk(self.spool_dir):
+            for name in files:
+                if name.startswith('.'): # 쓰다가 남은 임시 파일
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat_result = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat_result.st_mtime, path, stat_result.st_size))
+        for _, path, size in sorted(entries):
+            self._index[path] = size
+            self._total += size
+
+    # (내부 함수) 임시 파일을 내용 해시 이름으로 옮깁니다. 이미 같은 내용이 있으면 임시 파일을 지웁니다.
+    # :return: (스풀 파일 경로 또는 None, 중복 여부)
+    def _commit(self, temp_path: str, digest: str, size: int):
+        if size > self.max_spool_bytes:
+            os.unlink(temp_path)
+            return None, False
+
+        final_path = os.path.join(self.spool_dir, digest[:2], digest)
+        with self._lock:
+            if final_path in self._index or os.path.exists(final_path):
+                os.unlink(temp_path)
+                try:
+                    os.utime(final_path) # 최근에 다시 관측된 페이로드는 늦게 지워지도록
+                except OSError:
+                    pass
+                if final_path in self._index:
+                    self._index.move_to_end(final_path)
+                else:
+                    self._index[final_path] = size
+                    self._total += size
+                return final_path, True
+
+            while self._index and self._total + size > self.max_spool_bytes:
+                old_path, old_size = self._index.popitem(last=False)
+                self._total -= old_size
+                try:
+                    os.unlink(old_path)
+                except OSError:
+                    pass
+
+            os.makedirs(os.path.dirname(final_path), exist_ok=True)
+            os.replace(temp_path, final_path)
+            self._index[final_path] = size
+            self._total += size
+            return final_path, False
+
+# 요청 하나의 본문 캡처 상태. feed()로 조각을 넣고 finish()로 결과를 받습니다.
+class CaptureSession:
+
+    def __init__(self, capture: BodyCapture):
+        self.capture = capture
+        self.size = 0            # 받은 전체 크기 (버린 부분 포함)
+        self._stored = 0         # 저장한 크기 (max_bytes까지)
+        self._inline = bytearray()
+        self._hash = hashlib.sha256()
+        self._file = None
+        self._temp_path = None
+
+    # 이 크기의 조각을 넣을 때 파일 쓰기가 필요한지 여부 (비동기 서버는 이 경우만 작업 스레드로 넘김)
+    def needs_io(self, chunk_size: int) -> bool:
+        if self._stored >= self.capture.max_bytes:
+            return False
+        return self._file is not None or self._stored + chunk_size > self.capture.inline_bytes
+
+    def feed(self, chunk: bytes):
+        self.size += len(chunk)
+        room = self.capture.max_bytes - self._stored
+        if room <= 0:
+            return
+        chunk = chunk[:room]
+        self._stored += len(chunk)
+        self._hash.update(chunk)
+
+        if len(self._inline) < self.capture.inline_bytes:
+            self._inline += chunk[:self.capture.inline_bytes - len(self._inline)]
+
+        if self._file is None and self._stored > self.capture.inline_bytes:
+            # 앞부분만으로 끝나지 않는 본문: 지금까지 받은 내용을 임시 파일로 옮기고 이어서 씀
+            fd, self._temp_path = tempfile.mkstemp(prefix='.capture-', dir=self.capture.spool_dir)
+            self._file = os.fdopen(fd, 'wb')
+            already = self._stored - len(chunk) # 이전 조각들은 모두 inline 안에 있음
+            self._file.write(bytes(self._inline[:already]))
+        if self._file is not None:
+            self._file.write(chunk)
+
+    # 캡처를 마치고 결과를 반환합니다.
+    def finish(self):
+        spool_path, duplicate = None, False
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            spool_path, duplicate = self.capture._commit(self._temp_path, self._hash.hexdigest(), self._stored)
+        return CaptureResult(bytes(self._inline), self.size, self._stored,
+                             self._hash.hexdigest() if spool_path else None, spool_path, duplicate)
+
+    # 연결이 도중에 끊긴 경우 임시 파일을 정리합니다.
+    def abort(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            try:
+                os.unlink(self._temp_path)
+            except OSError:
+                pass
+
+# 캡처 결과
+class CaptureResult:
+
+    def __init__(self, inline: bytes, size: int, stored: int, sha256, spool_path, duplicate: bool):
+        self.inline = inline          # 로그에 남길 앞부분
+        self.size = size              # 받은 전체 크기
+        self.stored = stored          # 해시/스풀에 반영된 크기 (max_bytes 이하)
+        self.sha256 = sha256          # 스풀에 저장된 경우 내용 해시
+        self.spool_path = spool_path  # 스풀 파일 경로 (짧은 본문이거나 저장하지 못했으면 None)
+        self.duplicate = duplicate    # 이미 같은 내용이 스풀에 있었는지 여부
+
+    @property
+    def truncated(self) -> bool:
+        return self.size > len(self.inline)
+
+    # 로그 한 줄에 덧붙일 스풀 참조. 앞부분만으로 본문 전체가 기록된 경우 빈 문자열.
+    def log_suffix(self, spool_root: str = None) -> str:
+        if not self.truncated:
+            return ''
+        parts = [f"size={self.size}"]
+        if self.stored < self.size:
+            parts.append(f"stored={self.stored}")
+        if self.spool_path:
+            path = os.path.relpath(self.spool_path, spool_root) if spool_root else self.spool_path
+            parts += [f"sha256={self.sha256}", f"file={path}"]
+            if self.duplicate:
+                parts.append("duplicate=true")
+        else:
+            parts.append("spooled=false")
+        return " | Body-Spool: " + " ".join(parts)
@@ -0,0 +1,217 @@
+import time
+import socket
+import struct
+import threading
+import uuid
+import base64
+from collections import deque
+
+# 요청 기록(딕셔너리)을 fluentd forward 프로토콜로 모아서 보내는 비동기 로그 전송기.
+#  - emit()은 메모리 큐(deque)에 넣기만 하므로 요청 처리 경로를 절대 막지 않습니다.
+#  - 백그라운드 스레드가 batch_size개 또는 flush_interval초마다 한 번에 묶어서(Forward 모드) 보냅니다.
+#  - 수집기(fluentd)에 연결할 수 없으면 지수적으로 간격을 늘려 재시도하고, 그동안 기록은 버퍼에 쌓입니다.
+#  - 버퍼가 buffer_limit을 넘으면 가장 오래된 기록부터 버리고 그 수를 dropped로 셉니다.
+#
+# 표준 라이브러리만 사용하기 위해 forward 프로토콜에 필요한 만큼의 msgpack 인코더를 직접 구현합니다.
+class FluentForwardSender:
+
+    # :param tag: fluentd 태그 (예: honeypot.api.requests)
+    # :param require_ack: True이면 묶음마다 수신 확인(ack)을 받아야 전송 성공으로 처리 (at-least-once)
+    def __init__(self, host: str, port: int = 24224, tag: str = 'honeypot.app', batch_size: int = 200,
+                 flush_interval: float = 0.5, buffer_limit: int = 20000, timeout: float = 3.0,
+                 require_ack: bool = True, max_backoff: float = 30.0):
+        self.host = host
+        self.port = port
+        self.tag = tag
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.timeout = timeout
+        self.require_ack = require_ack
+        self.max_backoff = max_backoff
+        self.sent = 0
+        self.dropped = 0
+        self.failures = 0
+
+        self._buffer = deque(maxlen=buffer_limit)
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._sock = None
+        self._thread = threading.Thread(target=self._run, name='fluent-sender', daemon=True)
+        self._thread.start()
+
+    # 기록 하나를 전송 대기열에 넣습니다. 절대 블로킹하지 않습니다.
+    def emit(self, record: dict, timestamp: float = None):
+        if len(self._buffer) == self._buffer.maxlen:
+            self.dropped += 1 # deque가 가장 오래된 기록을 밀어냄
+        self._buffer.append((timestamp or time.time(), record))
+        if len(self._buffer) >= self.batch_size:
+            self._wakeup.set()
+
+    # 남은 기록을 최대 timeout초 동안 보내고 전송 스레드를 멈춥니다.
+    def close(self, timeout: float = 5.0):
+        self._stopped.set()
+        self._wakeup.set()
+        self._thread.join(timeout)
+        self._disconnect()
+
+    # (내부 함수) 전송 스레드 본체
+    def _run(self):
+        batch = []
+        backoff = 0.0
+        while True:
+            if not batch and len(self._buffer) < self.batch_size and not self._stopped.is_set():
+                # 한 묶음이 찰 때까지 또는 flush_interval초 동안 기다림
+                self._wakeup.wait(self.flush_interval)
+                self._wakeup.clear()
+            while len(batch) < self.batch_size and self._buffer:
+                batch.append(self._buffer.popleft())
+
+            if batch:
+                try:
+                    self._send(batch)
+                    self.sent += len(batch)
+                    batch = []
+                    backoff = 0.0
+                except (OSError, ValueError) as e:
+                    self.failures += 1
+                    self._disconnect()
+                    backoff = min(self.max_backoff, backoff * 2 or 0.5)
+                    if self._stopped.is_set():
+                        return
+                    # 수집기 장애 중에는 재시도 간격을 늘리고, 그동안 새 기록은 버퍼에 쌓임
+                    self._stopped.wait(backoff)
+                    continue
+
+            if self._stopped.is_set() and not self._buffer:
+                return
+
+    def _connect(self):
+        if self._sock is None:
+            self._sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+            self._sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        return self._sock
+
+    def _disconnect(self):
+        if self._sock is not None:
+            try:
+                self._sock.close()
+            except OSError:
+                pass
+            self._sock = None
+
+    # (내부 함수) 묶음 하나를 Forward 모드 메시지 [tag, [[time, record], ...], option]로 보냅니다.
+    def _send(self, batch: list):
+        entries = [[EventTime(timestamp), record] for timestamp, record in batch]
+        option = {'size': len(entries)}
+        chunk_id = None
+        if self.require_ack:
+            chunk_id = base64.b64encode(uuid.uuid4().bytes).decode('ascii')
+            option['chunk'] = chunk_id
+
+        sock = self._connect()
+        sock.sendall(packb([self.tag, entries, option]))
+        if chunk_id is not None:
+            response = _read_msgpack_map(sock)
+            if response.get('ack') != chunk_id:
+                raise ValueError(f"Unexpected ack from fluentd: {response}")
+
+# fluentd EventTime (msgpack 확장 타입 0: 초 4바이트 + 나노초 4바이트)
+class EventTime:
+    __slots__ = ('seconds', 'nanoseconds')
+
+    def __init__(self, timestamp: float):
+        self.seconds = int(timestamp)
+        self.nanoseconds = int((timestamp - self.seconds) * 1_000_000_000)
+
+# --- forward 프로토콜용 최소 msgpack 구현 ---
+
+def packb(value) -> bytes:
+    out = bytearray()
+    _pack(value, out)
+    return bytes(out)
+
+def _pack(value, out: bytearray):
+    if value is None:
+        out.append(0xc0)
+    elif value is True:
+        out.append(0xc3)
+    elif value is False:
+        out.append(0xc2)
+    elif isinstance(value, int):
+        if 0 <= value < 0x80:
+            out.append(value)
+        elif -32 <= value < 0:
+            out.append(value & 0xff)
+        elif 0 <= value <= 0xffffffffffffffff:
+            out += b'\xcf' + struct.pack('>Q', value) if value > 0xffffffff else b'\xce' + struct.pack('>I', value)
+        elif -0x8000000000000000 <= value < 0:
+            out += b'\xd3' + struct.pack('>q', value)
+        else:
+            raise ValueError(f"Integer out of msgpack range: {value}")
+    elif isinstance(value, float):
+        out += b'\xcb' + struct.pack('>d', value)
+    elif isinstance(value, str):
+        data = value.encode('utf-8', errors='replace')
+        _pack_header(len(data), out, 0xa0, 32, 0xd9, 0xda, 0xdb)
+        out += data
+    elif isinstance(value, (bytes, bytearray)):
+        _pack_header(len(value), out, None, 0, 0xc4, 0xc5, 0xc6)
+        out += value
+    elif isinstance(value, EventTime):
+        out += b'\xd7\x00' + struct.pack('>II', value.seconds, value.nanoseconds)
+    elif isinstance(value, (list, tuple)):
+        _pack_header(len(value), out, 0x90, 16, None, 0xdc, 0xdd)
+        for item in value:
+            _pack(item, out)
+    elif isinstance(value, dict):
+        _pack_header(len(value), out, 0x80, 16, None, 0xde, 0xdf)
+        for key, item in value.items():
+            _pack(str(key), out)
+            _pack(item, out)
+    else:
+        _pack(str(value), out)
+
+# 길이 헤더: fix 형식(fix_base, fix_limit 미만) → 8비트 → 16비트 → 32비트 길이
+def _pack_header(length: int, out: bytearray, fix_base, fix_limit: int, code8, code16, code32):
+    if fix_base is not None and length < fix_limit:
+        out.append(fix_base | length)
+    elif code8 is not None and length <= 0xff:
+        out += bytes((code8, length))
+    elif length <= 0xffff:
+        out += bytes((code16,)) + struct.pack('>H', length)
+    else:
+        out += bytes((code32,)) + struct.pack('>I', length)
+
+# fluentd의 ack 응답({'ack': <chunk id>})을 읽습니다. 문자열 키/값으로 된 map만 해석합니다.
+def _read_msgpack_map(sock) -> dict:
+    def read_exactly(n):
+        data = b''
+        while len(data) < n:
+            chunk = sock.recv(n - len(data))
+            if not chunk:
+                raise ConnectionError("fluentd closed the connection before acknowledging")
+            data += chunk
+        return data
+
+    def read_str():
+        code = read_exactly(1)[0]
+        if 0xa0 <= code <= 0xbf:
+            length = code & 0x1f
+        elif code in (0xd9, 0xc4):
+            length = read_exactly(1)[0]
+        elif code in (0xda, 0xc5):
+            length = struct.unpack('>H', read_exactly(2))[0]
+        elif code in (0xdb, 0xc6):
+            length = struct.unpack('>I', read_exactly(4))[0]
+        else:
+            raise ValueError(f"Unsupported msgpack type 0x{code:02x} in ack")
+        return read_exactly(length).decode('utf-8', errors='replace')
+
+    code = read_exactly(1)[0]
+    if 0x80 <= code <= 0x8f:
+        size = code & 0x0f
+    elif code == 0xde:
+        size = struct.unpack('>H', read_exactly(2))[0]
+    else:
+        raise ValueError(f"Unexpected msgpack type 0x{code:02x} in ack")
+    return {read_str(): read_str() for _ in range(size)}
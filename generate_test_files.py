@@ -1,7 +1,11 @@
 # generate_test_files.py
 import os
+import sys
 import yaml
 
+# libyaml이 있으면 대용량 파일을 빠르게 쓰기 위해 C 덤퍼를 사용
+_Dumper = getattr(yaml, 'CSafeDumper', yaml.SafeDumper)
+
 def generate_files():
     print("🧪 Generating complex test files for scalability experiment...")
 
@@ -62,5 +66,126 @@ def generate_files():
     print(f"  - Created dummy build context '{context_dir}'.")
     print("✅ Test file generation complete.")
 
+# --- 확장성 벤치마크용 파라미터화된 생성기 (Pipeline_Benchmark.py에서 사용) ---
+
+# n_services개의 서비스를 가진 도커 컴포즈 데이터를 생성합니다.
+# 마지막 n_buildable개의 서비스는 build 컨텍스트를 가지며 dynamic_build 규칙의 대상이 됩니다.
+def build_compose_data(n_services: int, n_buildable: int = 1, context_root: str = '.') -> dict:
+    n_buildable = min(n_buildable, n_services)
+    services = {}
+    for i in range(n_services - n_buildable):
+        # 이미지 패밀리를 여러 개로 나누어 규칙마다 매칭되는 서비스가 생기도록 함
+        services[f'service-{i}'] = {
+            'image': f'registry.local/app-{i % 1000}:{i % 7}.{i % 13}',
+            'ports': [f'{10000 + i % 50000}:80'],
+            'environment': ['MODE=production']
+        }
+    for i in range(n_buildable):
+        services[f'buildable-{i}'] = {
+            'build': os.path.join(context_root, f'buildable_context_{i}'),
+            'ports': [f'{5000 + i}:5000']
+        }
+    return {'version': '3.8', 'services': services}
+
+# n_rules개의 규칙을 가진 정책 데이터를 생성합니다.
+# 대부분은 image_replace 규칙이고, n_buildable개는 build_context 기반 dynamic_build 규칙입니다.
+def build_policy_data(n_rules: int, n_buildable: int = 1, context_root: str = '.',
+                      fake_app_path: str = './fake_apps/python-flask-generic') -> dict:
+    n_buildable = min(n_buildable, n_rules)
+    rules = []
+    for i in range(n_rules - n_buildable):
+        rules.append({
+            'name': f'Replace app-{i}',
+            'condition': {'image_name_contains': f'/app-{i}:'},
+            'action': {'type': 'image_replace', 'payload': {'image': f'honeypot/dummy:{i}.0'}}
+        })
+    for i in range(n_buildable):
+        rules.append({
+            'name': f'Dynamic build for buildable-{i}',
+            'condition': {'build_context': os.path.join(context_root, f'buildable_context_{i}')},
+            'action': {
+                'type': 'dynamic_build',
+                'payload': {
+                    'use_original_base_image': True,
+                    'fake_app_path': fake_app_path,
+                    'copy_dependencies': ['requirements.txt']
+                }
+            }
+        })
+    return {'rules': rules}
+
+# 쿠버네티스 리소스에 대한 정책 데이터를 생성합니다.
+def build_k8s_policy_data(n_rules: int) -> dict:
+    rules = []
+    for i in range(n_rules):
+        rules.append({
+            'name': f'Replace workload-{i}',
+            'condition': {
+                'kubernetes_resource': {
+                    'kind': 'Deployment',
+                    'path': 'spec.template.spec.containers.*.image',
+                    'value_contains': f'/workload-{i}:'
+                }
+            },
+            'action': {'type': 'image_replace', 'payload': {'image': f'honeypot/dummy:{i}.0'}}
+        })
+    return {'rules': rules}
+
+# 빌드 가능한 서비스들의 더미 빌드 컨텍스트를 만듭니다.
+def create_build_contexts(n_buildable: int, context_root: str = '.'):
+    for i in range(n_buildable):
+        context_dir = os.path.join(context_root, f'buildable_context_{i}')
+        os.makedirs(context_dir, exist_ok=True)
+        with open(os.path.join(context_dir, 'Dockerfile'), 'w') as f:
+            f.write("FROM python:3.9-slim\nWORKDIR /app\nCOPY . .\nCMD [\"echo\", \"hello\"]")
+        with open(os.path.join(context_dir, 'requirements.txt'), 'w') as f:
+            f.write("flask\n")
+
+# n_resources개의 리소스(Deployment + Service 쌍)를 중첩 디렉토리 트리에 나누어 씁니다.
+# :param files_per_dir: 디렉토리 하나에 넣을 Manifest 파일 수
+def generate_k8s_tree(directory: str, n_resources: int, files_per_dir: int = 100):
+    n_files = max(1, n_resources // 2)
+    for i in range(n_files):
+        sub_dir = os.path.join(directory, f'ns-{i // (files_per_dir * 10)}', f'group-{i // files_per_dir}')
+        os.makedirs(sub_dir, exist_ok=True)
+        deployment = {
+            'apiVersion': 'apps/v1', 'kind': 'Deployment',
+            'metadata': {'name': f'workload-{i}'},
+            'spec': {'replicas': 1, 'template': {'spec': {'containers': [
+                {'name': 'app', 'image': f'registry.local/workload-{i % 1000}:{i % 7}'},
+                {'name': 'sidecar', 'image': 'registry.local/proxy:1.0'}
+            ]}}}
+        }
+        service = {
+            'apiVersion': 'v1', 'kind': 'Service',
+            'metadata': {'name': f'workload-{i}-svc'},
+            'spec': {'ports': [{'port': 80, 'targetPort': 8080}]}
+        }
+        with open(os.path.join(sub_dir, f'workload-{i}.yaml'), 'w') as f:
+            yaml.dump_all([deployment, service], f, Dumper=_Dumper, sort_keys=False)
+
+# 지정한 규모의 컴포즈/정책 파일을 output_dir에 생성하고 경로들을 반환합니다.
+def generate_scaled_files(output_dir: str, n_services: int, n_rules: int, n_buildable: int = 1,
+                          fake_app_path: str = './fake_apps/python-flask-generic') -> dict:
+    os.makedirs(output_dir, exist_ok=True)
+    context_root = os.path.abspath(output_dir)
+    compose_path = os.path.join(output_dir, f'docker-compose.{n_services}.yml')
+    policy_path = os.path.join(output_dir, f'policy.{n_rules}.yml')
+
+    with open(compose_path, 'w') as f:
+        yaml.dump(build_compose_data(n_services, n_buildable, context_root), f, Dumper=_Dumper, sort_keys=False)
+    with open(policy_path, 'w') as f:
+        yaml.dump(build_policy_data(n_rules, n_buildable, context_root, os.path.abspath(fake_app_path)),
+                  f, Dumper=_Dumper, sort_keys=False)
+    create_build_contexts(n_buildable, context_root)
+
+    return {'compose': compose_path, 'policy': policy_path}
+
 if __name__ == '__main__':
-    generate_files()
\ No newline at end of file
+    # 인자가 없으면 기존의 25개 서비스 / 10개 규칙 테스트 파일을 생성
+    # python generate_test_files.py <서비스 수> <규칙 수> [출력 디렉토리] 로 규모를 지정할 수 있음
+    if len(sys.argv) >= 3:
+        paths = generate_scaled_files(sys.argv[3] if len(sys.argv) > 3 else '.', int(sys.argv[1]), int(sys.argv[2]))
+        print(f"✅ Created '{paths['compose']}' and '{paths['policy']}'.")
+    else:
+        generate_files()
\ No newline at end of file
@@ -4,35 +4,78 @@ from IaC_Parser import IaCParser
 from Policy_Engine import PolicyEngine
 from Blueprint_Generator import HoneypotBlueprintGenerator
 from IaC_Renderer import IaCRenderer
-from Deployer import DeploymentActuator
+from Deployer import DeploymentActuator, backend_supports_buildkit, resolve_backend_name
+from Status_Service import StatusService
+from Blueprint_Cache import BlueprintCache
+from Metrics import metrics
+from Pipeline_Daemon import connect_daemon, RemoteActuator, DaemonError, DaemonUnavailable
 import time
 
-def run_pipeline_generation():
+def run_pipeline_generation(source_iac_file='docker-compose.yml', policy_file='policy.yml',
+                            output_iac_file='deception-compose.yml', policy_engine=None, use_cache=True,
+                            dependency_graph=None, changed_paths=(), buildkit=True):
     
     # 설계도 생성 파이프라인(1~4단계)만 실행하고,
     # 생성된 파일의 경로를 반환합니다.
+    # policy_engine을 넘기면 정책 파일을 다시 읽지 않고 이미 컴파일된 엔진을 재사용합니다.
+    # use_cache가 True이면 입력 내용 해시가 같은 이전 결과를 캐시에서 복원합니다.
+    # dependency_graph(DependencyGraph)를 넘기면 생성 중에 서비스별 입력 의존성을 기록하고,
+    # 이전 기록과 changed_paths로 계산한 영향받는 서비스의 빌드 컨텍스트만 다시 준비합니다.
+    # buildkit은 생성할 Dockerfile의 문법으로, 청사진을 배포할 백엔드에 맞춰 넘겨야 합니다.
+    # (Engine API 백엔드는 False. Deployer.backend_supports_buildkit 참고)
+
+    # 전체 파이프라인도 하나의 단계로 계측하고, 끝나면 지표를 파일로 내보냅니다.
+    try:
+        with metrics.stage('pipeline', profile=False):
+            return _run_pipeline_generation(source_iac_file, policy_file, output_iac_file, policy_engine, use_cache,
+                                            dependency_graph, changed_paths, buildkit)
+    finally:
+        metrics.flush()
+
+def _run_pipeline_generation(source_iac_file, policy_file, output_iac_file, policy_engine, use_cache,
+                             dependency_graph=None, changed_paths=(), buildkit=True):
     start_time = time.time()
     print("Starting the Blueprint Generation pipeline...")
 
-    source_iac_file = 'docker-compose.yml'
-    policy_file = 'policy.yml'
-    output_iac_file = 'deception-compose.yml'
+    if policy_engine is None:
+        policy_engine = PolicyEngine(policy_file)
+
+    cache = BlueprintCache() if use_cache else None
+    cache_key = None
+    if cache:
+        cache_key = cache.compute_key(source_iac_file, policy_file, policy_engine, output_iac_file, buildkit)
+        if cache_key and cache.restore(cache_key, output_iac_file):
+            if dependency_graph is not None:
+                # 캐시 히트여도 다음 변경 감지를 위해 의존성은 기록 (파싱 결과는 파서 캐시에서 재사용)
+                dependency_graph.record(IaCParser().parse(source_iac_file), policy_engine, changed_paths)
+            duration = time.time() - start_time
+            metrics.incr('blueprint_cache_hits')
+            print(f"Pipeline completed in {duration:.3f} seconds (cached).")
+            print(f"\n[SUCCESS] Blueprint generation finished successfully! File saved as '{output_iac_file}'")
+            return output_iac_file
 
     parser = IaCParser()
     original_data = parser.parse(source_iac_file)
     if not original_data: return None
 
-    policy_engine = PolicyEngine(policy_file)
+    only_services = None
+    if dependency_graph is not None:
+        only_services = dependency_graph.record(original_data, policy_engine, changed_paths)
+
     tagged_data = policy_engine.apply(original_data)
 
-    blueprint_generator = HoneypotBlueprintGenerator()
-    final_blueprint = blueprint_generator.generate(tagged_data)
+    blueprint_generator = HoneypotBlueprintGenerator(buildkit=buildkit)
+    final_blueprint = blueprint_generator.generate(tagged_data, only_services=only_services)
 
     renderer = IaCRenderer()
     render_success = renderer.render(final_blueprint, output_iac_file)
     
     if not render_success: return None
 
+    # 일부 서비스의 빌드 준비가 실패한 결과는 캐시하지 않음
+    if cache and cache_key and not blueprint_generator.build_errors:
+        cache.store(cache_key, output_iac_file, blueprint_generator.generated_files)
+
     end_time = time.time()
     duration = end_time - start_time
     print(f"Pipeline completed in {duration:.3f} seconds.")
@@ -40,9 +83,36 @@ def run_pipeline_generation():
     print(f"\n[SUCCESS] Blueprint generation finished successfully! File saved as '{output_iac_file}'")
     return output_iac_file
 
+# 파이프라인 데몬이 떠 있으면 데몬에 생성을 요청하고, 없으면(또는 연결할 수 없으면) 현재 프로세스에서 실행합니다.
+# Dockerfile 문법(BuildKit 여부)은 청사진을 배포할 백엔드로 정하여 데몬에도 명시적으로 넘깁니다.
+def generate_blueprint(client=None, source_iac_file='docker-compose.yml', policy_file='policy.yml',
+                       output_iac_file='deception-compose.yml', use_cache=True, backend=None):
+    if client is not None:
+        try:
+            print("Requesting blueprint generation from the pipeline daemon...")
+            return client.generate(source_iac_file, policy_file, output_iac_file, use_cache,
+                                   backend=backend, buildkit=backend_supports_buildkit(backend))
+        except DaemonUnavailable as e:
+            print(f"Warning: Pipeline daemon is unavailable ({e}). Running the pipeline locally.")
+        except DaemonError as e:
+            print(f"[ERROR] Blueprint generation failed in the pipeline daemon: {e}")
+            return None
+    return run_pipeline_generation(source_iac_file, policy_file, output_iac_file, use_cache=use_cache,
+                                   buildkit=backend_supports_buildkit(backend))
+
 # 대화형 배포 액츄에이터를 시작합니다.
-def start_interactive_control(compose_file_path):
-    actuator = DeploymentActuator(compose_file_path)
+# backend='engine'이면 docker-compose CLI 대신 Docker Engine API로 직접 배포하고,
+# 도커 이벤트를 구독하는 상태 서비스로 status 명령에 응답합니다.
+# client(파이프라인 데몬)를 넘기면 배포 명령을 데몬에 요청합니다.
+# strategy='bluegreen'이면 up이 새 세대를 띄운 뒤 앞단 nginx로 전환합니다. (Blue_Green_Deployer.py)
+def start_interactive_control(compose_file_path, backend=None, client=None, strategy=None):
+    status_service = None
+    if client is not None:
+        actuator = RemoteActuator(client, compose_file_path, backend, strategy)
+    else:
+        status_service = StatusService.for_compose_file(compose_file_path).start() if backend == 'engine' else None
+        actuator = DeploymentActuator(compose_file_path, backend=backend, status_service=status_service,
+                                      strategy=strategy)
 
     while True:
         print("\n======= Deception Environment Control =======")
@@ -56,6 +126,8 @@ def start_interactive_control(compose_file_path):
             actuator.status()
         elif action == 'exit':
             print("Exiting controller.")
+            if status_service:
+                status_service.stop()
             break
         else:
             print(f"Unknown command: '{action}'")
@@ -63,11 +135,22 @@ def start_interactive_control(compose_file_path):
 if __name__ == '__main__':
 
     # '--no-interactive' 인자가 있으면 파이프라인 생성만 하고 종료
+    # '--no-cache' 인자가 있으면 청사진 캐시를 사용하지 않고 항상 새로 생성
+    use_cache = '--no-cache' not in sys.argv
+    # '--engine' 인자가 있으면 docker-compose CLI 대신 Docker Engine API(유닉스 소켓)로 배포
+    # (Engine API의 /build는 기존 빌더를 쓰므로 이때는 BuildKit 문법 없이 Dockerfile을 생성)
+    # 없으면 HONEYBOT_DEPLOY_BACKEND로 정하며, 데몬이 떠 있어도 이 프로세스에서 정한 백엔드로 생성/배포
+    backend = 'engine' if '--engine' in sys.argv else resolve_backend_name()
+    # '--blue-green' 인자가 있으면 무중단(blue/green) 방식으로 배포
+    strategy = 'bluegreen' if '--blue-green' in sys.argv else None
+    # 파이프라인 데몬(Pipeline_Daemon.py)이 떠 있으면 요청만 보냄. '--no-daemon'이면 항상 직접 실행
+    client = None if '--no-daemon' in sys.argv else connect_daemon()
+
     if '--no-interactive' in sys.argv:
-        run_pipeline_generation()
+        generate_blueprint(client, use_cache=use_cache, backend=backend)
         
     # 인자가 없으면, 파이프라인 생성 후 대화형 제어 시작
     else:
-        output_file = run_pipeline_generation()
+        output_file = generate_blueprint(client, use_cache=use_cache, backend=backend)
         if output_file:
-            start_interactive_control(output_file)
\ No newline at end of file
+            start_interactive_control(output_file, backend, client, strategy)
\ No newline at end of file
@@ -1,6 +1,8 @@
+import os
 import pprint
 from Kubernetes_Parser import KubernetesParser
 from Policy_Engine import PolicyEngine
+from Pipeline_Daemon import connect_daemon, DaemonError, DaemonUnavailable
 
 def main():
     print("🚀 Starting the Kubernetes Blueprint Generation pipeline...")
@@ -8,18 +10,41 @@ def main():
     k8s_manifest_dir = 'D:\Github\Transformers_Honeybot\Transformers_Honeybot\k8s'
     policy_file = 'D:\Github\Transformers_Honeybot\Transformers_Honeybot\policy_k8s.yml'
 
-    # 1. 쿠버네티스 파서 실행
-    parser = KubernetesParser()
-    parsed_resources = parser.parse(k8s_manifest_dir)
-    if not parsed_resources: return
+    # 최종 결과물 확인: 리소스는 태깅되는 대로 하나씩 출력하며, 전체를 모아 두지 않음
+    print("\n--- [Result] Tagged Kubernetes Resources from Policy Engine ---")
+    count = 0
 
-    # 2. 업그레이드된 정책 엔진 실행
-    policy_engine = PolicyEngine(policy_file)
-    tagged_resources = policy_engine.apply(parsed_resources)
+    # 파이프라인 데몬이 떠 있으면 이미 컴파일된 정책으로 데몬이 파싱/태깅한 리소스를 하나씩 받음
+    client = connect_daemon()
+    if client is not None:
+        try:
+            for message in client.stream('k8s', on_log=print, manifest_dir=os.path.abspath(k8s_manifest_dir),
+                                         policy=os.path.abspath(policy_file)):
+                pprint.pprint(message['resource'])
+                count += 1
+        except DaemonUnavailable as e:
+            if count: # 이미 일부를 출력했으면 다시 실행하여 중복 출력하지 않음
+                print(f"[ERROR]: Pipeline daemon connection lost after {count} resources: {e}")
+                return
+            print(f"Warning: Pipeline daemon is unavailable ({e}). Running the pipeline locally.")
+            client = None
+        except DaemonError as e:
+            print(f"[ERROR]: Kubernetes pipeline failed in the pipeline daemon: {e}")
+            return
 
-    # 3. 최종 결과물 확인
-    print("\n--- [Result] Tagged Kubernetes Resources from Policy Engine ---")
-    pprint.pprint(tagged_resources)
+    if client is None:
+        # 1. 정책 엔진 준비 (규칙은 로드 시 한 번만 컴파일됨)
+        policy_engine = PolicyEngine(policy_file)
+
+        # 2. 쿠버네티스 파서를 스트리밍 모드로 실행하고, 파싱되는 대로 정책을 적용
+        # 하위 디렉토리까지 탐색하며, 전체 리소스를 한 번에 메모리에 올리지 않습니다.
+        parser = KubernetesParser()
+        for resource in policy_engine.apply_iter(parser.iter_resources(k8s_manifest_dir)):
+            pprint.pprint(resource)
+            count += 1
+
+    if not count:
+        print(f"[ERROR]: No Kubernetes resources found in '{k8s_manifest_dir}'.")
 
 if __name__ == '__main__':
     main()
\ No newline at end of file